@@ -0,0 +1,288 @@
+"""
+bench.py — Throughput benchmarks for the PDFCTL operations engine.
+
+Synthesizes PDFs of various sizes (with and without images and large
+content streams), runs merge / split / extract / rotate on them through
+`pdfctl.ops`, and reports pages/sec, peak RSS and output size. Each case
+runs in a fresh interpreter so peak RSS is not polluted by earlier cases.
+
+Usage:
+    python benchmarks/bench.py                       # full matrix, print table
+    python benchmarks/bench.py --quick               # small documents only
+    python benchmarks/bench.py --save baseline.json  # record a baseline
+    python benchmarks/bench.py --compare baseline.json --tolerance 0.25
+
+With `--compare`, the exit code is 1 if any case got slower or used more
+memory than the baseline by more than the tolerance.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+SIZES = [10, 100, 1000, 10000]
+QUICK_SIZES = [10, 100]
+KINDS = ["plain", "text", "image"]
+OPS = ["merge", "merge_stream", "split", "extract", "rotate"]
+
+
+# ---------- Synthetic inputs ----------
+
+def _text_stream(page_no: int, lines: int = 400) -> bytes:
+    """Build a large page content stream of `lines` text-showing operations."""
+    parts = [b"BT /F1 9 Tf 36 800 Td 11 TL"]
+    for i in range(lines):
+        parts.append(b"(Page %d line %d: the quick brown fox jumps over the lazy dog) '" % (page_no, i))
+    parts.append(b"ET")
+    return b"\n".join(parts)
+
+
+def synthesize(path: Path, pages: int, kind: str, seed: int = 0) -> None:
+    """
+    Write a synthetic PDF.
+
+    Args:
+        path (Path): Output file.
+        pages (int): Number of pages.
+        kind (str): "plain" (empty pages), "text" (large content streams) or
+            "image" (one 96x96 RGB image per page plus a short stream).
+        seed (int, optional): Seed for the image noise. Defaults to 0.
+    """
+    from pypdf import PdfWriter
+    from pypdf.generic import (
+        DecodedStreamObject,
+        DictionaryObject,
+        NameObject,
+        NumberObject,
+        StreamObject,
+    )
+
+    rng = random.Random(seed)
+    writer = PdfWriter()
+    font = writer._add_object(DictionaryObject({
+        NameObject("/Type"): NameObject("/Font"),
+        NameObject("/Subtype"): NameObject("/Type1"),
+        NameObject("/BaseFont"): NameObject("/Helvetica"),
+    }))
+
+    for n in range(pages):
+        page = writer.add_blank_page(595, 842)
+        if kind == "plain":
+            continue
+
+        resources = DictionaryObject({
+            NameObject("/Font"): DictionaryObject({NameObject("/F1"): font}),
+        })
+        if kind == "text":
+            content = _text_stream(n + 1)
+        else:
+            image = StreamObject()
+            image._data = zlib.compress(rng.randbytes(96 * 96 * 3))
+            image.update({
+                NameObject("/Type"): NameObject("/XObject"),
+                NameObject("/Subtype"): NameObject("/Image"),
+                NameObject("/Width"): NumberObject(96),
+                NameObject("/Height"): NumberObject(96),
+                NameObject("/ColorSpace"): NameObject("/DeviceRGB"),
+                NameObject("/BitsPerComponent"): NumberObject(8),
+                NameObject("/Filter"): NameObject("/FlateDecode"),
+            })
+            resources[NameObject("/XObject")] = DictionaryObject({
+                NameObject("/Im1"): writer._add_object(image),
+            })
+            content = b"q 400 0 0 400 97 300 cm /Im1 Do Q\n" + _text_stream(n + 1, lines=5)
+
+        stream = DecodedStreamObject()
+        stream.set_data(content)
+        page[NameObject("/Resources")] = resources
+        page[NameObject("/Contents")] = writer._add_object(stream)
+
+    writer.write(path)
+
+
+# ---------- Single case (runs in a child interpreter) ----------
+
+def run_case(src: Path, op: str, pages: int, out_dir: Path) -> dict:
+    """
+    Run one operation on `src` and measure it.
+
+    Returns:
+        dict: seconds, output pages, output bytes and peak RSS in KiB.
+    """
+    import resource
+
+    from pdfctl import ops
+
+    out_bytes = out_pages = 0
+    start = time.perf_counter()
+    if op == "merge":
+        writers = [ops.merge([src, src])]
+    elif op == "merge_stream":
+        out = out_dir / "merge_stream.pdf"
+        out_pages = ops.merge_streaming([src, src], out)
+        out_bytes = out.stat().st_size
+        writers = []
+    elif op == "split":
+        spec = ",".join(f"{a}-{min(a + 9, pages)}" for a in range(1, pages + 1, 10))
+        writers = ops.split(src, spec)
+    elif op == "extract":
+        writers = [ops.extract(src, f"1-{pages}:2")]
+    elif op == "rotate":
+        writers = [ops.rotate(src, f"1-{max(1, pages // 2)}", 90)]
+    else:
+        raise ValueError(f"Unknown op: {op}")
+
+    for i, writer in enumerate(writers):
+        out = out_dir / f"{op}_{i:05d}.pdf"
+        ops.write(writer, out, label=op)
+        out_bytes += out.stat().st_size
+        out_pages += len(writer.pages)
+    seconds = time.perf_counter() - start
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        peak //= 1024  # bytes on macOS, KiB on Linux
+    return {"seconds": seconds, "pages": out_pages, "bytes": out_bytes, "peak_rss_kib": peak}
+
+
+def _measure(src: Path, op: str, pages: int, repeat: int) -> dict:
+    """Run a case `repeat` times in fresh interpreters and keep the fastest run."""
+    best = None
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory(prefix="pdfctl-bench-") as out_dir:
+            proc = subprocess.run(
+                [sys.executable, __file__, "_case", str(src), op, str(pages), out_dir],
+                check=True,
+                capture_output=True,
+                text=True,
+            )
+        result = json.loads(proc.stdout)
+        if best is None or result["seconds"] < best["seconds"]:
+            best = result
+    best["pages_per_sec"] = best["pages"] / best["seconds"] if best["seconds"] else 0.0
+    return best
+
+
+# ---------- Reporting ----------
+
+def run_matrix(sizes: list[int], kinds: list[str], operations: list[str], repeat: int) -> dict:
+    """
+    Run every (kind, size, op) combination.
+
+    Returns:
+        dict: Environment info and a `cases` mapping keyed "kind/size/op".
+    """
+    import pypdf
+
+    results = {
+        "python": platform.python_version(),
+        "pypdf": pypdf.__version__,
+        "machine": platform.machine(),
+        "cases": {},
+    }
+    with tempfile.TemporaryDirectory(prefix="pdfctl-bench-src-") as tmp:
+        for kind in kinds:
+            for size in sizes:
+                src = Path(tmp) / f"{kind}_{size}.pdf"
+                synthesize(src, size, kind)
+                for op in operations:
+                    key = f"{kind}/{size}/{op}"
+                    results["cases"][key] = _measure(src, op, size, repeat)
+                    _print_row(key, results["cases"][key])
+    return results
+
+
+def _print_row(key: str, r: dict) -> None:
+    print(
+        f"{key:<24} {r['pages_per_sec']:>12.1f} pages/s "
+        f"{r['peak_rss_kib'] / 1024:>9.1f} MiB RSS {r['bytes'] / 1024:>12.1f} KiB out",
+        flush=True,
+    )
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list[str]:
+    """
+    Compare results against a baseline.
+
+    Args:
+        current (dict): Results from `run_matrix`.
+        baseline (dict): Previously saved results.
+        tolerance (float): Allowed relative regression (0.25 = 25%).
+
+    Returns:
+        list[str]: One message per regressed metric; empty if none.
+    """
+    problems = []
+    for key, cur in current["cases"].items():
+        base = baseline.get("cases", {}).get(key)
+        if base is None:
+            continue
+        if cur["pages_per_sec"] < base["pages_per_sec"] * (1 - tolerance):
+            problems.append(
+                f"{key}: throughput {cur['pages_per_sec']:.1f} < baseline {base['pages_per_sec']:.1f} pages/s"
+            )
+        if cur["peak_rss_kib"] > base["peak_rss_kib"] * (1 + tolerance):
+            problems.append(
+                f"{key}: peak RSS {cur['peak_rss_kib']} > baseline {base['peak_rss_kib']} KiB"
+            )
+        if cur["bytes"] > base["bytes"] * (1 + tolerance):
+            problems.append(f"{key}: output {cur['bytes']} > baseline {base['bytes']} bytes")
+    return problems
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    Entry point for the benchmark script.
+
+    Returns:
+        int: The process exit code.
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["_case"]:
+        src, op, pages, out_dir = argv[1:]
+        print(json.dumps(run_case(Path(src), op, int(pages), Path(out_dir))))
+        return 0
+
+    parser = argparse.ArgumentParser(description="Benchmark the PDFCTL operations engine.")
+    parser.add_argument("--quick", action="store_true", help=f"Only use sizes {QUICK_SIZES}.")
+    parser.add_argument("--sizes", type=int, nargs="+", help=f"Page counts (default: {SIZES}).")
+    parser.add_argument("--kinds", nargs="+", choices=KINDS, default=KINDS, help="Document kinds.")
+    parser.add_argument("--ops", nargs="+", choices=OPS, default=OPS, help="Operations to run.")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per case; the fastest is kept.")
+    parser.add_argument("--save", metavar="JSON", help="Write results to this file.")
+    parser.add_argument("--compare", metavar="JSON", help="Baseline to compare against.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed regression (default: 0.25).")
+    args = parser.parse_args(argv)
+
+    sizes = args.sizes or (QUICK_SIZES if args.quick else SIZES)
+    results = run_matrix(sizes, args.kinds, args.ops, args.repeat)
+
+    if args.save:
+        Path(args.save).write_text(json.dumps(results, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        print(f"[info] Results saved to {args.save}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        problems = compare(results, baseline, args.tolerance)
+        for msg in problems:
+            print(f"[regression] {msg}")
+        if problems:
+            return 1
+        print("[info] No regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""
+startup.py — Cold-start benchmark for the PDFCTL command line.
+
+Runs each probe in a fresh interpreter several times and reports the
+fastest wall time next to a bare `python -c pass` for reference. A probe
+fails if it exceeds the time budget or if it imported a heavy module
+(pypdf, Streamlit, the operations engine) it has no use for.
+
+Usage:
+    python benchmarks/startup.py
+    python benchmarks/startup.py --budget-ms 50 --repeat 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+HEAVY = ["pypdf", "streamlit", "pdfctl.ops", "pdfctl.app"]
+
+PROBES = {
+    "import pdfctl": "import pdfctl",
+    "pdfctl --help": (
+        "import sys\n"
+        "sys.argv = ['pdfctl', '--help']\n"
+        "from pdfctl.cli import main\n"
+        "try:\n"
+        "    main()\n"
+        "except SystemExit:\n"
+        "    pass\n"
+    ),
+    "parse_ranges": "from pdfctl.ranges import parse_ranges\nparse_ranges('1-3,7-,12', 100)",
+}
+
+
+def _env() -> dict[str, str]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT / "src"), env.get("PYTHONPATH")]))
+    return env
+
+
+def time_code(code: str, repeat: int) -> float:
+    """
+    Run `python -c code` `repeat` times and return the fastest wall time.
+
+    Returns:
+        float: Seconds, including interpreter startup.
+    """
+    best = float("inf")
+    env = _env()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], env=env, check=True, stdout=subprocess.DEVNULL)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def heavy_imports(code: str) -> list[str]:
+    """
+    Returns:
+        list[str]: The modules from `HEAVY` that `code` left in `sys.modules`.
+    """
+    check = f"{code}\nimport sys\nprint(' '.join(m for m in {HEAVY!r} if m in sys.modules), file=sys.stderr)\n"
+    proc = subprocess.run(
+        [sys.executable, "-c", check],
+        env=_env(),
+        check=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    return proc.stderr.split()
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    Entry point for the startup benchmark.
+
+    Returns:
+        int: 1 if any probe is over budget or imports a heavy module, else 0.
+    """
+    parser = argparse.ArgumentParser(description="Measure PDFCTL cold-start time.")
+    parser.add_argument("--repeat", type=int, default=10, help="Runs per probe; the fastest is kept.")
+    parser.add_argument("--budget-ms", type=float, default=50.0, help="Allowed wall time per probe (default: 50).")
+    args = parser.parse_args(argv)
+
+    baseline = time_code("pass", args.repeat)
+    print(f"{'python -c pass':<16} {baseline * 1000:>7.1f} ms")
+
+    failed = False
+    for name, code in PROBES.items():
+        seconds = time_code(code, args.repeat)
+        heavy = heavy_imports(code)
+        status = "ok"
+        if seconds * 1000 > args.budget_ms:
+            status = "over budget"
+        if heavy:
+            status = f"imports {', '.join(heavy)}"
+        failed |= status != "ok"
+        print(f"{name:<16} {seconds * 1000:>7.1f} ms  (+{(seconds - baseline) * 1000:.1f} ms)  {status}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
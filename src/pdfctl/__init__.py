@@ -2,7 +2,76 @@
 pdfctl package initializer.
 
 Defines the public interface and version of the package.
+
+Submodules and the engine's functions are loaded on first attribute
+access (PEP 562), so `import pdfctl` stays cheap: `pdfctl.merge(...)`
+imports pypdf, `pdfctl.parse_ranges(...)` does not. `pdfctl.app` is the
+Streamlit script and is never imported implicitly.
 """
 
-__all__ = ["__version__"]
+import importlib
+
+__all__ = [
+    "__version__",
+    "PageRanges",
+    "RangeError",
+    "RangeSyntaxError",
+    "dedupe",
+    "extract",
+    "merge",
+    "merge_streaming",
+    "parse_ranges",
+    "rotate",
+    "rotate_incremental",
+    "split",
+    "validate_ranges",
+]
 __version__ = "0.1.0"
+
+_SUBMODULES = {
+    "api",
+    "batch",
+    "buffers",
+    "bundle",
+    "cache",
+    "cli",
+    "incremental",
+    "index",
+    "jobs",
+    "metrics",
+    "ops",
+    "optimize",
+    "proxy",
+    "ranges",
+    "store",
+}
+
+# Public name -> submodule that defines it.
+_ATTRIBUTES = {
+    "PageRanges": "ranges",
+    "RangeError": "ranges",
+    "RangeSyntaxError": "ranges",
+    "parse_ranges": "ranges",
+    "validate_ranges": "ranges",
+    "dedupe": "ops",
+    "extract": "ops",
+    "merge": "ops",
+    "merge_streaming": "ops",
+    "rotate": "ops",
+    "rotate_incremental": "ops",
+    "split": "ops",
+}
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        return importlib.import_module(f"{__name__}.{name}")
+    if name in _ATTRIBUTES:
+        value = getattr(importlib.import_module(f"{__name__}.{_ATTRIBUTES[name]}"), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | _SUBMODULES | set(_ATTRIBUTES))
@@ -0,0 +1,9 @@
+"""
+Allows running the PDFCTL command line as `python -m pdfctl`.
+"""
+
+import sys
+
+from pdfctl.cli import main
+
+sys.exit(main())
@@ -0,0 +1,755 @@
+"""
+api.py — HTTP JSON API for PDFCTL.
+
+A small HTTP/1.1 server (standard library only) exposing the engine to
+other services:
+
+    POST /merge    files in output order            -> merged PDF
+    POST /split    one file, ranges=1-3,4-          -> ZIP of the parts
+    POST /extract  one file, pages=2,5-7            -> PDF
+    POST /rotate   one file, pages=1-3, angle=90    -> PDF
+    GET  /health                                    -> {"status": "ok", ...}
+    GET  /ranges   expr=1-3,x, pages=10, mode=set   -> {"valid": false, "errors": [...]}
+
+Documents are sent as the raw request body (`Content-Type:
+application/pdf`) or as `multipart/form-data` file parts; bodies may use
+`Transfer-Encoding: chunked`. Parameters come from the query string or
+from non-file form fields: `pages`, `ranges`, `angle`, `incremental`,
+`dedupe`, `optimize` and `image_dpi`. Sending several files to split,
+extract or rotate processes each of them and returns one ZIP. Errors are
+JSON objects, `{"error": "..."}`, with a 4xx/5xx status.
+
+Documents too large for one request are uploaded in pieces first, and
+operations then refer to them by digest with a JSON body such as
+`{"inputs": ["<sha256>"], "pages": "1-3"}`:
+
+    POST   /uploads        (Upload-Length: n)      -> 201 {"upload": id, "offset": 0}
+    PATCH  /uploads/<id>   Upload-Offset: k, piece -> {"offset": k'} (+ "digest" once complete)
+    GET    /uploads/<id>                           -> {"offset": k, "length": n}
+    POST   /uploads/<id>                           -> {"digest": ...} (completes it)
+    DELETE /uploads/<id>                           -> {"upload": id, "aborted": true}
+
+A PATCH that breaks off keeps what arrived; `GET` tells where to resume
+(a PATCH at the wrong offset gets 409 with the current one). Pieces are
+appended to disk and hashed as they arrive, so no upload is ever held in
+memory. `upload` is a matching client.
+
+Request bodies are streamed into the shared upload store (hashed on the
+fly, never held in memory) and the work runs in a process pool, so
+requests are processed in parallel rather than behind one GIL. Responses
+are sent from disk with `sendfile`, or with chunked encoding when their
+size is not known up front. Connections are kept alive between requests,
+and at most `max_concurrency` requests are processed at once; the rest
+wait briefly and are then turned away with 503.
+"""
+
+from __future__ import annotations
+
+import http.client
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from email.parser import HeaderParser
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import BinaryIO, Iterator
+from urllib.parse import parse_qsl, quote, urlsplit
+
+from pdfctl import __version__, ops
+from pdfctl.batch import BatchReport, process_one, run_batch
+from pdfctl.buffers import SpooledBuffer
+from pdfctl.bundle import ZipBundle
+from pdfctl.ranges import validate_ranges
+from pdfctl.store import UploadConflict, UploadStore
+
+BUFFER_SIZE = 64 * 1024
+MAX_HEADER_SIZE = 16 * 1024
+DEFAULT_MAX_BODY = 4 * 1024 * 1024 * 1024
+MAX_JSON_SIZE = 1024 * 1024
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+UPLOAD_RETRIES = 5
+QUEUE_TIMEOUT = 30.0
+IDLE_TIMEOUT = 60.0
+
+OPERATIONS = ("merge", "split", "extract", "rotate")
+_TRUE = {"1", "true", "yes", "on"}
+
+
+class HTTPError(Exception):
+    """An error answered with `status` and a JSON body."""
+
+    def __init__(self, status: HTTPStatus, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+class _LimitedReader:
+    """Read at most `length` bytes of a request body."""
+
+    def __init__(self, fp: BinaryIO, length: int) -> None:
+        self._fp = fp
+        self._left = length
+
+    def read(self, size: int = -1) -> bytes:
+        if self._left <= 0:
+            return b""
+        size = self._left if size < 0 else min(size, self._left)
+        data = self._fp.read(size)
+        if not data:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Request body ended early")
+        self._left -= len(data)
+        return data
+
+
+class _ChunkedReader:
+    """Decode a `Transfer-Encoding: chunked` request body, up to `limit` bytes."""
+
+    def __init__(self, fp: BinaryIO, limit: int) -> None:
+        self._fp = fp
+        self._left = 0  # bytes left in the current chunk
+        self._limit = limit
+        self._done = False
+
+    def read(self, size: int = -1) -> bytes:
+        if self._done:
+            return b""
+        if self._left == 0:
+            self._next_chunk()
+            if self._done:
+                return b""
+        size = self._left if size < 0 else min(size, self._left)
+        data = self._fp.read(size)
+        if not data:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Request body ended early")
+        self._left -= len(data)
+        if self._left == 0:
+            self._fp.readline(MAX_HEADER_SIZE)  # CRLF after the chunk data
+        return data
+
+    def _next_chunk(self) -> None:
+        line = self._fp.readline(MAX_HEADER_SIZE)
+        try:
+            self._left = int(line.split(b";", 1)[0].strip(), 16)
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Malformed chunked body") from None
+        if self._left == 0:
+            while self._fp.readline(MAX_HEADER_SIZE).strip():
+                pass  # trailers are ignored
+            self._done = True
+            return
+        self._limit -= self._left
+        if self._limit < 0:
+            raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Request body too large")
+
+
+class _ChunkedWriter:
+    """
+    Send a response body with chunked encoding.
+
+    Small writes (pypdf and zipfile make many) are coalesced into chunks of
+    about `BUFFER_SIZE`. `tell` reports the bytes written, which is all
+    `zipfile` needs to write to an unseekable stream.
+    """
+
+    def __init__(self, fp: BinaryIO) -> None:
+        self._fp = fp
+        self._buf = bytearray()
+        self._pos = 0
+
+    def write(self, data: bytes) -> int:
+        self._buf += data
+        self._pos += len(data)
+        if len(self._buf) >= BUFFER_SIZE:
+            self.flush()
+        return len(data)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def flush(self) -> None:
+        if self._buf:
+            self._fp.write(b"%x\r\n%s\r\n" % (len(self._buf), self._buf))
+            self._buf.clear()
+
+    def close(self) -> None:
+        """Send the remaining data and the terminating chunk."""
+        self.flush()
+        self._fp.write(b"0\r\n\r\n")
+
+
+class _Multipart:
+    """
+    Streaming `multipart/form-data` parser.
+
+    `parts()` yields each part's headers; the part's content is then read
+    from the parser itself with `read()` until it returns b"", so file
+    parts can be copied to disk without being held in memory.
+    """
+
+    def __init__(self, fp, boundary: bytes) -> None:
+        self._fp = fp
+        self._delim = b"\r\n--" + boundary
+        self._buf = b"\r\n"  # the first delimiter is not preceded by a line break
+        self._in_part = True  # the preamble is skipped like a part
+
+    def read(self, size: int = -1) -> bytes:
+        if not self._in_part:
+            return b""
+        size = BUFFER_SIZE if size < 0 else size
+        while True:
+            i = self._buf.find(self._delim)
+            if i >= 0:
+                end = min(i, size)
+                self._in_part = end < i
+            else:
+                end = min(len(self._buf) - len(self._delim) + 1, size)
+            if end > 0 or i == 0:
+                data, self._buf = self._buf[:end], self._buf[end:]
+                return data
+            if not self._fill():
+                raise HTTPError(HTTPStatus.BAD_REQUEST, "Truncated multipart body")
+
+    def parts(self) -> Iterator:
+        while True:
+            while self.read():
+                pass  # skip what the caller did not read
+            while len(self._buf) < len(self._delim) + 2:
+                if not self._fill():
+                    raise HTTPError(HTTPStatus.BAD_REQUEST, "Truncated multipart body")
+            if self._buf[len(self._delim):].startswith(b"--"):
+                return
+            while (end := self._buf.find(b"\r\n\r\n", len(self._delim))) < 0:
+                if len(self._buf) > MAX_HEADER_SIZE or not self._fill():
+                    raise HTTPError(HTTPStatus.BAD_REQUEST, "Malformed multipart headers")
+            head = self._buf[len(self._delim):end].split(b"\r\n", 1)[-1]
+            self._buf = self._buf[end + 4:]
+            self._in_part = True
+            # Browsers send non-ASCII file names as raw UTF-8.
+            yield HeaderParser().parsestr(head.decode("utf-8", "replace") + "\r\n\r\n")
+
+    def _fill(self) -> bool:
+        data = self._fp.read(BUFFER_SIZE)
+        self._buf += data
+        return bool(data)
+
+
+def merge_one(paths: list[str], dest: str, dedupe: bool = False, optimize: bool = False, image_dpi=None) -> None:
+    """
+    Merge documents into `dest`; runs inside a worker process.
+
+    Without dedupe or optimize the inputs are streamed (`ops.merge_streaming`).
+    """
+    if not (dedupe or optimize or image_dpi):
+        ops.merge_streaming(paths, dest)
+        return
+    writer = ops.merge(paths)
+    if dedupe:
+        ops.dedupe(writer)
+    if optimize or image_dpi:
+        from pdfctl.optimize import optimize as optimize_writer
+
+        optimize_writer(writer, image_dpi=image_dpi, workers=1, label="merge")
+    ops.write(writer, dest, label="merge")
+
+
+class APIServer(ThreadingHTTPServer):
+    """
+    Threaded HTTP server holding the shared state of the API.
+
+    Args:
+        address (tuple[str, int]): `(host, port)` to listen on.
+        executor (Executor): Pool the operations run on.
+        store (UploadStore): Where request bodies are stored.
+        work_dir (str | os.PathLike): Directory for produced files.
+        max_concurrency (int): Requests processed at the same time.
+        max_body (int): Largest accepted request body in bytes.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: tuple[str, int],
+        executor: Executor,
+        store: UploadStore,
+        work_dir: str | os.PathLike[str],
+        max_concurrency: int,
+        max_body: int = DEFAULT_MAX_BODY,
+    ) -> None:
+        super().__init__(address, APIHandler)
+        self.executor = executor
+        self.store = store
+        self.work_dir = str(work_dir)
+        self.max_body = max_body
+        self.max_concurrency = max_concurrency
+        self.slots = threading.BoundedSemaphore(max_concurrency)
+
+
+class APIHandler(BaseHTTPRequestHandler):
+    """Request handler; see the module docstring for the endpoints."""
+
+    server: APIServer
+    protocol_version = "HTTP/1.1"  # keep-alive
+    server_version = f"pdfctl/{__version__}"
+    timeout = IDLE_TIMEOUT
+
+    def log_message(self, format: str, *args) -> None:
+        pass  # one line per request is too much at high request rates
+
+    def do_GET(self) -> None:
+        route = urlsplit(self.path).path.strip("/").split("/")
+        if route == ["health"]:
+            self.send_json(
+                HTTPStatus.OK,
+                {"status": "ok", "version": __version__, "max_concurrency": self.server.max_concurrency},
+            )
+        elif route == ["ranges"]:
+            self.guarded(self.check_ranges, dict(parse_qsl(urlsplit(self.path).query, keep_blank_values=True)))
+        elif len(route) == 2 and route[0] == "uploads":
+            self.guarded(self.upload_status, route[1])
+        else:
+            self.not_found()
+
+    def do_POST(self) -> None:
+        url = urlsplit(self.path)
+        route = url.path.strip("/").split("/")
+        if route == ["uploads"]:
+            self.guarded(self.upload_begin)
+            return
+        if len(route) == 2 and route[0] == "uploads":
+            self.guarded(self.upload_finish, route[1])
+            return
+        op = route[0]
+        if len(route) != 1 or op not in OPERATIONS:
+            self.not_found()
+            return
+        if not self.server.slots.acquire(timeout=QUEUE_TIMEOUT):
+            self.close_connection = True  # the body is left unread
+            self.send_json(HTTPStatus.SERVICE_UNAVAILABLE, {"error": "Server busy"}, {"Retry-After": "1"})
+            return
+        work = Path(tempfile.mkdtemp(prefix="pdfctl-api-", dir=self.server.work_dir))
+        try:
+            params = dict(parse_qsl(url.query))
+            self.guarded(lambda: self.run(op, self.read_inputs(params), params, work))
+        finally:
+            self.server.slots.release()
+            shutil.rmtree(work, ignore_errors=True)
+
+    def do_PATCH(self) -> None:
+        route = urlsplit(self.path).path.strip("/").split("/")
+        if len(route) == 2 and route[0] == "uploads":
+            self.guarded(self.upload_append, route[1])
+        else:
+            self.not_found()
+
+    def do_DELETE(self) -> None:
+        route = urlsplit(self.path).path.strip("/").split("/")
+        if len(route) == 2 and route[0] == "uploads":
+            self.guarded(self.upload_abort, route[1])
+        else:
+            self.not_found()
+
+    def guarded(self, handler, *args) -> None:
+        """Run `handler(*args)`, answering errors with the matching status."""
+        self._started = False
+        try:
+            handler(*args)
+        except ConnectionError:
+            self.close_connection = True  # the client went away
+        except Exception as exc:
+            # The body may be partly unread; its rest must not be parsed as the next request.
+            self._drop_body()
+            if isinstance(exc, HTTPError):
+                self.fail(exc.status, str(exc))
+            elif isinstance(exc, UploadConflict):
+                self.fail(HTTPStatus.CONFLICT, str(exc), offset=exc.offset)
+            elif isinstance(exc, (ValueError, KeyError)):
+                self.fail(HTTPStatus.BAD_REQUEST, str(exc))
+            elif isinstance(exc, ImportError):
+                self.fail(HTTPStatus.NOT_IMPLEMENTED, str(exc))
+            elif isinstance(exc, FileNotFoundError):
+                self.fail(HTTPStatus.NOT_FOUND, str(exc))
+            else:  # pypdf errors, broken worker pool, ...
+                self.fail(HTTPStatus.UNPROCESSABLE_ENTITY, f"{type(exc).__name__}: {exc}")
+
+    def check_ranges(self, params: dict[str, str]) -> None:
+        """
+        Validate a range expression without any document (`validate_ranges`),
+        so clients can check it as it is typed.
+        """
+        pages = params.get("pages")
+        errors = validate_ranges(
+            params.get("expr", ""), int(pages) if pages else None, params.get("mode", "set")
+        )
+        self.send_json(
+            HTTPStatus.OK,
+            {"valid": not errors, "errors": [{"start": e.start, "end": e.end, "message": e.message} for e in errors]},
+        )
+
+    def not_found(self) -> None:
+        self._drop_body()
+        self.send_json(HTTPStatus.NOT_FOUND, {"error": f"Not found: {self.command} {urlsplit(self.path).path}"})
+
+    # ---- resumable uploads ----
+
+    def upload_begin(self) -> None:
+        self._drop_body()
+        length = self.headers.get("Upload-Length")
+        length = int(length) if length else None
+        if length is not None and length > self.server.max_body:
+            raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Upload too large")
+        upload_id = self.server.store.begin(length)
+        self.send_json(
+            HTTPStatus.CREATED, {"upload": upload_id, "offset": 0}, {"Location": f"/uploads/{upload_id}"}
+        )
+
+    def upload_status(self, upload_id: str) -> None:
+        store = self.server.store
+        self.send_json(
+            HTTPStatus.OK,
+            {"upload": upload_id, "offset": store.offset(upload_id), "length": store.length(upload_id)},
+        )
+
+    def upload_append(self, upload_id: str) -> None:
+        store = self.server.store
+        if "Upload-Offset" not in self.headers:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Missing Upload-Offset header")
+        offset = store.append(upload_id, int(self.headers["Upload-Offset"]), self.body())
+        if offset > self.server.max_body:
+            store.abort(upload_id)
+            raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Upload too large")
+        payload: dict[str, object] = {"upload": upload_id, "offset": offset}
+        if offset == store.length(upload_id):
+            payload["digest"] = store.finish(upload_id)
+        self.send_json(HTTPStatus.OK, payload)
+
+    def upload_finish(self, upload_id: str) -> None:
+        self._drop_body()
+        self.send_json(HTTPStatus.OK, {"digest": self.server.store.finish(upload_id)})
+
+    def upload_abort(self, upload_id: str) -> None:
+        self._drop_body()
+        self.server.store.offset(upload_id)  # 404 for unknown uploads
+        self.server.store.abort(upload_id)
+        self.send_json(HTTPStatus.OK, {"upload": upload_id, "aborted": True})
+
+    # ---- request body ----
+
+    def body(self):
+        """Return a reader for the request body, enforcing the size limit."""
+        if "chunked" in self.headers.get("Transfer-Encoding", "").lower():
+            return _ChunkedReader(self.rfile, self.server.max_body)
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Invalid Content-Length") from None
+        if length > self.server.max_body:
+            raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Request body too large")
+        return _LimitedReader(self.rfile, length)
+
+    def read_inputs(self, params: dict[str, str]) -> list[tuple[str, str]]:
+        """
+        Store the uploaded documents and collect form fields into `params`.
+
+        Returns:
+            list[tuple[str, str]]: `(file name, stored path)` per document, in order.
+        """
+        store = self.server.store
+        ctype = self.headers.get_content_type()
+        body = self.body()
+        inputs = []
+        if ctype == "multipart/form-data":
+            boundary = self.headers.get_param("boundary")
+            if not boundary:
+                raise HTTPError(HTTPStatus.BAD_REQUEST, "Missing multipart boundary")
+            form = _Multipart(body, boundary.encode("latin-1"))
+            for headers in form.parts():
+                filename = headers.get_filename()
+                if filename is None:
+                    params[headers.get_param("name", header="content-disposition") or ""] = _field(form)
+                else:
+                    inputs.append((filename or "document.pdf", str(store.path(store.put(form)))))
+        elif ctype == "application/json":
+            data = body.read(MAX_JSON_SIZE + 1)
+            if len(data) > MAX_JSON_SIZE or body.read(1):
+                raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "JSON body too large")
+            payload = json.loads(data or b"{}")
+            if not isinstance(payload, dict) or not isinstance(payload.get("inputs", []), list):
+                raise ValueError('Expected {"inputs": ["<sha256>", ...], ...}')
+            for digest in payload.pop("inputs", []):
+                path = store.get(str(digest))
+                if path is None:
+                    raise FileNotFoundError(f"Upload {digest} is not in the store")
+                inputs.append((f"{digest}.pdf", str(path)))
+            params.update((key, _param(value)) for key, value in payload.items())
+        elif ctype in ("application/pdf", "application/octet-stream"):
+            if self.headers.get("Content-Length") == "0":
+                raise ValueError("Empty request body")
+            inputs.append((params.get("name", "document.pdf"), str(store.path(store.put(body)))))
+        else:
+            raise HTTPError(HTTPStatus.UNSUPPORTED_MEDIA_TYPE, "Send application/pdf or multipart/form-data")
+        while body.read(BUFFER_SIZE):
+            pass  # e.g. a multipart epilogue; the next request starts after it
+        return inputs
+
+    def _drop_body(self) -> None:
+        """Close the connection after this response if the request carries an unread body."""
+        if self.headers.get("Content-Length", "0") != "0" or self.headers.get("Transfer-Encoding"):
+            self.close_connection = True
+
+    # ---- operations ----
+
+    def run(self, op: str, inputs: list[tuple[str, str]], params: dict[str, str], work: Path) -> None:
+        """Run `op` on the stored inputs and send the result."""
+        if not inputs:
+            raise ValueError("No document in the request")
+        optimize = params.get("optimize", "").lower() in _TRUE
+        image_dpi = int(params["image_dpi"]) if params.get("image_dpi") else None
+        pool = self.server.executor
+
+        if op == "merge":
+            dest = str(work / "merged.pdf")
+            dedupe = params.get("dedupe", "").lower() in _TRUE
+            pool.submit(merge_one, [p for _, p in inputs], dest, dedupe, optimize, image_dpi).result()
+            self.send_file(dest, "application/pdf", "merged.pdf")
+            return
+
+        pages = params.get("ranges" if op == "split" else "pages") or params.get("pages")
+        if not pages:
+            raise ValueError(f"Missing {'ranges' if op == 'split' else 'pages'} parameter")
+        angle = int(params.get("angle", 90)) if op == "rotate" else None
+        incremental = params.get("incremental", "").lower() in _TRUE
+
+        if len(inputs) > 1:
+            buf = SpooledBuffer(directory=work)
+            report = run_batch(
+                op, inputs, pages, buf,
+                angle=angle, incremental=incremental, optimize=optimize, image_dpi=image_dpi,
+                executor=pool, work_dir=work,
+            )
+            if not report.files:
+                raise ValueError("; ".join(f"{name}: {error}" for name, error in report.errors))
+            self.send_batch(buf, report, op)
+            return
+
+        name, path = inputs[0]
+        outputs = pool.submit(
+            process_one, op, path, name, pages, angle, str(work), incremental, optimize, image_dpi
+        ).result()
+        if op == "split":
+            self.send_zip([(Path(arcname).name, produced) for arcname, produced in outputs], "parts.zip")
+        else:
+            self.send_file(outputs[0][1], "application/pdf", Path(outputs[0][0]).name)
+
+    # ---- responses ----
+
+    def fail(self, status: HTTPStatus, message: str, **extra) -> None:
+        """Answer with a JSON error, or drop the connection if a response is already under way."""
+        if self._started:
+            self.close_connection = True
+            return
+        self.send_json(status, {"error": message, **extra})
+
+    def send_json(self, status: HTTPStatus, payload: dict, headers: dict[str, str] | None = None) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_headers(self, ctype: str, filename: str, length: int | None, extra: dict[str, str] | None = None) -> None:
+        self._started = True
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Disposition", _disposition(filename))
+        if length is None:
+            self.send_header("Transfer-Encoding", "chunked")
+        else:
+            self.send_header("Content-Length", str(length))
+        for key, value in (extra or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+
+    def send_file(self, path: str, ctype: str, filename: str) -> None:
+        with open(path, "rb") as fh:
+            size = os.fstat(fh.fileno()).st_size
+            self._send_headers(ctype, filename, size)
+            self.connection.sendfile(fh)
+
+    def send_zip(self, entries: list[tuple[str, str]], filename: str) -> None:
+        """Stream a ZIP of produced files; its size is not known in advance."""
+        self._send_headers("application/zip", filename, None)
+        out = _ChunkedWriter(self.wfile)
+        with ZipBundle(out) as bundle:
+            for arcname, produced in entries:
+                bundle.add(arcname, produced)
+        out.close()
+
+    def send_batch(self, buf: SpooledBuffer, report: BatchReport, op: str) -> None:
+        length = buf.size()
+        buf.seek(0)
+        extra = {"X-Pdfctl-Files": str(report.files)}
+        if report.errors:
+            extra["X-Pdfctl-Errors"] = json.dumps(report.errors)
+        self._send_headers("application/zip", f"{op}.zip", length, extra)
+        shutil.copyfileobj(buf, self.wfile, BUFFER_SIZE)
+
+
+def _param(value) -> str:
+    """Turn a JSON parameter into its query string form."""
+    if isinstance(value, bool):
+        return "1" if value else ""
+    return str(value)
+
+
+def _disposition(filename: str) -> str:
+    """
+    Build a `Content-Disposition` header for a download named after a client-supplied name.
+
+    Line breaks and quotes are dropped so the name cannot end the header;
+    `filename` carries an ASCII approximation and `filename*` (RFC 5987)
+    the exact UTF-8 name.
+    """
+    name = "".join(c for c in filename if c not in '\r\n"') or "download"
+    fallback = "".join(c if " " <= c <= "~" and c != "\\" else "_" for c in name)
+    return f"attachment; filename=\"{fallback}\"; filename*=UTF-8''{quote(name, safe='')}"
+
+
+def _field(form: _Multipart) -> str:
+    """Read a (small) text form field."""
+    data = b""
+    while len(data) <= MAX_HEADER_SIZE and (block := form.read()):
+        data += block
+    if len(data) > MAX_HEADER_SIZE:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "Form field too large")
+    return data.decode("utf-8")
+
+
+def _call(conn: http.client.HTTPConnection, method: str, path: str, body: bytes | None = None, headers=None):
+    conn.request(method, path, body=body, headers=headers or {})
+    response = conn.getresponse()
+    return response.status, json.loads(response.read() or b"{}")
+
+
+def upload(
+    path: str | os.PathLike[str],
+    url: str = "http://127.0.0.1:8600",
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    upload_id: str | None = None,
+    progress: ops.Progress = None,
+) -> str:
+    """
+    Upload a file to a `pdfctl serve` instance in pieces.
+
+    Only one piece is in memory at a time. When the connection drops, the
+    client asks the server how much arrived and continues from there (up
+    to `UPLOAD_RETRIES` times in a row).
+
+    Args:
+        path (str | os.PathLike): The file.
+        url (str, optional): Base URL of the API.
+        chunk_size (int, optional): Bytes per request. Defaults to 8 MiB.
+        upload_id (str | None, optional): Resume this earlier upload
+            instead of starting a new one.
+        progress (Progress, optional): Called as `progress(sent, total)`.
+
+    Returns:
+        str: The document's digest, usable as an `inputs` entry.
+
+    Raises:
+        ValueError: If the server rejects the upload.
+        OSError: If the server stays unreachable.
+    """
+    parts = urlsplit(url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=IDLE_TIMEOUT)
+    size = os.path.getsize(path)
+    offset = None
+    if upload_id is None:
+        status, payload = _call(conn, "POST", "/uploads", headers={"Upload-Length": str(size)})
+        if status != HTTPStatus.CREATED:
+            raise ValueError(payload.get("error", f"HTTP {status}"))
+        upload_id, offset = payload["upload"], 0
+
+    failures = 0
+    try:
+        with open(path, "rb") as fh:
+            while True:
+                try:
+                    if offset is None:  # resuming: ask where the server is
+                        status, payload = _call(conn, "GET", f"/uploads/{upload_id}")
+                        if status != HTTPStatus.OK:
+                            raise ValueError(payload.get("error", f"HTTP {status}"))
+                        offset = payload["offset"]
+                    fh.seek(offset)
+                    headers = {"Upload-Offset": str(offset), "Content-Type": "application/octet-stream"}
+                    status, payload = _call(conn, "PATCH", f"/uploads/{upload_id}", fh.read(chunk_size), headers)
+                except (OSError, http.client.HTTPException) as exc:
+                    failures += 1
+                    if failures > UPLOAD_RETRIES:
+                        raise OSError(f"Upload {upload_id} interrupted (resume it with this ID): {exc}") from exc
+                    conn.close()
+                    time.sleep(min(2 ** failures, 30))
+                    offset = None
+                    continue
+                failures = 0
+                if status == HTTPStatus.CONFLICT:
+                    offset = payload["offset"]
+                    continue
+                if status != HTTPStatus.OK:
+                    raise ValueError(payload.get("error", f"HTTP {status}"))
+                offset = payload["offset"]
+                if progress:
+                    progress(offset, size)
+                if "digest" in payload:
+                    return payload["digest"]
+    finally:
+        conn.close()
+
+
+def serve(
+    host: str = "127.0.0.1",
+    port: int = 8600,
+    workers: int | None = None,
+    max_concurrency: int | None = None,
+    max_body: int = DEFAULT_MAX_BODY,
+    store_dir: str | os.PathLike[str] | None = None,
+) -> None:
+    """
+    Run the API server until interrupted.
+
+    Args:
+        host (str, optional): Address to bind. Defaults to "127.0.0.1".
+        port (int, optional): Port to listen on. Defaults to 8600.
+        workers (int | None, optional): Worker processes; None uses all CPUs.
+        max_concurrency (int | None, optional): Requests processed at once;
+            defaults to twice the number of workers, so uploads and
+            downloads overlap with processing.
+        max_body (int, optional): Largest accepted request body in bytes.
+        store_dir (str | os.PathLike | None, optional): Upload store
+            directory; defaults to `PDFCTL_STORE_DIR` or `<tmp>/pdfctl-store`.
+    """
+    workers = workers or os.cpu_count() or 1
+    # spawn: the server is threaded, and forking threads is unsafe.
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    store = UploadStore(store_dir)
+    with tempfile.TemporaryDirectory(prefix="pdfctl-api-") as work_dir:
+        server = APIServer((host, port), executor, store, work_dir, max_concurrency or 2 * workers, max_body)
+        print(f"[info] pdfctl API on http://{host}:{server.server_port} ({workers} workers)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            executor.shutdown(cancel_futures=True)
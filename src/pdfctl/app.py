@@ -1,11 +1,230 @@
-from pathlib import Path
+import importlib.util
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 import streamlit as st
-from pypdf import PdfReader, PdfWriter
-from pdfctl.ranges import parse_ranges
+from pdfctl import metrics, ops
+from pdfctl.batch import run_batch
+from pdfctl.buffers import SpooledBuffer
+from pdfctl.bundle import ZipBundle
+from pdfctl.cache import ReaderCache, ResultCache, result_key
+from pdfctl.jobs import CANCELLED, FAILED, JobQueue
+from pdfctl.optimize import optimize
+from pdfctl.ranges import validate_ranges
+from pdfctl.store import UploadStore
 
 st.set_page_config(page_title="PDF Control", page_icon="📄", layout="wide")
 st.title("📄 PDF Tools — PDFCTL")
 
+# Per-session spill directory for large outputs; removed when the session ends.
+if "tmp_dir" not in st.session_state:
+    st.session_state["tmp_dir"] = tempfile.TemporaryDirectory(prefix="pdfctl-")
+session_dir = st.session_state["tmp_dir"].name
+
+# Per-session cache of parsed uploads, so reruns don't re-parse the same PDF.
+# Page-count indexes are persisted by content hash, so they outlive the session.
+if "readers" not in st.session_state:
+    index_dir = os.environ.get("PDFCTL_INDEX_DIR") or os.path.join(tempfile.gettempdir(), "pdfctl-index")
+    st.session_state["readers"] = ReaderCache(index_dir=index_dir)
+readers = st.session_state["readers"]
+
+
+@st.cache_resource
+def job_queue() -> JobQueue:
+    """One background queue shared by all sessions, so long jobs never block reruns."""
+    return JobQueue()
+
+
+@st.cache_resource
+def result_cache() -> ResultCache:
+    """Produced PDFs shared by all sessions, so repeated requests are served from disk."""
+    directory = os.environ.get("PDFCTL_RESULT_CACHE") or os.path.join(tempfile.gettempdir(), "pdfctl-results")
+    return ResultCache(directory)
+
+
+@st.cache_resource
+def batch_pool() -> ProcessPoolExecutor:
+    """Worker processes shared by all sessions for multi-file batches."""
+    # spawn: forking the threaded Streamlit server is unsafe.
+    return ProcessPoolExecutor(mp_context=multiprocessing.get_context("spawn"))
+
+
+@st.cache_resource
+def upload_store() -> UploadStore:
+    """Uploads by content hash, shared by all sessions and, under `pdfctl-web --workers`, all workers."""
+    store = UploadStore()
+    store.prune()
+    return store
+
+
+results = result_cache()
+store = upload_store()
+
+# Optional size optimization of every produced PDF (except fast rotations).
+st.sidebar.subheader("Output")
+shrink = st.sidebar.checkbox(
+    "Optimize outputs",
+    help="Recompress content streams and drop unused objects before writing. Slower, smaller files."
+)
+has_pillow = importlib.util.find_spec("PIL") is not None
+image_dpi = st.sidebar.number_input(
+    "Downsample images above (DPI)",
+    min_value=0,
+    value=0,
+    step=50,
+    disabled=not (shrink and has_pillow),
+    help="0 keeps images as they are." if has_pillow else "Needs Pillow: pip install 'pdfctl[optimize]'."
+)
+# (optimize, image DPI) as passed to the jobs; `opt_tag` keeps cached results apart.
+optimize_opts = (shrink, int(image_dpi) if shrink and has_pillow and image_dpi else None)
+opt_tag = "" if not shrink else f":opt{optimize_opts[1] or ''}"
+
+
+def finish(writer, opts, label, directory=session_dir):
+    """Serialize `writer`, optimizing it first if `opts` asks for it; returns (buffer, report or None)."""
+    report = optimize(writer, image_dpi=opts[1], label=label) if opts[0] else None
+    return ops.to_buffer(writer, directory=directory, label=label), report
+
+
+def merge_job(sources, directory, dedupe=False, opts=(False, None), progress=None):
+    if not dedupe and not opts[0]:
+        buf = SpooledBuffer(directory=directory)
+        ops.merge_streaming(sources, buf, progress=progress)
+        buf.seek(0)
+        return buf, None, None
+    writer = ops.merge(sources, progress=progress)
+    report = ops.dedupe(writer) if dedupe else None
+    buf, optimized = finish(writer, opts, "merge", directory)
+    return buf, report, optimized
+
+
+def split_job(source, digest, ranges, directory, cache, opts=(False, None), tag="", progress=None):
+    """Split into one stored (uncompressed) ZIP, serializing and releasing each part in turn."""
+    reader = ops.open_reader(source)
+    plan = ops.plan_split(ranges, len(reader.pages))
+    key = result_key(digest, "split_zip" + tag, plan)
+    paths = cache.get(key)
+    if paths is None:
+        buf = SpooledBuffer(directory=directory)
+        with ZipBundle(buf) as bundle:
+            for i, writer in enumerate(ops.iter_split(reader, ranges, progress=progress), start=1):
+                bundle.add(f"part_{i:02d}.pdf", finish(writer, opts, "split", directory)[0])
+        buf.seek(0)
+        paths = cache.put(key, [buf], suffix=".zip")
+    return paths[0], len(plan)
+
+
+def batch_job(op, inputs, pages, angle, incremental, opts, directory, pool, progress=None):
+    buf = SpooledBuffer(directory=directory)
+    report = run_batch(
+        op, inputs, pages, buf,
+        angle=angle, incremental=incremental, optimize=opts[0], image_dpi=opts[1],
+        executor=pool, work_dir=directory, progress=progress,
+    )
+    buf.seek(0)
+    return buf, report
+
+
+def save_uploads(files):
+    """Put uploads into the shared store so jobs and worker processes can map them; returns (name, path) pairs."""
+    return [(f.name, str(store.path(store.put(f)))) for f in files]
+
+
+def submit_batch(key, op, files, pages, angle=None, incremental=True):
+    """Run `op` on every upload in the shared process pool; the result is one ZIP."""
+    submit_job(key, f"{op.capitalize()} {len(files)} files", batch_job,
+               op, save_uploads(files), pages, angle, incremental, optimize_opts, session_dir, batch_pool())
+
+
+def render_batch(result, file_name):
+    buf, report = result
+    st.success(f"Processed {report.files} file(s) into {report.entries} PDF(s).")
+    for name, error in report.errors:
+        st.warning(f"{name}: {error}")
+    with metrics.phase("batch", metrics.DOWNLOAD_PREP, files=report.files):
+        st.download_button(
+            "⬇️ Download ZIP",
+            data=buf,
+            file_name=file_name,
+            mime="application/zip"
+        )
+
+
+def show_optimized(report):
+    if report is not None:
+        st.caption(
+            f"Optimized: {report.streams_recompressed} stream(s) recompressed, "
+            f"{report.images_downsampled} image(s) downsampled, {report.objects_removed} unused object(s) removed, "
+            f"saving {report.bytes_saved / 1024:.1f} KiB."
+        )
+
+
+def known_pages(files):
+    """Page count of a single upload, looked up once per upload; None unless exactly one file is selected."""
+    if not files or len(files) > 1:
+        return None
+    counts = st.session_state.setdefault("page_counts", {})
+    upload = files[0]
+    if upload.file_id not in counts:
+        try:
+            counts[upload.file_id] = readers.lookup(upload).page_count
+        except Exception:  # unreadable PDF: check the syntax only; the operation reports the error
+            counts[upload.file_id] = None
+    return counts[upload.file_id]
+
+
+def check_ranges(expr, files, mode):
+    """Show every problem in `expr`, marked under the expression; returns True if there is none."""
+    errors = validate_ranges(expr, known_pages(files), mode)
+    if errors:
+        marks = [" "] * (len(expr) + 1)
+        for error in errors:
+            marks[error.start:max(error.end, error.start + 1)] = "^" * max(error.end - error.start, 1)
+        st.code(f"{expr}\n{''.join(marks).rstrip()}", language=None)
+        st.error("\n".join(f"- Column {e.start + 1}: {e.message}" for e in errors))
+    return not errors
+
+
+def submit_job(key, name, fn, *args):
+    """Start a background job for this session, replacing its previous one under `key`."""
+    queue = job_queue()
+    if key in st.session_state:
+        queue.forget(st.session_state[key])
+    st.session_state[key] = queue.submit(name, fn, *args)
+
+
+@st.fragment(run_every=1.0)
+def job_progress(key, unit):
+    """Poll the running job under `key`; when it finishes, rerun the app so its result is rendered once."""
+    queue = job_queue()
+    job = queue.get(st.session_state.get(key, ""))
+    if job is None or job.finished:
+        st.rerun()  # ends the polling: the fragment is not drawn for a finished job
+    st.progress(job.progress, text=f"{job.name}: {job.done}/{job.total or '?'} {unit}")
+    if st.button("✖️ Cancel", key=f"{key}_cancel"):
+        queue.cancel(job.id)
+
+
+def job_panel(key, render, unit="pages"):
+    """Show progress and a cancel button while the session's job under `key` runs, then its result."""
+    if key not in st.session_state:
+        return
+    job = job_queue().get(st.session_state[key])
+    if job is None:
+        st.info("This result has expired; please run it again.")
+        return
+
+    if not job.finished:
+        job_progress(key, unit)
+    elif job.state == FAILED:
+        st.error(job.error)
+    elif job.state == CANCELLED:
+        st.info(f"{job.name} cancelled.")
+    else:
+        render(job.result)
+
+
 tabs = st.tabs(["🔗 Merge", "✂️ Split", "📑 Extract", "🔄 Rotate"])
 
 # ---------- Merge ----------
@@ -13,118 +232,172 @@ with tabs[0]:
     st.header("Merge PDF Files")
     uploaded_files = st.file_uploader("Select PDF files", type="pdf", accept_multiple_files=True)
     out_name = st.text_input("Output file name", "merged.pdf")
+    dedupe = st.checkbox(
+        "Deduplicate shared resources",
+        value=True,
+        help="Store fonts, images and other objects that are identical across the uploads only once."
+    )
 
     if st.button("🚀 Merge Now"):
         if not uploaded_files:
             st.warning("Please upload PDF files to merge.")
         else:
-            writer = PdfWriter()
-            for f in uploaded_files:
-                reader = PdfReader(f)
-                for page in reader.pages:
-                    writer.add_page(page)
-
-            out_path = Path(out_name)
-            with open(out_path, "wb") as f:
-                writer.write(f)
+            # Jobs read the stored copies: the job thread must not share the session's streams.
+            submit_job(
+                "merge_job", "Merge", merge_job,
+                [path for _, path in save_uploads(uploaded_files)], session_dir, dedupe, optimize_opts,
+            )
 
-            st.success(f"Merge completed: {out_path}")
+    def render_merge(result):
+        buf, report, optimized = result
+        st.success(f"Merge completed: {out_name}")
+        if report is not None:
+            st.caption(
+                f"Deduplicated {report.objects_removed} of {report.objects_before} objects, "
+                f"saving {report.bytes_saved / 1024:.1f} KiB."
+            )
+        show_optimized(optimized)
+        with metrics.phase("merge", metrics.DOWNLOAD_PREP):
             st.download_button(
                 "⬇️ Download Merged File",
-                data=open(out_path, "rb"),
+                data=buf,
                 file_name=out_name
             )
 
+    job_panel("merge_job", render_merge)
+
 # ---------- Split ----------
 with tabs[1]:
     st.header("Split PDF File")
-    f = st.file_uploader("Select a PDF file to split", type="pdf", key="split")
+    files = st.file_uploader("Select PDF files to split", type="pdf", accept_multiple_files=True, key="split")
     ranges = st.text_input("Ranges", "1-3,4-6,7-")
+    valid = check_ranges(ranges, files, "split")
 
-    if st.button("✂️ Split"):
-        if not f:
+    if st.button("✂️ Split", disabled=not valid):
+        if not files:
             st.warning("Please upload a file.")
+        elif len(files) > 1:
+            submit_batch("split_batch", "split", files, ranges)
         else:
-            reader = PdfReader(f)
-            total = len(reader.pages)
-            chunks = [s.strip() for s in ranges.split(",") if s.strip()]
-            outputs = []
-
-            for i, chunk in enumerate(chunks, start=1):
-                idxs = parse_ranges(chunk, total_pages=total)
-                writer = PdfWriter()
-                for idx in idxs:
-                    writer.add_page(reader.pages[idx])
+            digest = store.put(files[0])
+            submit_job(
+                "split_job", "Split", split_job,
+                str(store.path(digest)), digest, ranges, session_dir, results, optimize_opts, opt_tag,
+            )
 
-                out = Path(f"part_{i:02d}.pdf")
-                with open(out, "wb") as fo:
-                    writer.write(fo)
+    def render_split(result):
+        path, count = result
+        try:
+            fh = open(path, "rb")
+        except FileNotFoundError:  # evicted from the result cache since the job finished
+            job_queue().forget(st.session_state["split_job"])
+            st.info("This result has expired; please run it again.")
+            return
+        st.success(f"Created {count} file(s).")
+        with metrics.phase("split", metrics.DOWNLOAD_PREP, parts=count), fh:
+            st.download_button(
+                "⬇️ Download Parts (ZIP)",
+                data=fh,
+                file_name="parts.zip",
+                mime="application/zip"
+            )
 
-                outputs.append(out)
-
-            st.success(f"Created {len(outputs)} file(s).")
-            for out in outputs:
-                st.download_button(
-                    f"⬇️ Download {out.name}",
-                    data=open(out, "rb"),
-                    file_name=out.name
-                )
+    job_panel("split_job", render_split)
+    job_panel("split_batch", lambda result: render_batch(result, "split.zip"), unit="files")
 
 # ---------- Extract ----------
 with tabs[2]:
     st.header("Extract Specific Pages")
-    f = st.file_uploader("Select a PDF file", type="pdf", key="extract")
-    pages = st.text_input("Pages", "2,5-7")
+    files = st.file_uploader("Select PDF files", type="pdf", accept_multiple_files=True, key="extract")
+    pages = st.text_input(
+        "Pages",
+        "2,5-7",
+        help="Pages are written in the order given: 5,1-4 moves page 5 first, "
+             "1,1 repeats a page, 10-1 reverses, 1-100:2 takes every other page."
+    )
+    valid = check_ranges(pages, files, "ordered")
 
-    if st.button("📑 Extract"):
-        if not f:
+    if st.button("📑 Extract", disabled=not valid):
+        if not files:
             st.warning("Please upload a file.")
+        elif len(files) > 1:
+            submit_batch("extract_batch", "extract", files, pages)
         else:
-            reader = PdfReader(f)
-            writer = PdfWriter()
-            idxs = parse_ranges(pages, total_pages=len(reader.pages))
-
-            for i in idxs:
-                writer.add_page(reader.pages[i])
-
-            out = Path("extracted.pdf")
-            with open(out, "wb") as fo:
-                writer.write(fo)
+            entry = readers.lookup(files[0])
+            key = result_key(entry.digest, "extract" + opt_tag, ops.page_sequence(pages, entry.page_count))
+            paths, optimized = results.get(key), None
+            if paths is None:
+                buf, optimized = finish(ops.extract(entry.reader, pages), optimize_opts, "extract")
+                paths = results.put(key, [buf])
 
             st.success("Pages extracted successfully.")
-            st.download_button(
-                "⬇️ Download Extracted File",
-                data=open(out, "rb"),
-                file_name="extracted.pdf"
-            )
+            show_optimized(optimized)
+            with metrics.phase("extract", metrics.DOWNLOAD_PREP), open(paths[0], "rb") as fh:
+                st.download_button(
+                    "⬇️ Download Extracted File",
+                    data=fh,
+                    file_name="extracted.pdf"
+                )
+
+    job_panel("extract_batch", lambda result: render_batch(result, "extracted.zip"), unit="files")
 
 # ---------- Rotate ----------
 with tabs[3]:
     st.header("Rotate Specific Pages")
-    f = st.file_uploader("Select a PDF file", type="pdf", key="rotate")
+    files = st.file_uploader("Select PDF files", type="pdf", accept_multiple_files=True, key="rotate")
     pages = st.text_input("Pages", "1-3")
+    valid = check_ranges(pages, files, "set")
     angle = st.selectbox("Rotation Angle", [90, 180, 270], index=0)
+    fast = st.checkbox(
+        "Fast rotate",
+        value=True,
+        help="Only rewrite /Rotate on the selected pages (incremental update) instead of copying the whole document."
+    )
 
-    if st.button("🔄 Rotate"):
-        if not f:
+    if st.button("🔄 Rotate", disabled=not valid):
+        if not files:
             st.warning("Please upload a file.")
+        elif len(files) > 1:
+            submit_batch("rotate_batch", "rotate", files, pages, angle, fast)
         else:
-            reader = PdfReader(f)
-            writer = PdfWriter()
-            to_rotate = set(parse_ranges(pages, total_pages=len(reader.pages)))
+            entry = readers.lookup(files[0])
+            fast = fast and not entry.reader.is_encrypted
+            op = "rotate_incremental" if fast else "rotate" + opt_tag
+            key = result_key(entry.digest, op, ops.page_ranges(pages, entry.page_count), angle)
+            paths, optimized = results.get(key), None
+            if paths is None:
+                if fast:
+                    buf = SpooledBuffer(directory=session_dir)
+                    ops.rotate_incremental(entry.reader, pages, angle, buf)
+                    buf.seek(0)
+                else:
+                    buf, optimized = finish(ops.rotate(entry.reader, pages, angle), optimize_opts, "rotate")
+                paths = results.put(key, [buf])
+
+            st.success("Pages rotated successfully.")
+            show_optimized(optimized)
+            with metrics.phase("rotate", metrics.DOWNLOAD_PREP), open(paths[0], "rb") as fh:
+                st.download_button(
+                    "⬇️ Download Rotated File",
+                    data=fh,
+                    file_name="rotated.pdf"
+                )
 
-            for i, page in enumerate(reader.pages):
-                if i in to_rotate:
-                    page.rotate(angle)
-                writer.add_page(page)
+    job_panel("rotate_batch", lambda result: render_batch(result, "rotated.zip"), unit="files")
 
-            out = Path("rotated.pdf")
-            with open(out, "wb") as fo:
-                writer.write(fo)
+stats = readers.stats()
+st.sidebar.caption(
+    f"Parsed-document cache: {stats['entries']} cached, "
+    f"{stats['hits']} hit(s), {stats['misses']} miss(es)"
+)
+stats = results.stats()
+st.sidebar.caption(
+    f"Result cache: {stats['entries']} stored ({stats['bytes'] / 1024 / 1024:.1f} MiB), "
+    f"{stats['hits']} hit(s), {stats['misses']} miss(es)"
+)
+stats = store.stats()
+st.sidebar.caption(f"Upload store: {stats['entries']} file(s) ({stats['bytes'] / 1024 / 1024:.1f} MiB)")
 
-            st.success("Pages rotated successfully.")
-            st.download_button(
-                "⬇️ Download Rotated File",
-                data=open(out, "rb"),
-                file_name="rotated.pdf"
-            )
+# Export phase timings for scraping (e.g. node_exporter's textfile collector).
+if os.environ.get("PDFCTL_METRICS_FILE"):
+    metrics.recorder.write_prometheus(os.environ["PDFCTL_METRICS_FILE"])
@@ -0,0 +1,200 @@
+"""
+batch.py — Apply one split / extract / rotate to many documents at once.
+
+Each document is processed in a worker process (pypdf is pure Python, so
+threads would serialize on the GIL), with the same page selection and
+angle for all of them. Results are collected in input order into a single
+ZIP written incrementally, so a batch of 300 scans becomes one download
+instead of 300 round trips. A document that fails is reported and
+skipped; it does not abort the batch.
+"""
+
+from __future__ import annotations
+
+import os
+import tempfile
+import uuid
+from concurrent.futures import Executor, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import BinaryIO
+
+from pdfctl import ops
+from pdfctl.bundle import ZipBundle
+
+OPERATIONS = ("split", "extract", "rotate")
+
+
+@dataclass
+class BatchReport:
+    """
+    Outcome of `run_batch`.
+
+    Attributes:
+        files (int): Documents processed successfully.
+        entries (int): Files written to the archive.
+        errors (list[tuple[str, str]]): `(document name, message)` per failure.
+    """
+
+    files: int = 0
+    entries: int = 0
+    errors: list[tuple[str, str]] = field(default_factory=list)
+
+
+def process_one(
+    op: str,
+    path: str,
+    name: str,
+    pages: str,
+    angle: int | None,
+    out_dir: str,
+    incremental: bool = True,
+    optimize: bool = False,
+    image_dpi: int | None = None,
+) -> list[tuple[str, str]]:
+    """
+    Run one operation on one document and write its outputs to `out_dir`.
+
+    Runs inside a worker process.
+
+    Args:
+        op (str): One of `OPERATIONS`.
+        path (str): The input PDF.
+        name (str): The document's display name, used for the archive names.
+        pages (str): Range expression ("split" takes the split syntax).
+        angle (int | None): Rotation angle for "rotate".
+        out_dir (str): Directory for the produced files.
+        incremental (bool, optional): Rotate by appending an incremental
+            update (unless the document is encrypted). Defaults to True.
+        optimize (bool, optional): Run `pdfctl.optimize.optimize` on each
+            output before writing it (not on incremental rotations).
+        image_dpi (int | None, optional): Image DPI threshold for that pass.
+
+    Returns:
+        list[tuple[str, str]]: `(archive name, produced file)` pairs.
+
+    Raises:
+        ValueError: For an unknown operation or an invalid page selection.
+    """
+    stem = Path(name).stem
+    out = Path(out_dir)
+
+    def target() -> str:
+        return str(out / f"{uuid.uuid4().hex}.pdf")
+
+    def write(writer, path: str) -> None:
+        if optimize:
+            from pdfctl.optimize import optimize as optimize_writer
+
+            # One thread: the batch is already parallel across documents.
+            optimize_writer(writer, image_dpi=image_dpi, workers=1, label=op)
+        ops.write(writer, path, label=op)
+
+    if op == "split":
+        results = []
+        for i, writer in enumerate(ops.split(path, pages), start=1):
+            results.append((f"{stem}/part_{i:02d}.pdf", target()))
+            write(writer, results[-1][1])
+        return results
+
+    produced = target()
+    if op == "extract":
+        write(ops.extract(path, pages), produced)
+    elif op == "rotate":
+        reader = ops.open_reader(path)
+        if reader.is_encrypted or not incremental:
+            write(ops.rotate(reader, pages, int(angle)), produced)
+        else:
+            ops.rotate_incremental(reader, pages, int(angle), produced)
+    else:
+        raise ValueError(f"Unknown op: {op!r}")
+    return [(f"{stem}.pdf", produced)]
+
+
+def run_batch(
+    op: str,
+    inputs: list[tuple[str, str | os.PathLike[str]]],
+    pages: str,
+    dest: BinaryIO,
+    angle: int | None = None,
+    incremental: bool = True,
+    optimize: bool = False,
+    image_dpi: int | None = None,
+    executor: Executor | None = None,
+    workers: int | None = None,
+    work_dir: str | os.PathLike[str] | None = None,
+    progress: ops.Progress = None,
+) -> BatchReport:
+    """
+    Apply one operation to every input and bundle the results as a ZIP.
+
+    All documents are queued on the executor at once; results are added to
+    the archive in input order as soon as each is ready and the produced
+    files are deleted right after, so disk use stays bounded by the
+    results not yet bundled.
+
+    Args:
+        op (str): "split", "extract" or "rotate".
+        inputs (list[tuple[str, str | os.PathLike]]): `(display name, path)`
+            per document, in archive order.
+        pages (str): The page selection applied to every document.
+        dest (BinaryIO): Writable stream that receives the ZIP.
+        angle (int | None, optional): Rotation angle, required for "rotate".
+        incremental (bool, optional): See `process_one`. Defaults to True.
+        optimize (bool, optional): See `process_one`. Defaults to False.
+        image_dpi (int | None, optional): See `process_one`.
+        executor (Executor | None, optional): Pool to run on, e.g. one
+            shared by a server; when omitted, a process pool with `workers`
+            processes is created for this batch.
+        workers (int | None, optional): Size of that private pool; None
+            uses all CPUs.
+        work_dir (str | os.PathLike | None, optional): Directory for
+            intermediate files; a temporary directory by default.
+        progress (Progress, optional): Called as `progress(done, total)`
+            after each document; it may raise to cancel the rest.
+
+    Returns:
+        BatchReport: Counts and per-document errors.
+
+    Raises:
+        ValueError: If `op` is unknown or "rotate" has no angle.
+    """
+    if op not in OPERATIONS:
+        raise ValueError(f"Unknown op: {op!r}")
+    if op == "rotate" and angle is None:
+        raise ValueError("Rotate needs an angle")
+
+    own = executor is None
+    if own:
+        executor = ProcessPoolExecutor(max_workers=workers)
+    report = BatchReport()
+
+    with tempfile.TemporaryDirectory(prefix="pdfctl-batch-", dir=work_dir) as tmp:
+        futures = [
+            executor.submit(
+                process_one, op, os.fspath(path), name, pages, angle, tmp, incremental, optimize, image_dpi
+            )
+            for name, path in inputs
+        ]
+        try:
+            with ZipBundle(dest) as bundle:
+                for done, ((name, _), future) in enumerate(zip(inputs, futures), start=1):
+                    try:
+                        outputs = future.result()
+                    except Exception as exc:  # reported per document
+                        report.errors.append((name, f"{type(exc).__name__}: {exc}"))
+                    else:
+                        for arcname, produced in outputs:
+                            bundle.add(arcname, produced)
+                            os.remove(produced)
+                        report.files += 1
+                        report.entries += len(outputs)
+                    if progress:
+                        progress(done, len(inputs))
+        finally:
+            for future in futures:
+                future.cancel()
+            wait(futures)  # running documents still write into `tmp`
+            if own:
+                executor.shutdown(wait=True)
+    return report
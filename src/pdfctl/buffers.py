@@ -0,0 +1,122 @@
+"""
+buffers.py — Spooled output buffers for PDFCTL.
+
+Holds serialized PDFs in memory and only spills them to an anonymous
+temporary file once they grow past a size threshold. Buffers are raw
+binary streams, so they can be handed straight to download widgets and
+HTTP responses without being re-read from disk.
+"""
+
+from __future__ import annotations
+
+import io
+import os
+import tempfile
+
+DEFAULT_SPOOL_THRESHOLD = 32 * 1024 * 1024  # 32 MiB
+
+
+class SpooledBuffer(io.RawIOBase):
+    """
+    A seekable binary buffer that lives in memory until it exceeds
+    `threshold` bytes, then moves to a temporary file in `directory`.
+
+    Args:
+        threshold (int, optional): Size in bytes above which the buffer
+            spills to disk. Defaults to `DEFAULT_SPOOL_THRESHOLD`.
+        directory (str | os.PathLike | None, optional): Directory for the
+            spill file (e.g. a per-session temp dir). Defaults to the
+            system temp dir.
+    """
+
+    def __init__(
+        self,
+        threshold: int = DEFAULT_SPOOL_THRESHOLD,
+        directory: str | os.PathLike[str] | None = None,
+    ) -> None:
+        super().__init__()
+        self.threshold = threshold
+        self.directory = directory
+        self._file: io.IOBase = io.BytesIO()
+        self._rolled = False
+
+    @property
+    def rolled(self) -> bool:
+        """bool: True once the buffer has spilled to disk."""
+        return self._rolled
+
+    def rollover(self) -> None:
+        """Move the buffer contents to a temporary file (no-op if already spilled)."""
+        if self._rolled:
+            return
+        memory = self._file
+        pos = memory.tell()
+        disk = tempfile.TemporaryFile(dir=self.directory)
+        disk.write(memory.getbuffer())
+        disk.seek(pos)
+        memory.close()
+        self._file = disk
+        self._rolled = True
+
+    def getbuffer(self) -> memoryview:
+        """
+        Return a zero-copy view of the in-memory contents.
+
+        Raises:
+            ValueError: If the buffer has already spilled to disk.
+        """
+        if self._rolled:
+            raise ValueError("Buffer has spilled to disk; read it as a stream instead.")
+        return self._file.getbuffer()
+
+    def size(self) -> int:
+        """
+        Returns:
+            int: The total number of bytes written.
+        """
+        pos = self._file.tell()
+        end = self._file.seek(0, io.SEEK_END)
+        self._file.seek(pos)
+        return end
+
+    # -- io.RawIOBase interface ---------------------------------------------
+
+    def readable(self) -> bool:
+        return True
+
+    def writable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        n = self._file.write(b)
+        if not self._rolled and self._file.tell() > self.threshold:
+            self.rollover()
+        return n
+
+    def readinto(self, b) -> int:
+        return self._file.readinto(b)
+
+    def readall(self) -> bytes:
+        return self._file.read()
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        return self._file.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._file.tell()
+
+    def truncate(self, size: int | None = None) -> int:
+        return self._file.truncate(size)
+
+    def fileno(self) -> int:
+        if not self._rolled:
+            raise io.UnsupportedOperation("In-memory buffer has no file descriptor.")
+        return self._file.fileno()
+
+    def close(self) -> None:
+        if not self.closed:
+            self._file.close()
+        super().close()
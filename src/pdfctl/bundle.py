@@ -0,0 +1,85 @@
+"""
+bundle.py — Incremental ZIP bundles of produced PDFs.
+
+Operations that yield many files (split parts, batch results) hand them
+to the user as one archive. Entries are added one at a time and copied
+in chunks, so only the entry being added is ever read, and they are
+stored uncompressed: PDF streams are already Flate-compressed, and
+deflating them again costs CPU for a few percent at best.
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+import zipfile
+from typing import BinaryIO, Union
+
+Entry = Union[str, "os.PathLike[str]", bytes, BinaryIO]
+
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+class ZipBundle:
+    """
+    Write a ZIP archive entry by entry.
+
+    Repeated names get a numeric suffix (`a.pdf`, `a (2).pdf`) instead of
+    overwriting each other. Use as a context manager, or call `close` to
+    write the central directory.
+
+    Args:
+        dest (BinaryIO): A writable binary stream, e.g. a `SpooledBuffer`.
+            Seekable streams get a compact archive; for unseekable ones
+            (sockets, HTTP responses) sizes go into data descriptors.
+    """
+
+    def __init__(self, dest: BinaryIO) -> None:
+        self._zip = zipfile.ZipFile(dest, "w", compression=zipfile.ZIP_STORED, allowZip64=True)
+        self._names: set[str] = set()
+        self.count = 0
+
+    def __enter__(self) -> ZipBundle:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def add(self, name: str, source: Entry) -> str:
+        """
+        Append one file to the archive.
+
+        Args:
+            name (str): Path of the entry inside the archive.
+            source (str | os.PathLike | bytes | BinaryIO): A file path, the
+                bytes, or a readable binary stream (read from its current
+                position to the end).
+
+        Returns:
+            str: The name actually used (see the class docstring).
+        """
+        name = self._unique(name)
+        # force_zip64: the entry size is not known up front for streams.
+        with self._zip.open(name, "w", force_zip64=True) as fo:
+            if isinstance(source, (bytes, bytearray, memoryview)):
+                fo.write(source)
+            elif isinstance(source, (str, os.PathLike)):
+                with open(source, "rb") as fi:
+                    shutil.copyfileobj(fi, fo, COPY_CHUNK_SIZE)
+            else:
+                shutil.copyfileobj(source, fo, COPY_CHUNK_SIZE)
+        self.count += 1
+        return name
+
+    def close(self) -> None:
+        """Write the central directory; the destination stream is left open."""
+        self._zip.close()
+
+    def _unique(self, name: str) -> str:
+        candidate, n = name, 1
+        stem, ext = os.path.splitext(name)
+        while candidate in self._names:
+            n += 1
+            candidate = f"{stem} ({n}){ext}"
+        self._names.add(candidate)
+        return candidate
@@ -0,0 +1,486 @@
+"""
+cache.py — Caches for parsed PDF readers and operation results.
+
+Streamlit reruns the whole app script on every widget interaction, so the
+same upload would otherwise be re-parsed (xref table, page tree) on each
+button press. `ReaderCache` keeps recently used readers keyed by a hash of
+the document content.
+
+`ResultCache` keeps produced PDFs on disk, keyed by the input's content
+hash, the operation and its normalized page selection, so repeating the
+same request returns the stored output instead of recomputing it.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import os
+import shutil
+import threading
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, BinaryIO, Iterable, Union
+
+import pypdf
+from pypdf import PdfReader
+
+from pdfctl import ops
+from pdfctl.index import DocumentIndex, build_index, index_file
+from pdfctl.ranges import PageRanges
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+Input = Union[str, "os.PathLike[str]", bytes, BinaryIO]
+
+
+def content_hash(source: Input) -> str:
+    """
+    Compute the SHA-256 hex digest of a PDF's bytes.
+
+    Streams are hashed from the start and rewound afterwards; in-memory
+    streams that expose `getbuffer()` are hashed without a copy.
+
+    Args:
+        source (str | os.PathLike | bytes | BinaryIO): A file path, raw
+            bytes, or a seekable binary stream.
+
+    Returns:
+        str: The hex digest.
+    """
+    h = hashlib.sha256()
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        h.update(source)
+    elif isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as fh:
+            for block in iter(lambda: fh.read(HASH_CHUNK_SIZE), b""):
+                h.update(block)
+    elif hasattr(source, "getbuffer"):
+        with source.getbuffer() as view:
+            h.update(view)
+    else:
+        pos = source.tell()
+        source.seek(0)
+        for block in iter(lambda: source.read(HASH_CHUNK_SIZE), b""):
+            h.update(block)
+        source.seek(pos)
+    return h.hexdigest()
+
+
+def _source_size(source: Input) -> int:
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return len(source)
+    if isinstance(source, (str, os.PathLike)):
+        return os.path.getsize(source)
+    pos = source.tell()
+    size = source.seek(0, io.SEEK_END)
+    source.seek(pos)
+    return size
+
+
+@dataclass
+class CachedReader:
+    """
+    A parsed document held by `ReaderCache`.
+
+    Attributes:
+        reader (PdfReader): The parsed reader.
+        page_count (int): Number of pages, taken from the index.
+        size (int): Size of the source in bytes; used for eviction.
+        digest (str): SHA-256 hex digest of the source bytes.
+        index (DocumentIndex | None): Page count and per-page metadata.
+    """
+
+    reader: PdfReader
+    page_count: int
+    size: int
+    digest: str = ""
+    index: DocumentIndex | None = None
+
+
+class ReaderCache:
+    """
+    Bounded LRU cache of parsed readers keyed by content hash.
+
+    Entries are evicted least-recently-used first once either the summed
+    source size exceeds `max_bytes` or the entry count exceeds
+    `max_entries`. A single reader must not be used from several threads
+    at once, so give each Streamlit session (or worker thread) its own
+    cache.
+
+    Each entry carries a `DocumentIndex`, so the page count never requires
+    flattening the page tree. Indexes of file paths are persisted next to
+    the file; those of in-memory sources go to `index_dir` (named by
+    content hash) when it is given, so they outlive the cached reader.
+
+    Args:
+        max_bytes (int, optional): Upper bound on the summed source sizes.
+            Defaults to 256 MiB.
+        max_entries (int, optional): Upper bound on cached readers.
+            Defaults to 16.
+        index_dir (str | os.PathLike | None, optional): Where to persist
+            indexes of in-memory sources.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 256 * 1024 * 1024,
+        max_entries: int = 16,
+        index_dir: str | os.PathLike[str] | None = None,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.index_dir = Path(index_dir) if index_dir is not None else None
+        if self.index_dir is not None:
+            self.index_dir.mkdir(parents=True, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[str, CachedReader] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def current_bytes(self) -> int:
+        """int: Summed source size of the cached entries."""
+        return self._bytes
+
+    def lookup(self, source: Input) -> CachedReader:
+        """
+        Return the cached entry for `source`, parsing it on a miss.
+
+        Args:
+            source (str | os.PathLike | bytes | BinaryIO): The PDF.
+
+        Returns:
+            CachedReader: The cached (or freshly parsed) document.
+        """
+        key = content_hash(source)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        reader = ops.open_reader(source)
+        index = self._index(source, reader, key)
+        entry = CachedReader(
+            reader=reader,
+            page_count=index.page_count,
+            size=_source_size(source),
+            digest=key,
+            index=index,
+        )
+
+        with self._lock:
+            if entry.size <= self.max_bytes and key not in self._entries:
+                self._entries[key] = entry
+                self._bytes += entry.size
+                self._evict()
+        return entry
+
+    def get(self, source: Input) -> PdfReader:
+        """
+        Return a parsed reader for `source`, reusing a cached one if possible.
+
+        Args:
+            source (str | os.PathLike | bytes | BinaryIO): The PDF.
+
+        Returns:
+            PdfReader: The reader.
+        """
+        return self.lookup(source).reader
+
+    def page_count(self, source: Input) -> int:
+        """
+        Return the number of pages of `source` without re-parsing cached documents.
+
+        Args:
+            source (str | os.PathLike | bytes | BinaryIO): The PDF.
+
+        Returns:
+            int: The page count.
+        """
+        return self.lookup(source).page_count
+
+    def clear(self) -> None:
+        """Drop all cached readers (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict[str, int]:
+        """
+        Returns:
+            dict[str, int]: Hit/miss/eviction counters and current usage.
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+        }
+
+    def _index(self, source: Input, reader: PdfReader, digest: str) -> DocumentIndex:
+        """Load the persisted index of `source`, or build (and persist) it."""
+        if isinstance(source, (str, os.PathLike)):
+            return index_file(source)
+        if self.index_dir is None:
+            return build_index(reader, digest)
+
+        path = self.index_dir / f"{digest}.json"
+        try:
+            return DocumentIndex.load(path)
+        except (OSError, ValueError, TypeError):
+            index = build_index(reader, digest)
+            index.save(path)
+            return index
+
+    def _evict(self) -> None:
+        while self._entries and (self._bytes > self.max_bytes or len(self._entries) > self.max_entries):
+            _, old = self._entries.popitem(last=False)
+            self._bytes -= old.size
+            self.evictions += 1
+
+
+def _progressions(sequence: list[range]) -> list[list[int]]:
+    """
+    Rewrite an ordered page sequence as maximal arithmetic runs.
+
+    "1,2,3", "1-3" and "1-2,3" all become `[[0, 1, 3]]` (first index,
+    step, count), so common spellings of one selection share a cache key.
+    """
+    runs: list[list[int]] = []
+    for r in sequence:
+        if not r:
+            continue
+        first, step, count = r[0], r.step if len(r) > 1 else 0, len(r)
+        if runs:
+            prev = runs[-1]
+            gap = first - (prev[0] + prev[1] * (prev[2] - 1))
+            if (prev[2] == 1 or gap == prev[1]) and (count == 1 or step == gap) and gap:
+                prev[1] = gap
+                prev[2] += count
+                continue
+        runs.append([first, step, count])
+    return runs
+
+
+def _normalize(pages: Any) -> Any:
+    """Turn compiled page selections into plain JSON-serializable lists."""
+    if isinstance(pages, PageRanges):
+        return [list(iv) for iv in pages.intervals]
+    if isinstance(pages, list) and all(isinstance(p, range) for p in pages):
+        return _progressions(pages)
+    if isinstance(pages, (list, tuple)):
+        return [_normalize(p) for p in pages]
+    return pages
+
+
+def result_key(digest: str, op: str, pages: Any = None, angle: int | None = None) -> str:
+    """
+    Build the `ResultCache` key for one operation on one input.
+
+    Page selections should be passed in compiled form (`ops.page_ranges`,
+    `ops.page_sequence`, `ops.plan_split`), so that "1-3,2" and "1-3" map
+    to the same key. The pypdf version is part of the key because its
+    output bytes may change between releases.
+
+    Args:
+        digest (str): Content hash of the input (see `content_hash`).
+        op (str): Operation name, e.g. "extract".
+        pages (Any, optional): The compiled page selection.
+        angle (int | None, optional): Rotation angle, for rotations.
+
+    Returns:
+        str: A hex digest identifying the result.
+    """
+    material = json.dumps([digest, op, _normalize(pages), angle, pypdf.__version__])
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    Disk-backed LRU cache of operation outputs.
+
+    Each entry is a directory named after its key holding one file per
+    output (`0.pdf`, `1.pdf`, ... in output order; the suffix is chosen
+    by the caller, e.g. `.zip` for bundles). Entries are published
+    with an atomic rename, so concurrent writers never expose a partial
+    result, and a hit refreshes the entry's mtime, so the recency order
+    survives restarts. Once the summed size exceeds `max_bytes` the least
+    recently used entries are deleted (the newest entry is always kept).
+
+    Several processes may share one directory: an entry stored by another
+    process is adopted on its first lookup, and every `put` re-indexes the
+    directory before evicting, so the size bound and the recency order
+    cover all their entries.
+
+    Args:
+        directory (str | os.PathLike): Cache root; created if missing.
+        max_bytes (int, optional): Upper bound on the summed output sizes.
+            Defaults to 1 GiB.
+    """
+
+    def __init__(self, directory: str | os.PathLike[str], max_bytes: int = 1024 * 1024 * 1024) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[str, int] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> list[Path] | None:
+        """
+        Return the stored outputs for `key`.
+
+        Args:
+            key (str): A key from `result_key`.
+
+        Returns:
+            list[Path] | None: The output files in order, or None on a miss.
+        """
+        entry = self.directory / key
+        with self._lock:
+            known = key in self._entries
+        try:
+            size = None if known else _dir_size(entry)  # stored by another process: adopt it
+            os.utime(entry)
+            outputs = _outputs(entry)
+        except (FileNotFoundError, NotADirectoryError):
+            with self._lock:
+                self.misses += 1
+                self._bytes -= self._entries.pop(key, 0)  # evicted by another process
+            return None
+
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = size if size is not None else _dir_size(entry)
+                self._bytes += self._entries[key]
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return outputs
+
+    def put(self, key: str, outputs: Iterable[BinaryIO | bytes], suffix: str = ".pdf") -> list[Path]:
+        """
+        Store the outputs for `key` and return their cached paths.
+
+        Args:
+            key (str): A key from `result_key`.
+            outputs (Iterable[BinaryIO | bytes]): The produced documents in
+                order, as bytes or readable binary streams (read from their
+                current position).
+            suffix (str, optional): File name suffix of the stored outputs.
+                Defaults to ".pdf".
+
+        Returns:
+            list[Path]: The stored files, in order.
+        """
+        tmp = self.directory / f".{key}.{uuid.uuid4().hex}.tmp"
+        tmp.mkdir()
+        size = 0
+        for i, out in enumerate(outputs):
+            with open(tmp / f"{i}{suffix}", "wb") as fo:
+                if isinstance(out, (bytes, bytearray, memoryview)):
+                    fo.write(out)
+                else:
+                    shutil.copyfileobj(out, fo)
+                size += fo.tell()
+
+        entry = self.directory / key
+        try:
+            os.rename(tmp, entry)
+        except OSError:
+            # Another worker stored the same result first; keep theirs.
+            shutil.rmtree(tmp, ignore_errors=True)
+            if not entry.is_dir():
+                raise
+            size = _dir_size(entry)
+
+        found = self._scan()  # other processes add and evict entries too
+        with self._lock:
+            self._entries = OrderedDict(found)
+            self._entries[key] = size
+            self._entries.move_to_end(key)
+            self._bytes = sum(self._entries.values())
+            evicted = self._evict()
+        for old in evicted:
+            shutil.rmtree(self.directory / old, ignore_errors=True)
+        return _outputs(entry)
+
+    def clear(self) -> None:
+        """Delete all stored results (counters are kept)."""
+        with self._lock:
+            keys = list(self._entries)
+            self._entries.clear()
+            self._bytes = 0
+        for key in keys:
+            shutil.rmtree(self.directory / key, ignore_errors=True)
+
+    def stats(self) -> dict[str, int]:
+        """
+        Returns:
+            dict[str, int]: Hit/miss/eviction counters and current usage.
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+        }
+
+    def _load(self) -> None:
+        """Index entries left by earlier runs, oldest first."""
+        for key, size in self._scan():
+            self._entries[key] = size
+            self._bytes += size
+
+    def _scan(self) -> list[tuple[str, int]]:
+        """List `(key, size)` of the entries on disk, least recently used first; known sizes are not re-read."""
+        with self._lock:
+            known = dict(self._entries)
+        found = []
+        for entry in self.directory.iterdir():
+            if entry.name.startswith("."):
+                continue
+            try:
+                mtime = entry.stat().st_mtime
+                size = known[entry.name] if entry.name in known else _dir_size(entry)
+            except (FileNotFoundError, NotADirectoryError):
+                continue  # evicted meanwhile, or not an entry
+            found.append((mtime, entry.name, size))
+        return [(key, size) for _, key, size in sorted(found)]
+
+    def _evict(self) -> list[str]:
+        evicted = []
+        while len(self._entries) > 1 and self._bytes > self.max_bytes:
+            key, size = self._entries.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+            evicted.append(key)
+        return evicted
+
+
+def _outputs(entry: Path) -> list[Path]:
+    return sorted(entry.iterdir(), key=lambda p: int(p.name.split(".", 1)[0]))
+
+
+def _dir_size(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.iterdir())
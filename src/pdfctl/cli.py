@@ -0,0 +1,533 @@
+"""
+cli.py — Command-line interface for PDFCTL.
+
+Runs the headless operations engine without Streamlit:
+
+    pdfctl merge -o merged.pdf a.pdf b.pdf
+    pdfctl merge --dedupe -o merged.pdf invoices/*.pdf
+    pdfctl split in.pdf --ranges "1-3,4-6,7-" --out-dir parts/
+    pdfctl extract in.pdf --pages "2,5-7" -o extracted.pdf
+    pdfctl rotate in.pdf --pages "1-3" --angle 90 -o rotated.pdf
+    pdfctl extract in.pdf --pages "1-20" --optimize --image-dpi 150 -o small.pdf
+    pdfctl info in.pdf --pages "1-3"
+    pdfctl serve --port 8600 --workers 4
+    pdfctl upload scan.pdf --url http://localhost:8600
+    pdfctl run jobs.jsonl
+
+A job file holds one JSON object per line, e.g.:
+
+    {"op": "merge", "inputs": ["a.pdf", "b.pdf"], "output": "merged.pdf", "dedupe": true}
+    {"op": "split", "input": "in.pdf", "ranges": "1-3,4-", "out_dir": "parts", "workers": 4}
+    {"op": "extract", "input": "in.pdf", "pages": "2,5-7", "output": "x.pdf", "optimize": true}
+    {"op": "rotate", "input": "in.pdf", "pages": "1", "angle": 90, "output": "r.pdf"}
+    {"op": "rotate", "input": "in.pdf", "pages": "1", "angle": 90, "in_place": true}
+
+Merge jobs with `"dedupe": true` store identical fonts, images and other
+objects shared by the inputs only once. Rotate jobs with `"incremental": true`
+(or `"in_place": true`) only rewrite the /Rotate entry of the targeted pages
+instead of copying the document. Jobs with `"optimize": true` recompress
+content streams and drop unused objects before writing; `"image_dpi": 150`
+also downsamples denser images (needs Pillow). Incremental rotations are
+never optimized.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from collections import OrderedDict
+
+# Only argparse is imported eagerly, so `pdfctl --help` and argument errors
+# stay fast; everything else is imported by the code path that needs it.
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+class ReaderPool:
+    """
+    Keeps recently used readers open so jobs touching the same input
+    share one parse.
+
+    Readers are keyed by resolved path, modification time and size, so an
+    input rewritten by an earlier job is opened afresh.
+
+    Args:
+        capacity (int, optional): Maximum number of open readers. Defaults to 64.
+    """
+
+    def __init__(self, capacity: int = 64) -> None:
+        self.capacity = capacity
+        self._readers: OrderedDict[tuple, object] = OrderedDict()
+
+    def get(self, path: str | os.PathLike[str]):
+        """
+        Return an open reader for `path`, parsing it only on first use.
+
+        Args:
+            path (str | os.PathLike): The PDF file.
+
+        Returns:
+            PdfReader: The (possibly shared) reader.
+        """
+        from pathlib import Path
+
+        from pdfctl import ops
+
+        p = Path(path).resolve()
+        st = p.stat()
+        key = (str(p), st.st_mtime_ns, st.st_size)
+
+        reader = self._readers.get(key)
+        if reader is not None:
+            self._readers.move_to_end(key)
+            return reader
+
+        reader = ops.open_reader(p)
+        self._readers[key] = reader
+        if len(self._readers) > self.capacity:
+            self._readers.popitem(last=False)
+        return reader
+
+
+def _part_paths(out_dir: str | os.PathLike[str], prefix: str, count: int) -> list[Path]:
+    """
+    Build the output paths for split parts and make sure `out_dir` exists.
+    """
+    from pathlib import Path
+
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    return [out / f"{prefix}_{i:02d}.pdf" for i in range(1, count + 1)]
+
+
+def _write(writer, path: Path, job: dict, op: str) -> None:
+    """Write one output of `job`, running the optimize pass first if requested."""
+    from pdfctl import ops
+
+    if job.get("optimize") or job.get("image_dpi"):
+        from pdfctl.optimize import optimize
+
+        report = optimize(writer, image_dpi=job.get("image_dpi"), label=op)
+        print(
+            f"[info] Optimized {path}: {report.streams_recompressed} stream(s) recompressed, "
+            f"{report.images_downsampled} image(s) downsampled, {report.objects_removed} unused object(s) "
+            f"removed, saving {report.bytes_saved / 1024:.1f} KiB"
+        )
+    ops.write(writer, path, label=op)
+
+
+# Job field -> accepted JSON types (bool counts as int, so flags may be 0/1 too).
+_FIELD_TYPES = {
+    "op": str,
+    "input": str,
+    "inputs": list,
+    "output": str,
+    "out_dir": str,
+    "prefix": str,
+    "ranges": str,
+    "pages": str,
+    "angle": (int, str),
+    "workers": int,
+    "image_dpi": int,
+}
+
+
+def _check_job(job: object) -> None:
+    """
+    Reject a job that is not an object or whose fields have the wrong JSON type.
+
+    Raises:
+        ValueError: Naming the offending field.
+    """
+    if not isinstance(job, dict):
+        raise ValueError(f"Expected a JSON object, got {type(job).__name__}")
+    for name, types in _FIELD_TYPES.items():
+        if job.get(name) is not None and not isinstance(job[name], types):
+            raise ValueError(f"Field '{name}' has the wrong type: {type(job[name]).__name__}")
+    if not all(isinstance(p, str) for p in job.get("inputs") or ()):
+        raise ValueError("Field 'inputs' must be a list of file names")
+
+
+def run_job(job: dict, pool: ReaderPool) -> list[Path]:
+    """
+    Execute a single job description.
+
+    Args:
+        job (dict): The job; see the module docstring for its fields.
+        pool (ReaderPool): Shared readers for the inputs.
+
+    Returns:
+        list[Path]: The files written by the job.
+
+    Raises:
+        ValueError: If the job is malformed or its ranges are invalid.
+    """
+    from pathlib import Path
+
+    from pdfctl import ops
+
+    _check_job(job)
+    op = job.get("op")
+    optimized = bool(job.get("optimize") or job.get("image_dpi"))
+    try:
+        if op == "merge":
+            outputs = [Path(job["output"])]
+            if job.get("dedupe") or optimized:
+                writer = ops.merge(pool.get(p) for p in job["inputs"])
+                if job.get("dedupe"):
+                    report = ops.dedupe(writer, label=op)
+                    print(
+                        f"[info] Deduplicated {report.objects_removed} of {report.objects_before} objects, "
+                        f"saving {report.bytes_saved / 1024:.1f} KiB"
+                    )
+                _write(writer, outputs[0], job, op)
+            else:
+                # Streamed input by input, so memory stays flat however many inputs there are.
+                ops.merge_streaming(job["inputs"], outputs[0])
+
+        elif op == "split" and job.get("workers", 1) != 1 and not optimized:
+            outputs = ops.split_parallel(
+                job["input"],
+                job["ranges"],
+                job.get("out_dir", "."),
+                prefix=job.get("prefix", "part"),
+                workers=job["workers"],
+            )
+
+        elif op == "split":
+            parts = ops.split(pool.get(job["input"]), job["ranges"])
+            outputs = _part_paths(job.get("out_dir", "."), job.get("prefix", "part"), len(parts))
+            for writer, out in zip(parts, outputs):
+                _write(writer, out, job, op)
+
+        elif op == "extract":
+            writer = ops.extract(pool.get(job["input"]), job["pages"])
+            outputs = [Path(job["output"])]
+            _write(writer, outputs[0], job, op)
+
+        elif op == "rotate" and job.get("in_place"):
+            # Appends to the input file, so it must not come from the shared pool.
+            ops.rotate_incremental(job["input"], job["pages"], int(job["angle"]))
+            outputs = [Path(job["input"])]
+
+        elif op == "rotate" and job.get("incremental"):
+            outputs = [Path(job["output"])]
+            ops.rotate_incremental(pool.get(job["input"]), job["pages"], int(job["angle"]), outputs[0])
+
+        elif op == "rotate":
+            writer = ops.rotate(pool.get(job["input"]), job["pages"], int(job["angle"]))
+            outputs = [Path(job["output"])]
+            _write(writer, outputs[0], job, op)
+
+        else:
+            raise ValueError(f"Unknown op: {op!r}")
+
+    except KeyError as exc:
+        raise ValueError(f"Missing field for '{op}' job: {exc.args[0]}") from None
+
+    return outputs
+
+
+def _profiled(name: str, profile_dir: str | os.PathLike[str] | None):
+    """Return a cProfile/tracemalloc context for one job, or a no-op without `profile_dir`."""
+    import contextlib
+
+    if not profile_dir:
+        return contextlib.nullcontext()
+    from pdfctl import metrics
+
+    return metrics.profile_job(name, profile_dir)
+
+
+def run_jobs(
+    path: str | os.PathLike[str],
+    keep_going: bool = False,
+    profile_dir: str | os.PathLike[str] | None = None,
+) -> int:
+    """
+    Execute every job in a JSON-lines job file within this process.
+
+    Args:
+        path (str | os.PathLike): The job file; blank lines are skipped.
+        keep_going (bool, optional): Continue after a failed job instead of
+            stopping at the first error. Defaults to False.
+        profile_dir (str | os.PathLike | None, optional): Dump a cProfile and
+            tracemalloc report per job (`job_<line>.*`) into this directory.
+
+    Returns:
+        int: The number of failed jobs.
+    """
+    import json
+
+    from pypdf.errors import PyPdfError
+
+    pool = ReaderPool()
+    done = failed = 0
+
+    with open(path, "r", encoding="utf-8") as fp:
+        for lineno, line in enumerate(fp, start=1):
+            if not line.strip():
+                continue
+            try:
+                try:
+                    job = json.loads(line)
+                except json.JSONDecodeError as exc:
+                    raise ValueError(f"Invalid JSON: {exc}") from None
+                with _profiled(f"job_{lineno:05d}", profile_dir):
+                    run_job(job, pool)
+                done += 1
+            # Malformed lines (invalid JSON, wrong field types) fail like any other job.
+            except (OSError, ValueError, TypeError, ImportError, PyPdfError) as exc:
+                failed += 1
+                print(f"[error] {path}:{lineno}: {exc}", file=sys.stderr)
+                if not keep_going:
+                    break
+
+    print(f"[info] {done} job(s) completed, {failed} failed.")
+    return failed
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Build the argument parser for the `pdfctl` command.
+
+    Returns:
+        argparse.ArgumentParser: The configured parser.
+    """
+    parser = argparse.ArgumentParser(prog="pdfctl", description="Merge, split, extract and rotate PDFs.")
+    parser.add_argument("--metrics-file", help="Write Prometheus-format phase metrics here on exit.")
+    parser.add_argument("--events", help="Append one JSON line per timed phase to this file.")
+    parser.add_argument("--profile-dir", help="Dump a cProfile and tracemalloc report per job here.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("merge", help="Merge PDFs into one file.")
+    p.add_argument("inputs", nargs="+", help="Input PDF files, in output order.")
+    p.add_argument("-o", "--output", required=True, help="Output PDF file.")
+    p.add_argument(
+        "--dedupe",
+        action="store_true",
+        help="Store identical fonts, images and other shared objects only once.",
+    )
+
+    p = sub.add_parser("split", help="Split a PDF into parts.")
+    p.add_argument("input", help="Input PDF file.")
+    p.add_argument("--ranges", required=True, help='One part per comma-separated chunk, e.g. "1-3,4-6,7-".')
+    p.add_argument("--out-dir", default=".", help="Directory for the parts (default: current directory).")
+    p.add_argument("--prefix", default="part", help="File name prefix for the parts (default: part).")
+    p.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Write parts in this many processes; 0 uses all CPUs (default: 1).",
+    )
+
+    p = sub.add_parser("extract", help="Extract pages into a new PDF.")
+    p.add_argument("input", help="Input PDF file.")
+    p.add_argument(
+        "--pages",
+        required=True,
+        help='Pages to keep, in output order; e.g. "2,5-7", "5,1-4", "10-1", "1-100:2".',
+    )
+    p.add_argument("-o", "--output", required=True, help="Output PDF file.")
+
+    p = sub.add_parser("rotate", help="Rotate pages of a PDF.")
+    p.add_argument("input", help="Input PDF file.")
+    p.add_argument("--pages", required=True, help='Pages to rotate, e.g. "1-3".')
+    p.add_argument("--angle", type=int, choices=[90, 180, 270], default=90, help="Clockwise angle (default: 90).")
+    p.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only rewrite /Rotate on the targeted pages, appended as an incremental update.",
+    )
+    out = p.add_mutually_exclusive_group(required=True)
+    out.add_argument("-o", "--output", help="Output PDF file.")
+    out.add_argument("--in-place", action="store_true", help="Append the incremental update to the input file.")
+
+    for name in ("merge", "split", "extract", "rotate"):
+        p = sub.choices[name]
+        p.add_argument(
+            "--optimize",
+            action="store_true",
+            help="Recompress content streams and drop unused objects before writing.",
+        )
+        p.add_argument(
+            "--image-dpi",
+            type=int,
+            help="Also downsample images denser than this many DPI (needs Pillow; implies --optimize).",
+        )
+
+    p = sub.add_parser("info", help="Show the page count and per-page metadata of a PDF.")
+    p.add_argument("input", help="Input PDF file.")
+    p.add_argument("--pages", help='Also list these pages, e.g. "1-3" or "1-".')
+    p.add_argument(
+        "--save-index",
+        action="store_true",
+        help="Persist the index next to the input so later runs skip the page tree walk.",
+    )
+
+    p = sub.add_parser("serve", help="Serve the operations as an HTTP JSON API.")
+    p.add_argument("--host", default="127.0.0.1", help="Address to bind (default: 127.0.0.1).")
+    p.add_argument("--port", type=int, default=8600, help="Port to listen on (default: 8600).")
+    p.add_argument("--workers", type=int, default=0, help="Worker processes; 0 uses all CPUs (default: 0).")
+    p.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=0,
+        help="Requests processed at once; 0 means twice the workers (default: 0).",
+    )
+    p.add_argument("--max-body-mb", type=int, default=4096, help="Largest accepted upload in MiB (default: 4096).")
+
+    p = sub.add_parser("upload", help="Upload a (large) file to a `pdfctl serve` instance in resumable pieces.")
+    p.add_argument("input", help="File to upload.")
+    p.add_argument("--url", default="http://127.0.0.1:8600", help="API base URL (default: http://127.0.0.1:8600).")
+    p.add_argument("--chunk-mb", type=int, default=8, help="Piece size in MiB (default: 8).")
+    p.add_argument("--resume", metavar="UPLOAD_ID", help="Continue an interrupted upload.")
+
+    p = sub.add_parser("run", help="Run a JSON-lines job file in one process.")
+    p.add_argument("jobs", help="Job file with one JSON job per line.")
+    p.add_argument("--keep-going", action="store_true", help="Continue after a failed job.")
+
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    Entry point for the `pdfctl` console script.
+
+    Args:
+        argv (list[str] | None, optional): Arguments; defaults to `sys.argv[1:]`.
+
+    Returns:
+        int: The process exit code.
+    """
+    args = build_parser().parse_args(argv)
+
+    sink = None
+    if args.events:
+        from pdfctl import metrics
+
+        sink = metrics.JsonLinesSink(args.events)
+        metrics.recorder.add_listener(sink)
+
+    try:
+        return _run_command(args)
+    finally:
+        if sink is not None:
+            metrics.recorder.remove_listener(sink)
+            sink.close()
+        if args.metrics_file:
+            from pdfctl import metrics
+
+            metrics.recorder.write_prometheus(args.metrics_file)
+
+
+def show_info(path: str, pages: str | None = None, save_index: bool = False) -> None:
+    """
+    Print the document index of a PDF.
+
+    Args:
+        path (str): The PDF file.
+        pages (str | None, optional): Range expression of pages to list.
+        save_index (bool, optional): Persist the index as a sidecar file.
+
+    Raises:
+        ValueError: If `pages` is not a valid range expression.
+    """
+    from pdfctl import ops
+    from pdfctl.index import build_index, index_file
+
+    index = index_file(path) if save_index else build_index(path)
+    kind = "stream" if index.xref_stream else "table"
+    print(f"[info] {path}: {index.page_count} pages, {index.size} bytes, xref {kind} at {index.startxref}")
+    if pages:
+        for n in ops.page_ranges(pages, index.page_count):
+            page = index.page(n)
+            where = f"@{page.offset}" if page.offset >= 0 else "(object stream)"
+            print(
+                f"  page {n + 1}: {page.width:g}x{page.height:g} pt, rotate {page.rotation}, "
+                f"object {page.object} {where}"
+            )
+
+
+def _run_command(args: argparse.Namespace) -> int:
+    """Dispatch parsed arguments to the job runner."""
+    if args.command == "run":
+        failed = run_jobs(args.jobs, keep_going=args.keep_going, profile_dir=args.profile_dir)
+        return 1 if failed else 0
+
+    if args.command == "serve":
+        from pdfctl.api import serve
+
+        serve(
+            args.host,
+            args.port,
+            workers=args.workers or None,
+            max_concurrency=args.max_concurrency or None,
+            max_body=args.max_body_mb * 1024 * 1024,
+        )
+        return 0
+
+    if args.command == "upload":
+        from pdfctl.api import upload
+
+        try:
+            digest = upload(args.input, args.url, args.chunk_mb * 1024 * 1024, upload_id=args.resume)
+        except (OSError, ValueError) as exc:
+            print(f"[error] {exc}", file=sys.stderr)
+            return 1
+        print(f"[info] Uploaded {args.input}: {digest}")
+        return 0
+
+    if args.command == "info":
+        from pypdf.errors import PyPdfError
+
+        try:
+            show_info(args.input, args.pages, args.save_index)
+        except (OSError, ValueError, PyPdfError) as exc:
+            print(f"[error] {exc}", file=sys.stderr)
+            return 1
+        return 0
+
+    job: dict[str, object] = {"op": args.command}
+    if args.command != "rotate" or not (args.incremental or args.in_place):
+        job.update(optimize=args.optimize, image_dpi=args.image_dpi)
+    if args.command == "merge":
+        job.update(inputs=args.inputs, output=args.output, dedupe=args.dedupe)
+    elif args.command == "split":
+        job.update(
+            input=args.input,
+            ranges=args.ranges,
+            out_dir=args.out_dir,
+            prefix=args.prefix,
+            workers=args.workers or None,
+        )
+    elif args.command == "extract":
+        job.update(input=args.input, pages=args.pages, output=args.output)
+    elif args.command == "rotate":
+        job.update(
+            input=args.input,
+            pages=args.pages,
+            angle=args.angle,
+            output=args.output,
+            incremental=args.incremental,
+            in_place=args.in_place,
+        )
+
+    from pypdf.errors import PyPdfError
+
+    try:
+        with _profiled(args.command, args.profile_dir):
+            outputs = run_job(job, ReaderPool())
+    except (OSError, ValueError, ImportError, PyPdfError) as exc:
+        print(f"[error] {exc}", file=sys.stderr)
+        return 1
+
+    for out in outputs:
+        print(f"[info] Wrote {out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,211 @@
+"""
+incremental.py — Incremental-update writer for page-level edits.
+
+Instead of copying the whole document object graph into a new `PdfWriter`,
+an incremental update appends only the changed objects, a cross-reference
+section for them and a new trailer to the original bytes (PDF 1.7,
+section 7.5.6). Rotating 3 pages of a 1 GB file therefore parses and
+writes 3 page dictionaries, not the whole document.
+"""
+
+from __future__ import annotations
+
+import io
+import re
+
+from pypdf import PdfReader
+from pypdf.generic import DictionaryObject, IndirectObject, NameObject, NumberObject
+
+_STARTXREF_RE = re.compile(rb"startxref\s+(\d+)")
+
+
+def last_startxref(data) -> int:
+    """
+    Return the offset of the last cross-reference section.
+
+    Args:
+        data: The complete PDF bytes (bytes, memoryview or mmap).
+
+    Returns:
+        int: The value after the final `startxref` keyword.
+
+    Raises:
+        ValueError: If no `startxref` is found near the end of the file.
+    """
+    tail = bytes(data[max(0, len(data) - 2048):])
+    matches = list(_STARTXREF_RE.finditer(tail))
+    if not matches:
+        raise ValueError("No startxref found; cannot append an incremental update.")
+    return int(matches[-1].group(1))
+
+
+def _int(value) -> int:
+    return int(value.get_object() if hasattr(value, "get_object") else value)
+
+
+def page_count(reader: PdfReader) -> int:
+    """
+    Read the page count from the page tree root without flattening the tree.
+
+    Args:
+        reader (PdfReader): The document.
+
+    Returns:
+        int: The `/Count` of the root `/Pages` node.
+    """
+    return _int(reader.trailer["/Root"]["/Pages"]["/Count"])
+
+
+def locate_pages(reader: PdfReader, indices) -> dict[int, tuple[IndirectObject, int]]:
+    """
+    Find the page objects for the given zero-based indices.
+
+    Walks the page tree from the root by `/Count`, descending only into
+    subtrees that contain a wanted index. `/Count` alone cannot tell a node
+    of leaves from one mixing nested and empty `/Pages` nodes, so kids are
+    never indexed directly.
+
+    Args:
+        reader (PdfReader): The document.
+        indices (Container[int] with `intersection`): A `PageRanges` of wanted pages.
+
+    Returns:
+        dict[int, tuple[IndirectObject, int]]: For each index, the page's
+            indirect reference and its effective (possibly inherited) /Rotate.
+    """
+    from pdfctl.ranges import PageRanges
+
+    found: dict[int, tuple[IndirectObject, int]] = {}
+    root = reader.trailer["/Root"]["/Pages"].get_object()
+    stack = [(root, 0, _int(root.get("/Rotate", 0)))]
+
+    while stack:
+        node, first, inherited = stack.pop()
+        start = first
+        for ref in node["/Kids"]:
+            kid = ref.get_object()
+            if "/Kids" in kid:
+                count = _int(kid.get("/Count", 0))
+                if indices.intersection(PageRanges([(start, start + count)])):
+                    stack.append((kid, start, _int(kid.get("/Rotate", inherited))))
+                start += count
+            else:
+                if start in indices:
+                    found[start] = (ref, _int(kid.get("/Rotate", inherited)))
+                start += 1
+
+    return found
+
+
+def build_update(
+    reader: PdfReader,
+    base_size: int,
+    prev_xref: int,
+    xref_stream: bool,
+    objects: dict[IndirectObject, DictionaryObject],
+) -> bytes:
+    """
+    Serialize replacement objects as an incremental update.
+
+    Args:
+        reader (PdfReader): The original document (for its trailer).
+        base_size (int): Length in bytes of the original file; offsets in
+            the update are relative to the start of the original file.
+        prev_xref (int): Offset of the original's last xref section.
+        xref_stream (bool): Write a cross-reference stream (for originals
+            that use one) instead of a classic `xref` table.
+        objects (dict[IndirectObject, DictionaryObject]): New contents for
+            existing object numbers.
+
+    Returns:
+        bytes: The update to append after the original bytes.
+    """
+    out = io.BytesIO()
+    out.write(b"\n")
+    offsets: dict[int, tuple[int, int]] = {}
+
+    for ref, obj in sorted(objects.items(), key=lambda item: item[0].idnum):
+        offsets[ref.idnum] = (base_size + out.tell(), ref.generation)
+        out.write(b"%d %d obj\n" % (ref.idnum, ref.generation))
+        obj.write_to_stream(out)
+        out.write(b"\nendobj\n")
+
+    trailer = DictionaryObject()
+    for key in ("/Root", "/Info", "/ID"):
+        if key in reader.trailer:
+            trailer[NameObject(key)] = reader.trailer.raw_get(key)
+    size = _int(reader.trailer["/Size"])
+    trailer[NameObject("/Prev")] = NumberObject(prev_xref)
+    xref_at = base_size + out.tell()
+
+    if xref_stream:
+        from pypdf.generic import ArrayObject, StreamObject
+
+        offsets[size] = (xref_at, 0)
+        rows = b"".join(
+            b"\x01" + off.to_bytes(8, "big") + gen.to_bytes(2, "big")
+            for _, (off, gen) in sorted(offsets.items())
+        )
+        xref = StreamObject()
+        xref._data = rows
+        xref.update(trailer)
+        xref.update({
+            NameObject("/Type"): NameObject("/XRef"),
+            NameObject("/Size"): NumberObject(size + 1),
+            NameObject("/W"): ArrayObject([NumberObject(1), NumberObject(8), NumberObject(2)]),
+            NameObject("/Index"): ArrayObject(
+                [NumberObject(v) for num in sorted(offsets) for v in (num, 1)]
+            ),
+        })
+        out.write(b"%d 0 obj\n" % size)
+        xref.write_to_stream(out)
+        out.write(b"\nendobj\n")
+    else:
+        trailer[NameObject("/Size")] = NumberObject(size)
+        # Restate the free-list head so readers see a zero-indexed first subsection.
+        out.write(b"xref\n0 1\n0000000000 65535 f\r\n")
+        for num, (off, gen) in sorted(offsets.items()):
+            out.write(b"%d 1\n%010d %05d n\r\n" % (num, off, gen))
+        out.write(b"trailer\n")
+        trailer.write_to_stream(out)
+        out.write(b"\n")
+
+    out.write(b"startxref\n%d\n%%%%EOF\n" % xref_at)
+    return out.getvalue()
+
+
+def rotation_update(reader: PdfReader, data, pages, angle: int) -> tuple[bytes, int]:
+    """
+    Build an incremental update that rotates the given pages.
+
+    Only the `/Rotate` entry of each targeted page dictionary changes; page
+    contents and all other objects are left untouched in the original bytes.
+
+    Args:
+        reader (PdfReader): The parsed original document.
+        data: The original PDF bytes (bytes, memoryview or mmap).
+        pages (PageRanges): Zero-based indices of the pages to rotate.
+        angle (int): Clockwise rotation in degrees; a multiple of 90.
+
+    Returns:
+        tuple[bytes, int]: The update to append and the number of pages rotated.
+
+    Raises:
+        ValueError: If `angle` is not a multiple of 90, or the document is
+            encrypted (its objects would need re-encryption).
+    """
+    if angle % 90:
+        raise ValueError("Rotation angle must be a multiple of 90")
+    if reader.is_encrypted:
+        raise ValueError("Incremental rotation does not support encrypted documents.")
+
+    prev = last_startxref(data)
+    xref_stream = bytes(data[prev:prev + 4]) != b"xref"
+
+    objects: dict[IndirectObject, DictionaryObject] = {}
+    for ref, current in locate_pages(reader, pages).values():
+        page = DictionaryObject(ref.get_object())
+        page[NameObject("/Rotate")] = NumberObject((current + angle) % 360)
+        objects[ref] = page
+
+    return build_update(reader, len(data), prev, xref_stream, objects), len(objects)
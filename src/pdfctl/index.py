@@ -0,0 +1,289 @@
+"""
+index.py — Lightweight per-document index for PDFCTL.
+
+Validating a range string only needs the page count, and looking up one
+page only needs its object number, yet `len(reader.pages)` makes pypdf
+flatten the whole page tree. A `DocumentIndex` records the page count,
+the cross-reference location and, per page, the object number, byte
+offset, size and rotation. It is built once with a single walk over the
+page tree and persisted as a small JSON file, so later runs answer these
+questions in O(1) without touching the page tree at all.
+"""
+
+from __future__ import annotations
+
+import io
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from pypdf import PdfReader
+
+from pdfctl import incremental, ops
+
+INDEX_VERSION = 1
+SIDECAR_SUFFIX = ".pdfctl-index.json"
+
+# PDF default user space when no /MediaBox is present (US Letter).
+_DEFAULT_BOX = (0.0, 0.0, 612.0, 792.0)
+
+
+@dataclass(frozen=True)
+class PageInfo:
+    """
+    One page as recorded in a `DocumentIndex`.
+
+    Attributes:
+        number (int): Zero-based page index.
+        object (int): Object number of the page dictionary.
+        offset (int): Byte offset of the page object, or -1 when it is
+            stored inside an object stream.
+        width (float): Width of the (possibly inherited) /MediaBox.
+        height (float): Height of the (possibly inherited) /MediaBox.
+        rotation (int): Effective (possibly inherited) /Rotate, 0-359.
+    """
+
+    number: int
+    object: int
+    offset: int
+    width: float
+    height: float
+    rotation: int
+
+
+@dataclass
+class DocumentIndex:
+    """
+    Page count, xref location and per-page metadata of one document.
+
+    Per-page data is stored column-wise so the JSON form stays compact for
+    documents with hundreds of thousands of pages.
+
+    Attributes:
+        size (int): Size of the document in bytes.
+        startxref (int): Offset of the last cross-reference section.
+        xref_stream (bool): Whether that section is a cross-reference stream.
+        pages_offset (int): Byte offset of the root /Pages node (-1 if compressed).
+        objects (list[int]): Page object numbers, in page order.
+        offsets (list[int]): Page object byte offsets (-1 if compressed).
+        widths (list[float]): Page widths.
+        heights (list[float]): Page heights.
+        rotations (list[int]): Effective page rotations.
+        digest (str): Content hash of the document, if known.
+    """
+
+    size: int
+    startxref: int
+    xref_stream: bool
+    pages_offset: int
+    objects: list[int] = field(default_factory=list)
+    offsets: list[int] = field(default_factory=list)
+    widths: list[float] = field(default_factory=list)
+    heights: list[float] = field(default_factory=list)
+    rotations: list[int] = field(default_factory=list)
+    digest: str = ""
+
+    @property
+    def page_count(self) -> int:
+        """int: Number of pages."""
+        return len(self.objects)
+
+    def page(self, number: int) -> PageInfo:
+        """
+        Look up one page.
+
+        Args:
+            number (int): Zero-based page index.
+
+        Returns:
+            PageInfo: The recorded metadata.
+
+        Raises:
+            IndexError: If `number` is out of range.
+        """
+        if not 0 <= number < len(self.objects):
+            raise IndexError(f"Page {number + 1} is out of range (document has {len(self.objects)} pages).")
+        return PageInfo(
+            number=number,
+            object=self.objects[number],
+            offset=self.offsets[number],
+            width=self.widths[number],
+            height=self.heights[number],
+            rotation=self.rotations[number],
+        )
+
+    def to_dict(self) -> dict:
+        """
+        Returns:
+            dict: A JSON-serializable form, see `from_dict`.
+        """
+        return {
+            "version": INDEX_VERSION,
+            "digest": self.digest,
+            "size": self.size,
+            "startxref": self.startxref,
+            "xref_stream": self.xref_stream,
+            "pages_offset": self.pages_offset,
+            "objects": self.objects,
+            "offsets": self.offsets,
+            "widths": self.widths,
+            "heights": self.heights,
+            "rotations": self.rotations,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> DocumentIndex:
+        """
+        Rebuild an index from `to_dict` output.
+
+        Raises:
+            ValueError: If the data was written by an incompatible version.
+        """
+        if data.get("version") != INDEX_VERSION:
+            raise ValueError(f"Unsupported index version: {data.get('version')!r}")
+        fields = {k: v for k, v in data.items() if k != "version"}
+        return cls(**fields)
+
+    def save(self, path: str | os.PathLike[str]) -> None:
+        """Atomically write the index as JSON to `path`."""
+        path = Path(path)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps(self.to_dict(), separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str | os.PathLike[str]) -> DocumentIndex:
+        """
+        Read an index written by `save`.
+
+        Raises:
+            OSError: If the file cannot be read.
+            ValueError: If the file is not a valid index.
+        """
+        return cls.from_dict(json.loads(Path(path).read_text(encoding="utf-8")))
+
+
+def _number(value) -> float:
+    return float(value.get_object() if hasattr(value, "get_object") else value)
+
+
+def _tail(reader: PdfReader) -> tuple[int, bytes]:
+    """Return the document size and its last 2 KiB."""
+    stream = reader.stream
+    pos = stream.tell()
+    stream.seek(0, io.SEEK_END)
+    size = stream.tell()  # mmap.seek returns None
+    stream.seek(max(0, size - 2048))
+    tail = stream.read()
+    stream.seek(pos)
+    return size, tail
+
+
+def build_index(source: ops.Source, digest: str = "") -> DocumentIndex:
+    """
+    Build the index of a document with one walk over its page tree.
+
+    Only the page tree nodes and page dictionaries are parsed; page
+    contents and resources are never resolved, and pypdf's page list is
+    not built.
+
+    Args:
+        source (Source): The PDF (path, bytes, stream or `PdfReader`).
+        digest (str, optional): Content hash to record with the index.
+
+    Returns:
+        DocumentIndex: The index.
+
+    Raises:
+        ValueError: If the document has no `startxref`.
+    """
+    reader = ops.open_reader(source)
+    size, tail = _tail(reader)
+    startxref = incremental.last_startxref(tail)
+    stream = reader.stream
+    pos = stream.tell()
+    stream.seek(startxref)
+    xref_stream = stream.read(4) != b"xref"
+    stream.seek(pos)
+
+    def offset(ref) -> int:
+        return reader.xref.get(ref.generation, {}).get(ref.idnum, -1)
+
+    root_ref = reader.trailer["/Root"].raw_get("/Pages")
+    index = DocumentIndex(
+        size=size,
+        startxref=startxref,
+        xref_stream=xref_stream,
+        pages_offset=offset(root_ref),
+        digest=digest,
+    )
+
+    seen: set[int] = set()
+    stack = [(root_ref, _DEFAULT_BOX, 0)]
+    while stack:
+        ref, box, rotate = stack.pop()
+        if ref.idnum in seen:
+            continue  # a malformed tree that loops back on itself
+        seen.add(ref.idnum)
+        node = ref.get_object()
+        if "/MediaBox" in node:
+            box = tuple(_number(v) for v in node["/MediaBox"])
+        rotate = int(_number(node.get("/Rotate", rotate)))
+
+        if "/Kids" in node:
+            stack.extend((kid, box, rotate) for kid in reversed(node["/Kids"]))
+        else:
+            index.objects.append(ref.idnum)
+            index.offsets.append(offset(ref))
+            index.widths.append(abs(box[2] - box[0]))
+            index.heights.append(abs(box[3] - box[1]))
+            index.rotations.append(rotate % 360)
+    return index
+
+
+def sidecar_path(path: str | os.PathLike[str]) -> Path:
+    """
+    Returns:
+        Path: Where the index of the PDF at `path` is persisted.
+    """
+    path = Path(path)
+    return path.with_name(path.name + SIDECAR_SUFFIX)
+
+
+def index_file(path: str | os.PathLike[str], persist: bool = True) -> DocumentIndex:
+    """
+    Return the index of a PDF file, reusing its sidecar when still valid.
+
+    The sidecar is trusted while the file size and the recorded xref
+    location still match; an appended incremental update moves `startxref`
+    and therefore triggers a rebuild.
+
+    Args:
+        path (str | os.PathLike): The PDF file.
+        persist (bool, optional): Write a fresh sidecar after rebuilding.
+            Defaults to True.
+
+    Returns:
+        DocumentIndex: The index.
+    """
+    sidecar = sidecar_path(path)
+    size = os.path.getsize(path)
+    try:
+        cached = DocumentIndex.load(sidecar)
+    except (OSError, ValueError, TypeError):
+        cached = None
+    if cached is not None and cached.size == size:
+        with open(path, "rb") as fh:
+            fh.seek(max(0, size - 2048))
+            if incremental.last_startxref(fh.read()) == cached.startxref:
+                return cached
+
+    index = build_index(path)
+    if persist:
+        try:
+            index.save(sidecar)
+        except OSError:
+            pass  # read-only location; the index is still usable
+    return index
@@ -0,0 +1,232 @@
+"""
+jobs.py — Background job queue for long-running PDF operations.
+
+Operations are submitted to a thread pool and tracked by job ID, so the web
+UI can return immediately, poll progress, cancel, and fetch the result when
+it is ready. Work functions receive a `progress` callback compatible with
+the `pdfctl.ops` functions; cancellation is delivered through that callback.
+Finished jobs are kept only for a while, so a long-lived queue does not hold
+on to every result it ever produced.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+class JobCancelled(Exception):
+    """Raised inside a job's progress callback once cancellation is requested."""
+
+
+@dataclass
+class Job:
+    """
+    State of a submitted job.
+
+    Attributes:
+        id (str): Unique job ID.
+        name (str): Human-readable label.
+        state (str): One of `QUEUED`, `RUNNING`, `DONE`, `FAILED`, `CANCELLED`.
+        done (int): Pages processed so far.
+        total (int): Pages to process (0 until the job reports it).
+        result (Any): Return value of the work function once `DONE`.
+        error (str | None): Error message once `FAILED`.
+        finished_at (float | None): `time.monotonic()` when the job finished.
+    """
+
+    id: str
+    name: str
+    state: str = QUEUED
+    done: int = 0
+    total: int = 0
+    result: Any = None
+    error: str | None = None
+    finished_at: float | None = None
+    _cancel: threading.Event = field(default_factory=threading.Event, repr=False)
+    _future: Future | None = field(default=None, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        """bool: True once the job is done, failed or cancelled."""
+        return self.state in (DONE, FAILED, CANCELLED)
+
+    @property
+    def progress(self) -> float:
+        """float: Fraction of pages processed, between 0.0 and 1.0."""
+        if self.state == DONE:
+            return 1.0
+        return self.done / self.total if self.total else 0.0
+
+    def report(self, done: int, total: int) -> None:
+        """
+        Progress callback handed to the work function.
+
+        Raises:
+            JobCancelled: If cancellation has been requested.
+        """
+        self.done = done
+        self.total = total
+        if self._cancel.is_set():
+            raise JobCancelled(self.id)
+
+
+class JobQueue:
+    """
+    Runs work functions on a bounded thread pool and tracks them by job ID.
+
+    One queue is meant to be shared by the whole server so that the number
+    of concurrently running operations stays bounded. Finished jobs are
+    dropped, with their results, once collected with `result`, once they
+    are older than `ttl`, or once more than `max_finished` of them are kept.
+
+    Args:
+        max_workers (int, optional): Maximum number of jobs running at once.
+            Defaults to 4.
+        ttl (float, optional): Seconds a finished job is kept. Defaults to 1800.
+        max_finished (int, optional): Most finished jobs kept; the oldest are
+            dropped first. Defaults to 32.
+    """
+
+    def __init__(self, max_workers: int = 4, ttl: float = 1800.0, max_finished: int = 32) -> None:
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pdfctl-job")
+        self._jobs: dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self.ttl = ttl
+        self.max_finished = max_finished
+
+    def submit(self, name: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> str:
+        """
+        Queue `fn(*args, progress=..., **kwargs)` for background execution.
+
+        Args:
+            name (str): Label shown to users.
+            fn (Callable): The work function; must accept a `progress` keyword.
+            *args: Positional arguments for `fn`.
+            **kwargs: Keyword arguments for `fn`.
+
+        Returns:
+            str: The job ID.
+        """
+        job = Job(id=uuid.uuid4().hex, name=name)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        job._future = self._pool.submit(self._run, job, fn, args, kwargs)
+        return job.id
+
+    def get(self, job_id: str) -> Job | None:
+        """
+        Returns:
+            Job | None: The job, or None if the ID is unknown, forgotten or expired.
+        """
+        with self._lock:
+            self._prune()
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Request cancellation of a job.
+
+        Queued jobs never start; running jobs stop at their next progress report.
+
+        Returns:
+            bool: False if the job is unknown or already finished.
+        """
+        job = self._jobs.get(job_id)
+        if job is None or job.finished:
+            return False
+        job._cancel.set()
+        if job._future is not None and job._future.cancel():
+            job.finished_at = time.monotonic()
+            job.state = CANCELLED
+        return True
+
+    def result(self, job_id: str, timeout: float | None = None) -> Any:
+        """
+        Wait for a job, return its result and drop the job from the queue.
+
+        Args:
+            job_id (str): The job ID.
+            timeout (float | None, optional): Seconds to wait; None waits forever.
+
+        Returns:
+            Any: The work function's return value.
+
+        Raises:
+            KeyError: If the job ID is unknown.
+            JobCancelled: If the job was cancelled.
+            RuntimeError: If the job failed.
+            TimeoutError: If the job did not finish in time.
+        """
+        job = self._jobs[job_id]
+        if job._future is not None and not job._future.cancelled():
+            job._future.result(timeout=timeout)
+        with self._lock:
+            self._jobs.pop(job_id, None)
+        if job.state == CANCELLED:
+            raise JobCancelled(job_id)
+        if job.state == FAILED:
+            raise RuntimeError(job.error)
+        return job.result
+
+    def forget(self, job_id: str) -> None:
+        """Drop a finished job and its result; running jobs are cancelled first."""
+        self.cancel(job_id)
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+    def jobs(self) -> list[Job]:
+        """
+        Returns:
+            list[Job]: All tracked jobs, in submission order.
+        """
+        with self._lock:
+            self._prune()
+            return list(self._jobs.values())
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Cancel queued jobs and stop the worker threads."""
+        for job in self.jobs():
+            self.cancel(job.id)
+        self._pool.shutdown(wait=wait)
+
+    def _prune(self) -> None:
+        """Drop expired finished jobs, then the oldest beyond `max_finished`. Caller holds the lock."""
+        finished = [job for job in self._jobs.values() if job.finished]
+        if not finished:
+            return
+        finished.sort(key=lambda job: job.finished_at)
+        cutoff = time.monotonic() - self.ttl
+        excess = len(finished) - self.max_finished
+        for i, job in enumerate(finished):
+            if i < excess or job.finished_at < cutoff:
+                del self._jobs[job.id]
+
+    @staticmethod
+    def _run(job: Job, fn: Callable[..., Any], args: tuple, kwargs: dict) -> None:
+        if job._cancel.is_set():
+            job.finished_at = time.monotonic()
+            job.state = CANCELLED
+            return
+        job.state = RUNNING
+        try:
+            job.result = fn(*args, progress=job.report, **kwargs)
+            state = DONE
+        except JobCancelled:
+            state = CANCELLED
+        except Exception as exc:  # reported to the UI via job.error
+            job.error = f"{type(exc).__name__}: {exc}"
+            state = FAILED
+        job.finished_at = time.monotonic()  # before the state, so a finished job always has it
+        job.state = state
@@ -0,0 +1,218 @@
+"""
+metrics.py — Timing and memory instrumentation for PDFCTL operations.
+
+Every operation reports how long each phase took (parse, page resolve,
+add_page, dedupe, optimize, serialize, download prep) as a structured event. Events are
+aggregated into counters that can be rendered in the Prometheus text
+exposition format, and can also be forwarded to listeners such as a
+JSON-lines log. `profile_job` optionally dumps a cProfile and tracemalloc
+snapshot for a single job.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+PARSE = "parse"
+RESOLVE = "resolve"
+ADD_PAGE = "add_page"
+SERIALIZE = "serialize"
+DEDUPE = "dedupe"
+OPTIMIZE = "optimize"
+DOWNLOAD_PREP = "download_prep"
+
+Listener = Callable[[dict], None]
+
+
+class Recorder:
+    """
+    Thread-safe aggregation of phase timings.
+
+    Each `record` call updates per-(op, phase) call counts and total
+    seconds, adds to per-op page counters, and passes the event to every
+    registered listener.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._seconds: dict[tuple[str, str], float] = {}
+        self._calls: dict[tuple[str, str], int] = {}
+        self._pages: dict[str, int] = {}
+        self._listeners: list[Listener] = []
+
+    def add_listener(self, listener: Listener) -> None:
+        """Register a callable that receives every event dict."""
+        with self._lock:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: Listener) -> None:
+        """Unregister a listener added with `add_listener`."""
+        with self._lock:
+            self._listeners.remove(listener)
+
+    def record(self, op: str, phase: str, seconds: float, pages: int = 0, **extra: Any) -> None:
+        """
+        Record one timed phase.
+
+        Args:
+            op (str): Operation name, e.g. "merge".
+            phase (str): Phase name, e.g. `PARSE` or `SERIALIZE`.
+            seconds (float): Wall time spent in the phase.
+            pages (int, optional): Pages handled in the phase. Defaults to 0.
+            **extra: Additional fields copied into the event.
+        """
+        key = (op, phase)
+        event = {"ts": time.time(), "op": op, "phase": phase, "seconds": seconds, "pages": pages, **extra}
+        with self._lock:
+            self._seconds[key] = self._seconds.get(key, 0.0) + seconds
+            self._calls[key] = self._calls.get(key, 0) + 1
+            if pages:
+                self._pages[op] = self._pages.get(op, 0) + pages
+            listeners = list(self._listeners)
+        for listener in listeners:
+            listener(event)
+
+    def reset(self) -> None:
+        """Clear all counters (listeners are kept)."""
+        with self._lock:
+            self._seconds.clear()
+            self._calls.clear()
+            self._pages.clear()
+
+    def render_prometheus(self) -> str:
+        """
+        Render the counters in the Prometheus text exposition format.
+
+        Returns:
+            str: The metrics text.
+        """
+        with self._lock:
+            seconds = sorted(self._seconds.items())
+            calls = sorted(self._calls.items())
+            pages = sorted(self._pages.items())
+
+        lines = [
+            "# HELP pdfctl_phase_seconds_total Wall time spent per operation phase.",
+            "# TYPE pdfctl_phase_seconds_total counter",
+        ]
+        lines += [f'pdfctl_phase_seconds_total{{op="{o}",phase="{p}"}} {v:.6f}' for (o, p), v in seconds]
+        lines += [
+            "# HELP pdfctl_phase_calls_total Number of times each operation phase ran.",
+            "# TYPE pdfctl_phase_calls_total counter",
+        ]
+        lines += [f'pdfctl_phase_calls_total{{op="{o}",phase="{p}"}} {v}' for (o, p), v in calls]
+        lines += [
+            "# HELP pdfctl_pages_total Pages written per operation.",
+            "# TYPE pdfctl_pages_total counter",
+        ]
+        lines += [f'pdfctl_pages_total{{op="{o}"}} {v}' for o, v in pages]
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str | os.PathLike[str]) -> None:
+        """
+        Atomically write `render_prometheus()` to `path`, e.g. for the
+        node_exporter textfile collector.
+        """
+        path = Path(path)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(self.render_prometheus(), encoding="utf-8")
+        os.replace(tmp, path)
+
+
+recorder = Recorder()
+
+
+@contextmanager
+def phase(op: str, name: str, pages: int = 0, **extra: Any) -> Iterator[None]:
+    """
+    Time the enclosed block and record it on the global `recorder`.
+
+    Args:
+        op (str): Operation name, e.g. "merge".
+        name (str): Phase name, e.g. `PARSE`.
+        pages (int, optional): Pages handled in the block. Defaults to 0.
+        **extra: Additional fields copied into the event.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        recorder.record(op, name, time.perf_counter() - start, pages=pages, **extra)
+
+
+class JsonLinesSink:
+    """
+    Listener that appends each event as one JSON line to a file.
+
+    Args:
+        path (str | os.PathLike): The log file; opened in append mode.
+    """
+
+    def __init__(self, path: str | os.PathLike[str]) -> None:
+        self._fp = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def __call__(self, event: dict) -> None:
+        line = json.dumps(event, sort_keys=True)
+        with self._lock:
+            self._fp.write(line + "\n")
+            self._fp.flush()
+
+    def close(self) -> None:
+        """Close the underlying file."""
+        self._fp.close()
+
+
+@contextmanager
+def profile_job(
+    name: str,
+    out_dir: str | os.PathLike[str],
+    cpu: bool = True,
+    memory: bool = True,
+    top: int = 25,
+) -> Iterator[None]:
+    """
+    Profile the enclosed block and dump the results to `out_dir`.
+
+    Writes `<name>.prof` (load with `pstats` or snakeviz) when `cpu` is set,
+    and `<name>.tracemalloc.txt` with the top allocation sites and the peak
+    traced memory when `memory` is set.
+
+    Args:
+        name (str): Base file name for the dumps.
+        out_dir (str | os.PathLike): Directory for the dumps; created if missing.
+        cpu (bool, optional): Collect a cProfile profile. Defaults to True.
+        memory (bool, optional): Collect a tracemalloc snapshot. Defaults to True.
+        top (int, optional): Allocation sites listed in the memory dump. Defaults to 25.
+    """
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+
+    profiler = cProfile.Profile() if cpu else None
+    started_tracing = memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    if profiler:
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(out / f"{name}.prof")
+        if memory:
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            if started_tracing:
+                tracemalloc.stop()
+            lines = [f"peak traced memory: {peak / 1024 / 1024:.1f} MiB", ""]
+            lines += [str(stat) for stat in snapshot.statistics("lineno")[:top]]
+            (out / f"{name}.tracemalloc.txt").write_text("\n".join(lines) + "\n", encoding="utf-8")
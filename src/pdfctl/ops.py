@@ -0,0 +1,841 @@
+"""
+ops.py — Headless PDF operations engine for PDFCTL.
+
+Implements merge / split / extract / rotate as plain functions over file
+paths, byte strings, or binary streams. Nothing in this module imports
+Streamlit, so the web UI, the command line and batch workers all run the
+same code.
+
+Each operation records its parse / resolve / add_page / serialize phases
+on `pdfctl.metrics.recorder`.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import io
+import mmap
+import os
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterable, Iterator, Optional, Union
+
+from pypdf import PdfReader, PdfWriter
+from pypdf.generic import (
+    ArrayObject,
+    DictionaryObject,
+    IndirectObject,
+    NameObject,
+    NullObject,
+    NumberObject,
+)
+
+from pdfctl import incremental, metrics
+from pdfctl.buffers import DEFAULT_SPOOL_THRESHOLD, SpooledBuffer
+from pdfctl.ranges import PageRanges, compile_ordered, compile_ranges, compile_split
+
+Source = Union[str, "os.PathLike[str]", bytes, BinaryIO, PdfReader]
+Destination = Union[str, "os.PathLike[str]", BinaryIO]
+# Called as progress(done, total) after each page is written; may raise to abort.
+Progress = Optional[Callable[[int, int], None]]
+
+
+def map_file(path: str | os.PathLike[str]) -> BinaryIO:
+    """
+    Map a file into memory read-only.
+
+    The mapping is backed by the page cache, so only the parts pypdf
+    actually touches become resident. The file descriptor is closed right
+    away; the mapping stays valid until it is garbage-collected.
+
+    Args:
+        path (str | os.PathLike): The file to map.
+
+    Returns:
+        BinaryIO: A seekable, read-only view of the file (an empty
+            `BytesIO` for zero-length files, which cannot be mapped).
+    """
+    with open(path, "rb") as fh:
+        try:
+            return mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return io.BytesIO(fh.read())
+
+
+def open_reader(source: Source, use_mmap: bool = True) -> PdfReader:
+    """
+    Open a PDF source as a `PdfReader`.
+
+    File paths are memory-mapped by default instead of being read into
+    memory in full, so resident memory scales with the pages touched rather
+    than with the file size.
+
+    Args:
+        source (Source): A file path, raw PDF bytes, a binary stream,
+            or an already opened `PdfReader` (returned unchanged).
+        use_mmap (bool, optional): Memory-map file paths. Defaults to True.
+
+    Returns:
+        PdfReader: The reader for the given source.
+    """
+    if isinstance(source, PdfReader):
+        return source
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return PdfReader(io.BytesIO(source))
+    if use_mmap and isinstance(source, (str, os.PathLike)):
+        return PdfReader(map_file(source))
+    return PdfReader(source)
+
+
+def page_ranges(expr: str, total: int) -> PageRanges:
+    """
+    Compile a range expression against a document with `total` pages.
+
+    Args:
+        expr (str): The range expression (e.g., "1-3,5,7-").
+        total (int): The number of pages in the document.
+
+    Returns:
+        PageRanges: The zero-based page intervals.
+
+    Raises:
+        ValueError: If the expression is invalid or names a page past the end.
+    """
+    ranges = compile_ranges(expr, total_pages=total)
+    if ranges.stop > total:
+        raise ValueError(f"Page {ranges.stop} is out of range (document has {total} pages).")
+    return ranges
+
+
+def page_sequence(expr: str, total: int) -> list[range]:
+    """
+    Compile an ordered range expression against a document with `total` pages.
+
+    Order and repetitions are kept, and reversed or stepped spans such as
+    "10-1" or "1-100:2" are allowed (see `pdfctl.ranges.compile_ordered`).
+
+    Args:
+        expr (str): The range expression (e.g., "5,1-4").
+        total (int): The number of pages in the document.
+
+    Returns:
+        list[range]: Zero-based index ranges in expression order.
+
+    Raises:
+        ValueError: If the expression is invalid or names a page past the end.
+    """
+    spans = compile_ordered(expr, total_pages=total)
+    for span in spans:
+        if span and max(span[0], span[-1]) >= total:
+            raise ValueError(
+                f"Page {max(span[0], span[-1]) + 1} is out of range (document has {total} pages)."
+            )
+    return spans
+
+
+def plan_split(ranges: str, total: int) -> list[PageRanges]:
+    """
+    Compile a split specification against a document with `total` pages.
+
+    Each comma-separated chunk describes the pages of one output part, e.g.
+    "1-3,4-6,7-" yields three parts. Chunks may overlap.
+
+    Args:
+        ranges (str): The split specification.
+        total (int): The number of pages in the document.
+
+    Returns:
+        list[PageRanges]: The page intervals of each part, in chunk order.
+
+    Raises:
+        ValueError: If a chunk is invalid or names a page past the end.
+    """
+    plan = compile_split(ranges, total_pages=total)
+    for part in plan:
+        if part.stop > total:
+            raise ValueError(f"Page {part.stop} is out of range (document has {total} pages).")
+    return plan
+
+
+def merge(sources: Iterable[Source], progress: Progress = None) -> PdfWriter:
+    """
+    Concatenate all pages of the given sources into one document.
+
+    Resources shared between inputs (fonts, images, form XObjects) are
+    copied once per input; pass the result through `dedupe` to collapse
+    identical copies.
+
+    Args:
+        sources (Iterable[Source]): The PDFs to merge, in output order.
+        progress (Progress, optional): Callback invoked as
+            `progress(done, total)` after each page; it may raise to abort.
+
+    Returns:
+        PdfWriter: A writer holding the merged document.
+    """
+    clock = time.perf_counter
+    t0 = clock()
+    readers = [open_reader(source) for source in sources]
+    total = sum(len(reader.pages) for reader in readers)
+    metrics.recorder.record("merge", metrics.PARSE, clock() - t0, inputs=len(readers))
+
+    done = 0
+    resolve_s = add_s = 0.0
+    writer = PdfWriter()
+    for reader in readers:
+        for idx in range(len(reader.pages)):
+            t0 = clock()
+            page = reader.pages[idx]
+            t1 = clock()
+            writer.add_page(page)
+            t2 = clock()
+            resolve_s += t1 - t0
+            add_s += t2 - t1
+            done += 1
+            if progress:
+                progress(done, total)
+
+    metrics.recorder.record("merge", metrics.RESOLVE, resolve_s)
+    metrics.recorder.record("merge", metrics.ADD_PAGE, add_s, pages=done)
+    return writer
+
+
+@dataclass
+class DedupReport:
+    """
+    Outcome of `dedupe`.
+
+    Attributes:
+        objects_before (int): Indirect objects in the writer beforehand.
+        objects_removed (int): Duplicate or unreferenced objects dropped.
+        bytes_saved (int): Serialized size of the dropped objects.
+    """
+
+    objects_before: int
+    objects_removed: int
+    bytes_saved: int
+
+
+_DEDUPE_KEY = NameObject("/PdfctlDedupe")
+
+
+class _ByteCounter:
+    """Write-only sink that only counts the bytes written to it."""
+
+    def __init__(self) -> None:
+        self.count = 0
+
+    def write(self, data: bytes) -> int:
+        self.count += len(data)
+        return len(data)
+
+
+def dedupe(writer: PdfWriter, label: str = "merge", max_passes: int = 8) -> DedupReport:
+    """
+    Collapse identical indirect objects in a writer, in place.
+
+    Objects are hashed by content (dictionary entries, stream data) and all
+    references to a duplicate are pointed at the first copy. A font
+    dictionary only becomes identical to another once its embedded font
+    file has been merged, so passes repeat until nothing changes (or
+    `max_passes` is reached). Objects left unreferenced are dropped too.
+
+    Args:
+        writer (PdfWriter): The document, e.g. the result of `merge`.
+        label (str, optional): Operation name the dedupe phase is recorded
+            under. Defaults to "merge".
+        max_passes (int, optional): Upper bound on hashing passes. Defaults to 8.
+
+    Returns:
+        DedupReport: How many objects were removed and how many bytes that saves.
+    """
+    t0 = time.perf_counter()
+    objects = writer._objects
+    before = list(objects)
+    live = sum(obj is not None for obj in objects)
+    count = live
+
+    # Pages must stay distinct objects even when their contents are equal;
+    # a temporary unique key keeps them out of the hash collisions.
+    pages = list(writer.pages)
+    for idx, page in enumerate(pages):
+        page[_DEDUPE_KEY] = NumberObject(idx)
+    try:
+        for _ in range(max_passes):
+            writer.compress_identical_objects()
+            remaining = sum(obj is not None for obj in objects)
+            if remaining == count:
+                break
+            count = remaining
+    finally:
+        for page in pages:
+            del page[_DEDUPE_KEY]
+
+    sink = _ByteCounter()
+    for idx, obj in enumerate(before):
+        if obj is not None and objects[idx] is None:
+            obj.write_to_stream(sink)
+
+    report = DedupReport(objects_before=live, objects_removed=live - count, bytes_saved=sink.count)
+    metrics.recorder.record(
+        label,
+        metrics.DEDUPE,
+        time.perf_counter() - t0,
+        objects_removed=report.objects_removed,
+        bytes_saved=report.bytes_saved,
+    )
+    return report
+
+
+_STREAM_HEADER = b"%PDF-1.7\n%\xe2\xe3\xcf\xd3\n"
+# Object numbers reserved by `merge_streaming`; both are written last.
+_PAGES_NUM = 1
+_CATALOG_NUM = 2
+
+
+class _CountingWriter:
+    """Forward writes to a binary stream and keep track of the output offset."""
+
+    def __init__(self, fp: BinaryIO) -> None:
+        self.fp = fp
+        self.pos = 0
+
+    def write(self, data: bytes) -> int:
+        self.fp.write(data)
+        self.pos += len(data)
+        return len(data)
+
+
+def _renumber(obj, mapping: dict[int, int], marker: object) -> None:
+    """
+    Point the indirect references inside `obj` at their output numbers, in place.
+
+    References to objects that are not written (the per-input catalog and
+    page tree root) become null. Rewritten references carry `marker` as
+    their document so a direct object reached twice is not remapped twice.
+    """
+    if isinstance(obj, DictionaryObject):
+        items = list(obj.items())
+    elif isinstance(obj, ArrayObject):
+        items = list(enumerate(obj))
+    else:
+        return
+    for key, value in items:
+        if isinstance(value, IndirectObject):
+            if value.pdf is marker:
+                continue
+            num = mapping.get(value.idnum)
+            obj[key] = IndirectObject(num, 0, marker) if num else NullObject()
+        else:
+            _renumber(value, mapping, marker)
+
+
+def merge_streaming(sources: Iterable[Source], dest: Destination, progress: Progress = None) -> int:
+    """
+    Concatenate documents straight into `dest`, one input at a time.
+
+    Unlike `merge`, which keeps every reader and the whole output graph
+    alive until it is serialized, each input is copied into a scratch
+    writer, its objects are renumbered and written out immediately, and
+    both are released before the next input is opened. Peak memory is
+    bounded by the largest single input, not by the sum of all inputs;
+    only the output offsets and page numbers are kept until the end.
+
+    `sources` is consumed lazily, so a generator of paths never has more
+    than one input open. The destination does not need to be seekable.
+
+    Args:
+        sources (Iterable[Source]): The PDFs to merge, in output order.
+        dest (Destination): A file path or a writable binary stream.
+        progress (Progress, optional): Callback invoked as
+            `progress(done, total)` after each page. When `sources` has a
+            length, `total` is extrapolated from the inputs read so far;
+            otherwise it counts the pages of the inputs opened so far.
+
+    Returns:
+        int: The number of pages written.
+    """
+    clock = time.perf_counter
+    count = len(sources) if hasattr(sources, "__len__") else None
+    parse_s = resolve_s = add_s = write_s = 0.0
+    offsets = array("q", [0, 0, 0])  # indexed by object number; 0 is the free-list head
+    kids = array("q")
+    inputs = done = seen = 0
+
+    with contextlib.ExitStack() as stack:
+        if isinstance(dest, (str, os.PathLike)):
+            dest = stack.enter_context(open(Path(dest), "wb"))
+        out = _CountingWriter(dest)
+        out.write(_STREAM_HEADER)
+
+        for source in sources:
+            t0 = clock()
+            reader = open_reader(source)
+            n = len(reader.pages)
+            parse_s += clock() - t0
+            inputs += 1
+            seen += n
+            total = round(seen / inputs * count) if count else seen
+
+            scratch = PdfWriter()
+            for idx in range(n):
+                t0 = clock()
+                page = reader.pages[idx]
+                t1 = clock()
+                scratch.add_page(page)
+                t2 = clock()
+                resolve_s += t1 - t0
+                add_s += t2 - t1
+                done += 1
+                if progress:
+                    progress(done, max(total, done))
+
+            t0 = clock()
+            # PdfWriter.write does this itself: link destinations cloned before their
+            # target page was added still point at a stray copy of that page.
+            scratch._resolve_links()
+            root = scratch.root_object
+            skip = {id(root), id(root["/Pages"].get_object())}
+            if scratch._info is not None:
+                skip.add(id(scratch._info.get_object()))
+
+            mapping: dict[int, int] = {}
+            for local, obj in enumerate(scratch._objects, start=1):
+                if obj is not None and id(obj) not in skip:
+                    mapping[local] = len(offsets)
+                    offsets.append(0)
+            page_nums = {page.indirect_reference.idnum for page in scratch.pages}
+            kids.extend(mapping[page.indirect_reference.idnum] for page in scratch.pages)
+
+            parent = IndirectObject(_PAGES_NUM, 0, out)
+            for local, obj in enumerate(scratch._objects, start=1):
+                num = mapping.get(local)
+                if num is None:
+                    continue
+                _renumber(obj, mapping, out)
+                if local in page_nums:
+                    obj[NameObject("/Parent")] = parent
+                chunk = io.BytesIO()
+                chunk.write(b"%d 0 obj\n" % num)
+                obj.write_to_stream(chunk)
+                chunk.write(b"\nendobj\n")
+                offsets[num] = out.pos
+                out.write(chunk.getvalue())
+            write_s += clock() - t0
+            scratch = reader = page = None  # release this input before opening the next
+
+        t0 = clock()
+        offsets[_PAGES_NUM] = out.pos
+        out.write(b"%d 0 obj\n<< /Type /Pages /Count %d /Kids [" % (_PAGES_NUM, len(kids)))
+        for start in range(0, len(kids), 4096):
+            out.write(b"".join(b"%d 0 R " % num for num in kids[start:start + 4096]))
+        out.write(b"] >>\nendobj\n")
+        offsets[_CATALOG_NUM] = out.pos
+        out.write(b"%d 0 obj\n<< /Type /Catalog /Pages %d 0 R >>\nendobj\n" % (_CATALOG_NUM, _PAGES_NUM))
+
+        xref_at = out.pos
+        out.write(b"xref\n0 %d\n0000000000 65535 f\r\n" % len(offsets))
+        for start in range(1, len(offsets), 4096):
+            out.write(b"".join(b"%010d 00000 n\r\n" % off for off in offsets[start:start + 4096]))
+        out.write(
+            b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+            % (len(offsets), _CATALOG_NUM, xref_at)
+        )
+        write_s += clock() - t0
+
+    metrics.recorder.record("merge", metrics.PARSE, parse_s, inputs=inputs, streaming=True)
+    metrics.recorder.record("merge", metrics.RESOLVE, resolve_s, streaming=True)
+    metrics.recorder.record("merge", metrics.ADD_PAGE, add_s, pages=done, streaming=True)
+    metrics.recorder.record("merge", metrics.SERIALIZE, write_s, streaming=True)
+    return done
+
+
+def split(source: Source, ranges: str, progress: Progress = None) -> list[PdfWriter]:
+    """
+    Split a document into parts, one per comma-separated chunk of `ranges`.
+
+    The specification is compiled once and the source pages are walked in a
+    single ascending pass: each page object is resolved once and handed to
+    every part that contains it, including overlapping chunks.
+
+    Args:
+        source (Source): The PDF to split.
+        ranges (str): The split specification (e.g., "1-3,4-6,7-").
+        progress (Progress, optional): Callback invoked as
+            `progress(done, total)` after each page; it may raise to abort.
+
+    Returns:
+        list[PdfWriter]: One writer per chunk, in chunk order.
+
+    Raises:
+        ValueError: If a chunk is not a valid range expression.
+    """
+    clock = time.perf_counter
+    t0 = clock()
+    reader = open_reader(source)
+    plan = plan_split(ranges, len(reader.pages))
+    metrics.recorder.record("split", metrics.PARSE, clock() - t0)
+    parts = [PdfWriter() for _ in plan]
+
+    fanout: dict[int, list[PdfWriter]] = {}
+    for writer, part in zip(parts, plan):
+        for idx in part:
+            fanout.setdefault(idx, []).append(writer)
+
+    total = sum(len(writers) for writers in fanout.values())
+    done = 0
+    resolve_s = add_s = 0.0
+    for idx in sorted(fanout):
+        t0 = clock()
+        page = reader.pages[idx]
+        resolve_s += clock() - t0
+        for writer in fanout[idx]:
+            t0 = clock()
+            writer.add_page(page)
+            add_s += clock() - t0
+            done += 1
+            if progress:
+                progress(done, total)
+
+    metrics.recorder.record("split", metrics.RESOLVE, resolve_s)
+    metrics.recorder.record("split", metrics.ADD_PAGE, add_s, pages=done, parts=len(parts))
+    return parts
+
+
+def iter_split(source: Source, ranges: str, progress: Progress = None) -> Iterator[PdfWriter]:
+    """
+    Split a document into parts, building and yielding one part at a time.
+
+    Unlike `split`, only the part being yielded is alive, so memory stays
+    bounded by the largest part rather than by all parts together, which
+    suits writing the parts out one by one (e.g. into a ZIP). Pages shared
+    by several parts are resolved from the reader's object cache each time.
+
+    Args:
+        source (Source): The PDF to split.
+        ranges (str): The split specification (e.g., "1-3,4-6,7-").
+        progress (Progress, optional): Callback invoked as
+            `progress(done, total)` after each page; it may raise to abort.
+
+    Yields:
+        PdfWriter: One writer per chunk, in chunk order.
+
+    Raises:
+        ValueError: If a chunk is not a valid range expression (raised
+            before the first part is built).
+    """
+    clock = time.perf_counter
+    t0 = clock()
+    reader = open_reader(source)
+    plan = plan_split(ranges, len(reader.pages))
+    metrics.recorder.record("split", metrics.PARSE, clock() - t0)
+
+    total = sum(len(part) for part in plan)
+    done = 0
+    for part in plan:
+        resolve_s = add_s = 0.0
+        writer = PdfWriter()
+        for idx in part:
+            t0 = clock()
+            page = reader.pages[idx]
+            t1 = clock()
+            writer.add_page(page)
+            resolve_s += t1 - t0
+            add_s += clock() - t1
+            done += 1
+            if progress:
+                progress(done, total)
+        metrics.recorder.record("split", metrics.RESOLVE, resolve_s)
+        metrics.recorder.record("split", metrics.ADD_PAGE, add_s, pages=len(part), parts=1)
+        yield writer
+
+
+# Reader opened once per pool worker by `_init_split_worker`.
+_worker_reader: PdfReader | None = None
+
+
+def _init_split_worker(path: str | None) -> None:
+    global _worker_reader
+    _worker_reader = open_reader(path) if path is not None else None
+
+
+def _write_split_part(task: tuple[list[tuple[int, int]], str]) -> str:
+    intervals, out = task
+    writer = PdfWriter()
+    for idx in PageRanges(intervals):
+        writer.add_page(_worker_reader.pages[idx])
+    write(writer, out, label="split")
+    return out
+
+
+def split_parallel(
+    path: str | os.PathLike[str],
+    ranges: str,
+    out_dir: str | os.PathLike[str],
+    prefix: str = "part",
+    workers: int | None = None,
+) -> list[Path]:
+    """
+    Split a document on disk, writing the parts concurrently in a process pool.
+
+    Each worker opens `path` once on its own and writes whole parts, so no
+    PDF objects cross process boundaries. Parts are named
+    `<prefix>_01.pdf`, `<prefix>_02.pdf`, ... in chunk order regardless of
+    which worker finishes first.
+
+    Args:
+        path (str | os.PathLike): The PDF to split.
+        ranges (str): The split specification (e.g., "1-3,4-6,7-").
+        out_dir (str | os.PathLike): Directory for the parts; created if missing.
+        prefix (str, optional): File name prefix for the parts. Defaults to "part".
+        workers (int | None, optional): Number of worker processes. Defaults
+            to the CPU count; 1 writes the parts in this process.
+
+    Returns:
+        list[Path]: The written parts, in chunk order.
+
+    Raises:
+        ValueError: If a chunk is not a valid range expression.
+    """
+    path = str(Path(path).resolve())
+    total = len(open_reader(path).pages)
+    plan = plan_split(ranges, total)
+
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    tasks = [(part.intervals, str(out / f"{prefix}_{i:02d}.pdf")) for i, part in enumerate(plan, start=1)]
+
+    workers = min(workers or os.cpu_count() or 1, len(tasks) or 1)
+    if workers == 1:
+        _init_split_worker(path)
+        try:
+            return [Path(_write_split_part(t)) for t in tasks]
+        finally:
+            _init_split_worker(None)  # don't keep the reader (and its mmap) alive in this process
+
+    chunksize = max(1, len(tasks) // (workers * 4))
+    with ProcessPoolExecutor(workers, initializer=_init_split_worker, initargs=(path,)) as pool:
+        return [Path(p) for p in pool.map(_write_split_part, tasks, chunksize=chunksize)]
+
+
+def extract(
+    source: Source,
+    pages: str,
+    ordered: bool = True,
+    progress: Progress = None,
+) -> PdfWriter:
+    """
+    Copy the selected pages of a document into a new one.
+
+    By default pages are written in the order given, so one pass can also
+    reorder or repeat pages ("5,1-4", "1,1,1", "10-1", "1-100:2").
+
+    Args:
+        source (Source): The PDF to extract from.
+        pages (str): The range expression of pages to keep (e.g., "2,5-7").
+        ordered (bool, optional): Keep the expression's order and duplicates.
+            When False, pages are written once each in document order.
+            Defaults to True.
+        progress (Progress, optional): Callback invoked as
+            `progress(done, total)` after each page; it may raise to abort.
+
+    Returns:
+        PdfWriter: A writer holding the extracted pages.
+
+    Raises:
+        ValueError: If `pages` is not a valid range expression.
+    """
+    clock = time.perf_counter
+    t0 = clock()
+    reader = open_reader(source)
+    total = len(reader.pages)
+    spans = page_sequence(pages, total) if ordered else [page_ranges(pages, total)]
+    metrics.recorder.record("extract", metrics.PARSE, clock() - t0)
+
+    writer = PdfWriter()
+    count = sum(len(span) for span in spans)
+    done = 0
+    resolve_s = add_s = 0.0
+    for span in spans:
+        for idx in span:
+            t0 = clock()
+            page = reader.pages[idx]
+            t1 = clock()
+            writer.add_page(page)
+            t2 = clock()
+            resolve_s += t1 - t0
+            add_s += t2 - t1
+            done += 1
+            if progress:
+                progress(done, count)
+
+    metrics.recorder.record("extract", metrics.RESOLVE, resolve_s)
+    metrics.recorder.record("extract", metrics.ADD_PAGE, add_s, pages=done)
+    return writer
+
+
+def rotate(source: Source, pages: str, angle: int, progress: Progress = None) -> PdfWriter:
+    """
+    Rotate the selected pages of a document, keeping all other pages as-is.
+
+    Args:
+        source (Source): The PDF to rotate.
+        pages (str): The range expression of pages to rotate (e.g., "1-3").
+        angle (int): Clockwise rotation in degrees; a multiple of 90.
+        progress (Progress, optional): Callback invoked as
+            `progress(done, total)` after each page; it may raise to abort.
+
+    Returns:
+        PdfWriter: A writer holding the full document with rotated pages.
+
+    Raises:
+        ValueError: If `pages` is invalid or `angle` is not a multiple of 90.
+    """
+    clock = time.perf_counter
+    t0 = clock()
+    reader = open_reader(source)
+    total = len(reader.pages)
+    to_rotate = page_ranges(pages, total)
+    metrics.recorder.record("rotate", metrics.PARSE, clock() - t0)
+
+    writer = PdfWriter()
+    resolve_s = add_s = 0.0
+    for i in range(total):
+        t0 = clock()
+        page = reader.pages[i]
+        t1 = clock()
+        added = writer.add_page(page)
+        if i in to_rotate:
+            # Rotate the writer's copy so a shared reader stays untouched.
+            added.rotate(angle)
+        t2 = clock()
+        resolve_s += t1 - t0
+        add_s += t2 - t1
+        if progress:
+            progress(i + 1, total)
+
+    metrics.recorder.record("rotate", metrics.RESOLVE, resolve_s)
+    metrics.recorder.record("rotate", metrics.ADD_PAGE, add_s, pages=total)
+    return writer
+
+
+def _raw_bytes(reader: PdfReader):
+    """Return a zero-copy view of the bytes behind `reader` when possible."""
+    stream = reader.stream
+    if isinstance(stream, mmap.mmap):
+        return stream
+    if hasattr(stream, "getbuffer"):
+        return stream.getbuffer()
+    stream.seek(0)
+    return stream.read()
+
+
+def rotate_incremental(
+    source: Source,
+    pages: str,
+    angle: int,
+    dest: Destination | None = None,
+) -> int:
+    """
+    Rotate the selected pages by appending an incremental update.
+
+    Only the `/Rotate` entry of the targeted page dictionaries is rewritten;
+    the original bytes are kept verbatim and followed by the changed page
+    objects and a new cross-reference section. Page lookup walks only the
+    branches of the page tree that hold targeted pages, so the cost is
+    O(targeted pages) rather than O(document).
+
+    Args:
+        source (Source): The PDF to rotate. Must be a file path when `dest`
+            is None.
+        pages (str): The range expression of pages to rotate (e.g., "1-3").
+        angle (int): Clockwise rotation in degrees; a multiple of 90.
+        dest (Destination | None, optional): Where to write the rotated
+            document. None appends the update to `source` in place.
+
+    Returns:
+        int: The number of pages rotated.
+
+    Raises:
+        ValueError: If `pages` or `angle` is invalid, the document is
+            encrypted, or `dest` is None for a non-path source.
+    """
+    if dest is None and not isinstance(source, (str, os.PathLike)):
+        raise ValueError("In-place rotation needs a file path source.")
+
+    clock = time.perf_counter
+    t0 = clock()
+    reader = open_reader(source)
+    data = _raw_bytes(reader)
+    targets = page_ranges(pages, incremental.page_count(reader))
+    metrics.recorder.record("rotate", metrics.PARSE, clock() - t0, incremental=True)
+
+    t0 = clock()
+    update, rotated = incremental.rotation_update(reader, data, targets, angle)
+    metrics.recorder.record("rotate", metrics.ADD_PAGE, clock() - t0, pages=rotated, incremental=True)
+
+    with metrics.phase("rotate", metrics.SERIALIZE, incremental=True):
+        if dest is None:
+            with open(Path(source), "ab") as fo:
+                fo.write(update)
+        elif isinstance(dest, (str, os.PathLike)):
+            with open(Path(dest), "wb") as fo:
+                fo.write(data)
+                fo.write(update)
+        else:
+            dest.write(data)
+            dest.write(update)
+
+    return rotated
+
+
+def write(writer: PdfWriter, dest: Destination, label: str = "write") -> None:
+    """
+    Serialize a writer to a file path or a writable binary stream.
+
+    Args:
+        writer (PdfWriter): The document to serialize.
+        dest (Destination): A file path or a writable binary stream.
+        label (str, optional): Operation name the serialize phase is
+            recorded under. Defaults to "write".
+    """
+    with metrics.phase(label, metrics.SERIALIZE):
+        if isinstance(dest, (str, os.PathLike)):
+            with open(Path(dest), "wb") as fo:
+                writer.write(fo)
+        else:
+            writer.write(dest)
+
+
+def to_buffer(
+    writer: PdfWriter,
+    threshold: int = DEFAULT_SPOOL_THRESHOLD,
+    directory: str | os.PathLike[str] | None = None,
+    label: str = "write",
+) -> SpooledBuffer:
+    """
+    Serialize a writer into a spooled in-memory buffer.
+
+    The buffer stays in memory up to `threshold` bytes and spills to an
+    anonymous temporary file in `directory` beyond that. It is returned
+    rewound, ready to be read or handed to a download widget.
+
+    Args:
+        writer (PdfWriter): The document to serialize.
+        threshold (int, optional): Spill threshold in bytes.
+        directory (str | os.PathLike | None, optional): Spill directory,
+            e.g. a per-session temp dir.
+        label (str, optional): Operation name the serialize phase is
+            recorded under. Defaults to "write".
+
+    Returns:
+        SpooledBuffer: The serialized document, positioned at offset 0.
+    """
+    buf = SpooledBuffer(threshold=threshold, directory=directory)
+    with metrics.phase(label, metrics.SERIALIZE):
+        writer.write(buf)
+    buf.seek(0)
+    return buf
@@ -0,0 +1,321 @@
+"""
+optimize.py — Size optimization pass for PDFCTL outputs.
+
+Runs on a `PdfWriter` right before it is serialized:
+
+- streams stored without a filter are Flate-compressed, and single-Flate
+  streams are recompressed at the highest level, when that is smaller;
+- objects no longer reachable from the catalog are dropped;
+- optionally, images whose resolution on the page exceeds a DPI threshold
+  are downsampled (needs Pillow: `pip install pdfctl[optimize]`).
+
+The expensive part — zlib and image resampling — is pure bytes-in,
+bytes-out work that releases the GIL, so it is spread over a thread pool
+one page at a time; the pypdf objects are only touched on the calling
+thread.
+"""
+
+from __future__ import annotations
+
+import io
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from pypdf import PdfWriter
+from pypdf.generic import (
+    ArrayObject,
+    DictionaryObject,
+    EncodedStreamObject,
+    IndirectObject,
+    NameObject,
+    NumberObject,
+    StreamObject,
+)
+
+from pdfctl import metrics
+
+JPEG_QUALITY = 85
+
+# Images only get resampled from these simple encodings; anything with
+# masks, decode arrays or predictors is left alone.
+_IMAGE_MODES = {"/DeviceRGB": "RGB", "/DeviceGray": "L"}
+
+
+@dataclass
+class OptimizeReport:
+    """
+    Outcome of `optimize`.
+
+    Attributes:
+        streams_recompressed (int): Streams that were (re)compressed.
+        images_downsampled (int): Images that were resampled.
+        objects_removed (int): Unreachable objects dropped.
+        bytes_saved (int): Reduction of the serialized size.
+    """
+
+    streams_recompressed: int = 0
+    images_downsampled: int = 0
+    objects_removed: int = 0
+    bytes_saved: int = 0
+
+
+@dataclass
+class _Task:
+    """One stream to process off-thread; `scale` < 1 requests downsampling."""
+
+    idnum: int
+    data: bytes
+    filters: tuple[str, ...]
+    has_parms: bool
+    scale: float = 1.0
+    width: int = 0
+    height: int = 0
+    mode: str = ""
+
+
+def _filters(stream: StreamObject) -> tuple[str, ...]:
+    value = stream.get("/Filter")
+    if value is None:
+        return ()
+    value = value.get_object()
+    if isinstance(value, ArrayObject):
+        return tuple(str(v.get_object()) for v in value)
+    return (str(value),)
+
+
+def _recompress(task: _Task, level: int) -> bytes | None:
+    """Return better Flate data for a stream, or None to keep it as is."""
+    if not task.filters:
+        data = zlib.compress(task.data, level)
+        return data if len(data) < len(task.data) else None  # tiny streams only grow
+    if task.filters == ("/FlateDecode",) and not task.has_parms:
+        try:
+            data = zlib.compress(zlib.decompress(task.data), level)
+        except zlib.error:
+            return None
+        return data if len(data) < len(task.data) else None
+    return None
+
+
+def _downsample(task: _Task, level: int) -> tuple[bytes, str, int, int] | None:
+    """Resample an image; returns (data, filter, width, height) or None to keep it."""
+    from PIL import Image
+
+    size = (max(1, round(task.width * task.scale)), max(1, round(task.height * task.scale)))
+    try:
+        if task.filters == ("/DCTDecode",):
+            image = Image.open(io.BytesIO(task.data))
+            if image.mode not in ("RGB", "L"):
+                return None
+            out = io.BytesIO()
+            image.resize(size, Image.LANCZOS).save(out, "JPEG", quality=JPEG_QUALITY)
+            data, filter_ = out.getvalue(), "/DCTDecode"
+        elif task.filters in ((), ("/FlateDecode",)) and not task.has_parms:
+            raw = zlib.decompress(task.data) if task.filters else task.data
+            image = Image.frombytes(task.mode, (task.width, task.height), raw)
+            data, filter_ = zlib.compress(image.resize(size, Image.LANCZOS).tobytes(), level), "/FlateDecode"
+        else:
+            return None
+    except (OSError, ValueError, zlib.error):
+        return None  # undecodable image: leave it untouched
+    return (data, filter_, *size) if len(data) < len(task.data) else None
+
+
+def _image_task(stream: StreamObject, page_size: tuple[float, float], image_dpi: int) -> _Task | None:
+    """Build a downsampling task if the image is dense enough and simply encoded."""
+    if any(key in stream for key in ("/SMask", "/Mask", "/Decode", "/ImageMask")):
+        return None
+    mode = _IMAGE_MODES.get(str(stream.get("/ColorSpace", "")))
+    if mode is None or int(stream.get("/BitsPerComponent", 8)) != 8:
+        return None
+    width, height = int(stream["/Width"]), int(stream["/Height"])
+    # The image is drawn at most page-sized, so this is a lower bound on its DPI.
+    dpi = max(width * 72 / page_size[0], height * 72 / page_size[1])
+    if dpi <= image_dpi:
+        return None
+    return _Task(
+        idnum=stream.indirect_reference.idnum,
+        data=stream._data,
+        filters=_filters(stream),
+        has_parms="/DecodeParms" in stream,
+        scale=image_dpi / dpi,
+        width=width,
+        height=height,
+        mode=mode,
+    )
+
+
+def _run(tasks: list[_Task], level: int) -> list[tuple[_Task, object]]:
+    """Process one page's tasks; runs on a worker thread."""
+    results = []
+    for task in tasks:
+        result = _downsample(task, level) if task.scale < 1 else None
+        if result is None:
+            result = _recompress(task, level)
+        results.append((task, result))
+    return results
+
+
+def _replace(writer: PdfWriter, task: _Task, result) -> int:
+    """Swap in the processed stream; returns the bytes saved."""
+    old = writer._objects[task.idnum - 1]
+    new = EncodedStreamObject()
+    new.update(old)
+    if isinstance(result, tuple):
+        data, filter_, width, height = result
+        new[NameObject("/Width")] = NumberObject(width)
+        new[NameObject("/Height")] = NumberObject(height)
+    else:
+        data, filter_ = result, "/FlateDecode"
+    new[NameObject("/Filter")] = NameObject(filter_)
+    new.pop(NameObject("/DecodeParms"), None)
+    new._data = data
+    new.indirect_reference = old.indirect_reference
+    writer._objects[task.idnum - 1] = new
+    return len(task.data) - len(data)
+
+
+def remove_unreachable(writer: PdfWriter) -> tuple[int, int]:
+    """
+    Drop objects that cannot be reached from the catalog or the info dictionary.
+
+    Args:
+        writer (PdfWriter): The document, modified in place.
+
+    Returns:
+        tuple[int, int]: Objects removed and their serialized size in bytes.
+    """
+    objects = writer._objects
+    reached = [False] * len(objects)
+    roots = [writer.root_object]
+    if writer._info is not None:
+        roots.append(writer._info.get_object())
+    for obj in roots:
+        if obj.indirect_reference is not None:
+            reached[obj.indirect_reference.idnum - 1] = True
+
+    stack = list(roots)
+    while stack:
+        obj = stack.pop()
+        if isinstance(obj, DictionaryObject):
+            values = obj.values()
+        elif isinstance(obj, ArrayObject):
+            values = obj
+        else:
+            continue
+        for value in values:
+            if isinstance(value, IndirectObject):
+                if value.pdf is not writer or not 0 < value.idnum <= len(objects):
+                    continue
+                if not reached[value.idnum - 1]:
+                    reached[value.idnum - 1] = True
+                    stack.append(objects[value.idnum - 1])
+            else:
+                stack.append(value)
+
+    removed = size = 0
+    for i, obj in enumerate(objects):
+        if obj is not None and not reached[i]:
+            out = io.BytesIO()
+            obj.write_to_stream(out)
+            size += out.tell()
+            objects[i] = None
+            removed += 1
+    return removed, size
+
+
+def optimize(
+    writer: PdfWriter,
+    image_dpi: int | None = None,
+    workers: int | None = None,
+    level: int = 9,
+    label: str = "write",
+) -> OptimizeReport:
+    """
+    Shrink a document in place before it is written.
+
+    Args:
+        writer (PdfWriter): The document.
+        image_dpi (int | None, optional): Downsample images whose resolution
+            on their page exceeds this many DPI; None keeps all images.
+        workers (int | None, optional): Threads for the compression work;
+            None lets the executor choose.
+        level (int, optional): zlib compression level. Defaults to 9.
+        label (str, optional): Operation name the optimize phase is
+            recorded under. Defaults to "write".
+
+    Returns:
+        OptimizeReport: What was changed and how many bytes it saves.
+
+    Raises:
+        ImportError: If `image_dpi` is set and Pillow is not installed.
+    """
+    if image_dpi:
+        try:
+            import PIL  # noqa: F401
+        except ImportError:
+            raise ImportError("Image downsampling needs Pillow: pip install 'pdfctl[optimize]'") from None
+
+    t0 = time.perf_counter()
+    report = OptimizeReport()
+    report.objects_removed, report.bytes_saved = remove_unreachable(writer)
+
+    # Group streams by the first page that uses them, so each task is one page.
+    claimed: set[int] = set()
+    groups: list[list[_Task]] = []
+    for page in writer.pages:
+        tasks = []
+        contents = page.raw_get("/Contents") if "/Contents" in page else None
+        refs = [contents]
+        if contents is not None and isinstance(contents.get_object(), ArrayObject):
+            refs = list(contents.get_object())
+        xobjects = page.get("/Resources", DictionaryObject()).get_object().get("/XObject", DictionaryObject())
+        images = [ref for ref in xobjects.get_object().values() if isinstance(ref, IndirectObject)]
+        box = page.mediabox
+        page_size = (float(box.width) or 612.0, float(box.height) or 792.0)
+
+        for ref in refs + images:
+            if not isinstance(ref, IndirectObject) or ref.idnum in claimed:
+                continue
+            stream = ref.get_object()
+            if not isinstance(stream, StreamObject):
+                continue
+            claimed.add(ref.idnum)
+            task = None
+            if image_dpi and stream.get("/Subtype") == "/Image":
+                task = _image_task(stream, page_size, image_dpi)
+            if task is None:
+                task = _Task(ref.idnum, stream._data, _filters(stream), "/DecodeParms" in stream)
+            tasks.append(task)
+        groups.append(tasks)
+
+    # Streams not used directly by a page (fonts, forms, ...) form one more group.
+    rest = [
+        _Task(obj.indirect_reference.idnum, obj._data, _filters(obj), "/DecodeParms" in obj)
+        for obj in writer._objects
+        if isinstance(obj, StreamObject) and obj.indirect_reference is not None
+        and obj.indirect_reference.idnum not in claimed
+    ]
+    groups.append(rest)
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pdfctl-optimize") as pool:
+        for results in pool.map(lambda tasks: _run(tasks, level), groups):
+            for task, result in results:
+                if result is None:
+                    continue
+                report.bytes_saved += _replace(writer, task, result)
+                if isinstance(result, tuple):
+                    report.images_downsampled += 1
+                else:
+                    report.streams_recompressed += 1
+
+    metrics.recorder.record(
+        label,
+        metrics.OPTIMIZE,
+        time.perf_counter() - t0,
+        pages=len(groups) - 1,
+        bytes_saved=report.bytes_saved,
+    )
+    return report
@@ -0,0 +1,109 @@
+"""
+proxy.py — Sticky TCP load balancer for multi-worker PDFCTL.
+
+A Streamlit session lives inside one server process: its websocket, the
+files it uploads and the downloads it serves must all reach that same
+process. The proxy therefore picks the backend from a hash of the client
+address, so every connection of a browser lands on the same worker, and
+only falls through to the next worker while that one is unreachable
+(e.g. restarting). Bytes are relayed as they are, so HTTP, websockets
+and uploads all pass through unchanged.
+
+Clients behind one NAT or reverse proxy share an address and therefore a
+worker; put the workers behind a cookie-aware balancer in that case.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import zlib
+from typing import Sequence
+
+BUFFER_SIZE = 64 * 1024
+CONNECT_TIMEOUT = 5.0
+
+
+def pick(client: str, count: int) -> int:
+    """
+    Map a client address to a backend index, the same on every call and in every process.
+
+    Args:
+        client (str): The client's IP address.
+        count (int): Number of backends.
+
+    Returns:
+        int: An index in `range(count)`.
+    """
+    return zlib.crc32(client.encode()) % count
+
+
+async def _pipe(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, other: asyncio.StreamWriter) -> None:
+    """Copy `reader` into `writer` until EOF; on a connection error, tear down both sides."""
+    try:
+        while True:
+            data = await reader.read(BUFFER_SIZE)
+            if not data:
+                break
+            writer.write(data)
+            await writer.drain()
+        if writer.can_write_eof():
+            writer.write_eof()  # half-close; the other direction may still be sending
+    except OSError:
+        writer.close()
+        other.close()
+
+
+class StickyProxy:
+    """
+    Relay TCP connections to backends chosen by client address.
+
+    Args:
+        backends (Sequence[tuple[str, int]]): `(host, port)` of each worker.
+    """
+
+    def __init__(self, backends: Sequence[tuple[str, int]]) -> None:
+        if not backends:
+            raise ValueError("No backends to proxy to")
+        self.backends = list(backends)
+
+    async def connect(self, client: str) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        """
+        Open a connection to the client's backend, or the next reachable one.
+
+        Raises:
+            ConnectionError: If no backend accepts the connection.
+        """
+        first = pick(client, len(self.backends))
+        for i in range(len(self.backends)):
+            host, port = self.backends[(first + i) % len(self.backends)]
+            try:
+                return await asyncio.wait_for(asyncio.open_connection(host, port), CONNECT_TIMEOUT)
+            except (OSError, asyncio.TimeoutError):
+                continue
+        raise ConnectionError("No backend is reachable")
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve one client connection."""
+        peer = writer.get_extra_info("peername")
+        try:
+            up_reader, up_writer = await self.connect(peer[0] if peer else "")
+        except ConnectionError:
+            writer.close()
+            return
+        try:
+            await asyncio.gather(_pipe(reader, up_writer, writer), _pipe(up_reader, writer, up_writer))
+        finally:
+            writer.close()
+            up_writer.close()
+
+    async def serve(self, host: str | None, port: int) -> None:
+        """
+        Accept connections on `host:port` until cancelled.
+
+        Args:
+            host (str | None): Address to bind; None binds all interfaces.
+            port (int): Port to listen on.
+        """
+        server = await asyncio.start_server(self.handle, host, port)
+        async with server:
+            await server.serve_forever()
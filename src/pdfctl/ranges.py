@@ -1,6 +1,335 @@
 from __future__ import annotations
 
-def parse_ranges(expr: str, total_pages: int | None = None) -> list[int]:
+from array import array
+from bisect import bisect_right
+from collections import namedtuple
+from collections.abc import Iterable, Iterator
+
+MODES = ("set", "ordered", "split")
+
+
+class PageRanges:
+    """
+    A compiled set of zero-based page indices stored as sorted, merged,
+    half-open intervals.
+
+    Membership, length and intersection cost O(intervals) or better,
+    independent of how many pages the intervals cover, so "1-1000000"
+    is as cheap as "1-2".
+
+    Args:
+        intervals (Iterable[tuple[int, int]]): Half-open `(start, stop)`
+            index pairs in any order; overlapping and adjacent pairs are merged.
+    """
+
+    __slots__ = ("_starts", "_stops")
+
+    def __init__(self, intervals: Iterable[tuple[int, int]] = ()) -> None:
+        starts: list[int] = []
+        stops: list[int] = []
+        for start, stop in sorted(iv for iv in intervals if iv[0] < iv[1]):
+            if stops and start <= stops[-1]:
+                stops[-1] = max(stops[-1], stop)
+            else:
+                starts.append(start)
+                stops.append(stop)
+        self._starts = starts
+        self._stops = stops
+
+    @property
+    def intervals(self) -> list[tuple[int, int]]:
+        """list[tuple[int, int]]: The merged half-open intervals, in order."""
+        return list(zip(self._starts, self._stops))
+
+    @property
+    def stop(self) -> int:
+        """int: One past the highest index (0 when empty)."""
+        return self._stops[-1] if self._stops else 0
+
+    def __contains__(self, index: object) -> bool:
+        if not isinstance(index, int):
+            return False
+        i = bisect_right(self._starts, index) - 1
+        return i >= 0 and index < self._stops[i]
+
+    def __len__(self) -> int:
+        return sum(b - a for a, b in zip(self._starts, self._stops))
+
+    def __bool__(self) -> bool:
+        return bool(self._starts)
+
+    def __iter__(self) -> Iterator[int]:
+        for a, b in zip(self._starts, self._stops):
+            yield from range(a, b)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, PageRanges):
+            return NotImplemented
+        return self._starts == other._starts and self._stops == other._stops
+
+    def __repr__(self) -> str:
+        return f"PageRanges({self.intervals!r})"
+
+    def intersection(self, other: PageRanges) -> PageRanges:
+        """
+        Return the indices present in both `self` and `other`.
+
+        Args:
+            other (PageRanges): The ranges to intersect with.
+
+        Returns:
+            PageRanges: The intersection, computed by a linear interval sweep.
+        """
+        out = []
+        i = j = 0
+        while i < len(self._starts) and j < len(other._starts):
+            start = max(self._starts[i], other._starts[j])
+            stop = min(self._stops[i], other._stops[j])
+            if start < stop:
+                out.append((start, stop))
+            if self._stops[i] < other._stops[j]:
+                i += 1
+            else:
+                j += 1
+        return PageRanges(out)
+
+    __and__ = intersection
+
+    def clip(self, total_pages: int) -> PageRanges:
+        """
+        Drop indices at or beyond `total_pages`.
+
+        Args:
+            total_pages (int): Number of pages in the document.
+
+        Returns:
+            PageRanges: The clipped ranges.
+        """
+        return self & PageRanges([(0, total_pages)])
+
+    def to_array(self) -> array:
+        """
+        Export the indices as a compact `array.array` of signed 64-bit ints.
+
+        Returns:
+            array: The indices in ascending order.
+        """
+        out = array("q")
+        for a, b in zip(self._starts, self._stops):
+            out.extend(range(a, b))
+        return out
+
+    def to_numpy(self):
+        """
+        Export the indices as a NumPy `int64` array.
+
+        NumPy is optional and only imported when this method is called.
+
+        Returns:
+            numpy.ndarray: The indices in ascending order.
+
+        Raises:
+            ImportError: If NumPy is not installed.
+        """
+        import numpy as np
+
+        if not self._starts:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([np.arange(a, b, dtype=np.int64) for a, b in self.intervals])
+
+
+# A namedtuple rather than a dataclass: importing dataclasses would double
+# the startup cost of range parsing (see benchmarks/startup.py).
+class RangeError(namedtuple("RangeError", "start end message")):
+    """
+    One problem found in a range expression.
+
+    Attributes:
+        start (int): Offset of the first offending character in the expression.
+        end (int): Offset one past the last offending character.
+        message (str): What is wrong.
+    """
+
+    __slots__ = ()
+
+
+class RangeSyntaxError(ValueError):
+    """
+    Raised when a range expression does not compile.
+
+    Args:
+        errors (list[RangeError]): Every problem found, in order; the
+            exception message joins their messages.
+    """
+
+    def __init__(self, errors: list[RangeError]) -> None:
+        super().__init__("; ".join(e.message for e in errors))
+        self.errors = errors
+
+
+def _check(expr: str, mode: str) -> None:
+    errors = validate_ranges(expr, mode=mode)
+    if errors:
+        raise RangeSyntaxError(errors)
+
+
+def compile_ranges(expr: str, total_pages: int | None = None) -> PageRanges:
+    """
+    Compiles a range expression string into a `PageRanges` object.
+
+    Accepts the same syntax as `parse_ranges` but never expands the
+    ranges into individual pages.
+
+    Args:
+        expr (str): The range expression (e.g., "1-3,5,7-").
+        total_pages (int | None, optional): Total number of pages available.
+
+    Returns:
+        PageRanges: The zero-based page intervals.
+
+    Raises:
+        RangeSyntaxError: If the expression is empty or contains invalid
+            ranges (a `ValueError`; see `validate_ranges`).
+    """
+    _check(expr, "set")
+
+    expr = expr.translate(_NO_BLANKS)
+    return PageRanges(_part_interval(p, total_pages) for p in expr.split(",") if p)
+
+
+def compile_split(expr: str, total_pages: int | None = None) -> list[PageRanges]:
+    """
+    Compiles a split specification into one `PageRanges` per output part.
+
+    Each comma-separated item of `expr` describes one part ("1-3,4-6,7-"
+    yields three parts). The whole specification is tokenized in a single
+    pass; items may overlap.
+
+    Args:
+        expr (str): The split specification.
+        total_pages (int | None, optional): Total number of pages available.
+
+    Returns:
+        list[PageRanges]: The page intervals of each part, in order.
+
+    Raises:
+        RangeSyntaxError: If the expression is empty or contains invalid
+            ranges (a `ValueError`; see `validate_ranges`).
+    """
+    _check(expr, "split")
+
+    expr = expr.translate(_NO_BLANKS)
+    return [PageRanges([_part_interval(p, total_pages)]) for p in expr.split(",") if p]
+
+
+def _part_interval(part: str, total_pages: int | None) -> tuple[int, int]:
+    """
+    Converts one comma-separated item into a zero-based half-open interval.
+    """
+    if "-" in part:
+        a, b = part.split("-", 1)
+        a = a.strip()
+        b = b.strip()
+
+        if a == "" and b == "":
+            raise ValueError("Invalid range: '-'")
+
+        if a == "":
+            # "-B" => range from 1 to B
+            end = int(b)
+            if end < 1:
+                raise ValueError("Range end must be >= 1")
+            start = 1
+
+        elif b == "":
+            # "A-" => range from A to total_pages
+            start = int(a)
+            if start < 1:
+                raise ValueError("Range start must be >= 1")
+            end = start if total_pages is None else total_pages
+
+        else:
+            start = int(a)
+            end = int(b)
+            if start < 1 or end < 1 or end < start:
+                raise ValueError(f"Invalid range: {part}")
+
+        return (start - 1, end)
+
+    p = int(part)
+    if p < 1:
+        raise ValueError("Page must be >= 1")
+    return (p - 1, p)
+
+
+def compile_ordered(expr: str, total_pages: int | None = None) -> list[range]:
+    """
+    Compiles a range expression into zero-based index ranges that keep the
+    order and repetitions written in the expression.
+
+    On top of the `parse_ranges` syntax, spans may run backwards and may
+    carry a step:
+
+        "5,1-4"     => page 5 first, then pages 1 through 4
+        "1,1,1"     => page 1 three times
+        "10-1"      => pages 10 down to 1
+        "1-100:2"   => every other page from 1 to 100
+        "10-1:3"    => pages 10, 7, 4, 1
+
+    Each span stays a lazy `range`, so large spans are never expanded here.
+
+    Args:
+        expr (str): The range expression.
+        total_pages (int | None, optional): Total number of pages available,
+            used to extend open-ended ranges.
+
+    Returns:
+        list[range]: One range of zero-based indices per comma-separated item.
+
+    Raises:
+        RangeSyntaxError: If the expression is empty or contains invalid
+            ranges (a `ValueError`; see `validate_ranges`).
+    """
+    _check(expr, "ordered")
+
+    expr = expr.translate(_NO_BLANKS)
+    spans: list[range] = []
+
+    for part in [p for p in expr.split(",") if p]:
+        span, _, step_text = part.partition(":")
+        step = 1
+        if step_text:
+            step = int(step_text)
+            if step < 1:
+                raise ValueError(f"Step must be >= 1: {part}")
+
+        if "-" in span:
+            a, b = span.split("-", 1)
+            if a == "" and b == "":
+                raise ValueError("Invalid range: '-'")
+            start = 1 if a == "" else int(a)
+            end = int(b) if b else (start if total_pages is None else total_pages)
+            if start < 1 or end < 1:
+                raise ValueError(f"Invalid range: {part}")
+            if not b and end < start:
+                # "A-" past the last page selects nothing, as in parse_ranges.
+                continue
+        else:
+            if step_text:
+                raise ValueError(f"Step needs a span: {part}")
+            start = end = int(span)
+            if start < 1:
+                raise ValueError("Page must be >= 1")
+
+        if end >= start:
+            spans.append(range(start - 1, end, step))
+        else:
+            spans.append(range(start - 1, end - 2, -step))
+
+    return spans
+
+
+def parse_ranges(expr: str, total_pages: int | None = None, ordered: bool = False) -> list[int]:
     """
     Converts a range expression string into a list of zero-based page indices.
 
@@ -11,64 +340,153 @@ def parse_ranges(expr: str, total_pages: int | None = None) -> list[int]:
     Note:
         - Input pages are 1-based; output indices are 0-based.
         - The total_pages argument is optional and used to extend open-ended ranges.
+        - With ordered=True, see `compile_ordered` for the extended syntax.
 
     Args:
         expr (str): The range expression (e.g., "1-3,5,7-").
         total_pages (int | None, optional): Total number of pages available.
+        ordered (bool, optional): Keep the expression's order and duplicates
+            instead of sorting and de-duplicating. Defaults to False.
 
     Returns:
-        list[int]: Sorted list of zero-based page indices.
+        list[int]: Zero-based page indices; sorted and unique unless `ordered`.
 
     Raises:
-        ValueError: If the expression is empty or contains invalid ranges.
+        RangeSyntaxError: If the expression is empty or contains invalid
+            ranges (a `ValueError`; see `validate_ranges`).
     """
-    if not expr:
-        raise ValueError("Empty ranges expression.")
+    if ordered:
+        return [i for span in compile_ordered(expr, total_pages) for i in span]
+    return list(compile_ranges(expr, total_pages))
 
-    expr = expr.replace(" ", "")
-    pages: set[int] = set()
-    parts = [p for p in expr.split(",") if p]
 
-    for part in parts:
-        if "-" in part:
-            a, b = part.split("-", 1)
-            a = a.strip()
-            b = b.strip()
-
-            if a == "" and b == "":
-                raise ValueError("Invalid range: '-'")
+# kind is "num", "-", ":" or "bad"
+_Token = namedtuple("_Token", "kind text start end")
 
-            if a == "":
-                # "-B" => range from 1 to B
-                end = int(b)
-                if end < 1:
-                    raise ValueError("Range end must be >= 1")
-                rng = range(1, end + 1)
-
-            elif b == "":
-                # "A-" => range from A to total_pages
-                start = int(a)
-                if start < 1:
-                    raise ValueError("Range start must be >= 1")
-                if total_pages is None:
-                    rng = range(start, (total_pages or start) + 1)
-                else:
-                    rng = range(start, total_pages + 1)
 
-            else:
-                start = int(a)
-                end = int(b)
-                if start < 1 or end < 1 or end < start:
-                    raise ValueError(f"Invalid range: {part}")
-                rng = range(start, end + 1)
+_DIGITS = "0123456789"
+_BLANKS = " \t"
+_PUNCT = ",-:"
+# The compilers drop exactly the blanks `_tokenize` skips, so whatever
+# `validate_ranges` accepts, they parse.
+_NO_BLANKS = str.maketrans("", "", _BLANKS)
 
-            for p in rng:
-                pages.add(p - 1)
 
+def _tokenize(expr: str) -> list[list[_Token]]:
+    """Split `expr` into the tokens of each comma-separated item, keeping their offsets."""
+    items: list[list[_Token]] = [[]]
+    i, n = 0, len(expr)
+    while i < n:
+        c = expr[i]
+        if c in _BLANKS:
+            i += 1
+        elif c == ",":
+            items.append([])
+            i += 1
+        elif c in "-:":
+            items[-1].append(_Token(c, c, i, i + 1))
+            i += 1
         else:
-            p = int(part)
-            if p < 1:
-                raise ValueError("Page must be >= 1")
-            pages.add(p - 1)
+            start = i
+            digits = c in _DIGITS
+            while i < n and (expr[i] in _DIGITS) == digits and expr[i] not in _BLANKS + _PUNCT:
+                i += 1
+            items[-1].append(_Token("num" if digits else "bad", expr[start:i], start, i))
+    return items
+
 
-    return sorted(pages)
+def _check_item(tokens: list[_Token], mode: str, total_pages: int | None) -> list[RangeError]:
+    """Validate the tokens of one item; see `validate_ranges`."""
+    bad = [RangeError(t.start, t.end, f"Unexpected {t.text!r}") for t in tokens if t.kind == "bad"]
+    if bad:
+        return bad
+
+    pos = 0
+
+    def take(kind: str) -> _Token | None:
+        nonlocal pos
+        if pos < len(tokens) and tokens[pos].kind == kind:
+            pos += 1
+            return tokens[pos - 1]
+        return None
+
+    a = take("num")
+    dash = take("-")
+    b = take("num") if dash else None
+    colon = take(":")
+    step = take("num") if colon else None
+    if colon and not step:
+        return [RangeError(colon.start, colon.end, "Expected a step after ':'")]
+    if pos < len(tokens):
+        t = tokens[pos]
+        return [RangeError(t.start, t.end, f"Unexpected {t.text!r}")]
+
+    errors: list[RangeError] = []
+    if colon and mode != "ordered":
+        errors.append(RangeError(colon.start, step.end, "A step is only allowed in ordered selections"))
+    if dash and not a and not b:
+        errors.append(RangeError(dash.start, dash.end, "Invalid range: '-'"))
+    if a and int(a.text) < 1:
+        errors.append(RangeError(a.start, a.end, "Range start must be >= 1" if dash else "Page must be >= 1"))
+    if b and int(b.text) < 1:
+        errors.append(RangeError(b.start, b.end, "Range end must be >= 1"))
+    if colon and not dash:
+        errors.append(RangeError(colon.start, step.end, "Step needs a span"))
+    if step and int(step.text) < 1:
+        errors.append(RangeError(step.start, step.end, "Step must be >= 1"))
+    if not errors and a and b and int(b.text) < int(a.text) and mode != "ordered":
+        errors.append(RangeError(a.start, b.end, "Range end is before its start"))
+    if errors or total_pages is None:
+        return errors
+
+    # "A-" past the last page selects nothing rather than failing, as in `compile_*`.
+    start = int(a.text) if a else 1
+    if not dash:
+        last = (start, a)
+    elif not b:
+        return errors
+    else:
+        end, n = int(b.text), int(step.text) if step else 1
+        # the highest page the span actually reaches
+        last = (start + (end - start) // n * n, b) if end >= start else (start, a)
+    if last[0] > total_pages:
+        token = last[1]
+        errors.append(RangeError(
+            token.start, token.end, f"Page {last[0]} is out of range (document has {total_pages} pages)."
+        ))
+    return errors
+
+
+def validate_ranges(expr: str, total_pages: int | None = None, mode: str = "set") -> list[RangeError]:
+    """
+    Checks a range expression without compiling or expanding it.
+
+    The expression is tokenized once and every item is checked, so all
+    problems are reported together, each with the character offsets it
+    covers. Nothing is expanded, so "1-1000000000,x" is as quick to
+    check as "1,x", and knowing the page count is enough to check the
+    expression against a document without opening it; this makes it cheap
+    enough to run on every edit of an input field.
+
+    Args:
+        expr (str): The range expression.
+        total_pages (int | None, optional): Number of pages in the
+            document; when given, pages beyond it are reported the way
+            `pdfctl.ops` would reject them. Defaults to None (syntax only).
+        mode (str, optional): "set" for `compile_ranges`, "split" for
+            `compile_split`, "ordered" for `compile_ordered` (which also
+            allows backward spans and steps). Defaults to "set".
+
+    Returns:
+        list[RangeError]: The problems found, in order; empty if the
+            expression is valid.
+
+    Raises:
+        ValueError: If `mode` is unknown.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode {mode!r}; expected one of {', '.join(MODES)}")
+    items = [tokens for tokens in _tokenize(expr) if tokens]
+    if not items:
+        return [RangeError(0, len(expr), "Empty ranges expression.")]
+    return [error for tokens in items for error in _check_item(tokens, mode, total_pages)]
@@ -0,0 +1,339 @@
+"""
+store.py — Content-addressed store for uploaded PDFs.
+
+Every upload is written once, under the SHA-256 of its bytes, into a
+directory that all web workers share (`PDFCTL_STORE_DIR`). A job then
+only needs the digest: whichever process runs it opens the stored file
+instead of receiving the bytes again, and uploading the same document
+twice costs a hash but no second copy. Files are published with an
+atomic rename, so concurrent writers of the same document are harmless,
+and a lookup refreshes the file's mtime so `prune` removes the least
+recently used uploads first.
+
+Large documents can also be uploaded in pieces (`begin`, `append`,
+`finish`): each piece is appended to a partial file and fed to a running
+SHA-256, so a multi-gigabyte scan is never held in memory, and an upload
+interrupted by a dropped connection resumes from `offset`.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, BinaryIO
+
+from pdfctl.cache import HASH_CHUNK_SIZE, Input, content_hash
+
+DEFAULT_MAX_AGE = 24 * 3600
+PARTIAL_DIR = ".partial"
+
+
+class UploadConflict(ValueError):
+    """Raised when a piece does not start where the partial upload ends."""
+
+    def __init__(self, offset: int) -> None:
+        super().__init__(f"Upload is at offset {offset}")
+        self.offset = offset
+
+
+def default_directory() -> Path:
+    """
+    Returns:
+        Path: `PDFCTL_STORE_DIR`, or `<tmp>/pdfctl-store` when it is unset.
+    """
+    return Path(os.environ.get("PDFCTL_STORE_DIR") or os.path.join(tempfile.gettempdir(), "pdfctl-store"))
+
+
+class UploadStore:
+    """
+    PDFs stored by content hash, shared between processes.
+
+    Files live at `<directory>/<first two hex digits>/<digest>.pdf`.
+
+    Args:
+        directory (str | os.PathLike | None, optional): Store root; created
+            if missing. Defaults to `default_directory()`.
+        max_age (float, optional): Seconds an unused upload is kept by
+            `prune`. Defaults to one day.
+    """
+
+    def __init__(self, directory: str | os.PathLike[str] | None = None, max_age: float = DEFAULT_MAX_AGE) -> None:
+        self.directory = Path(directory) if directory is not None else default_directory()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._upload_locks: dict[str, threading.Lock] = {}
+        # upload id -> (running hash, bytes hashed); rebuilt from disk when missing or stale
+        self._hashes: dict[str, tuple[Any, int]] = {}
+
+    def __contains__(self, digest: str) -> bool:
+        return self.path(digest).is_file()
+
+    def path(self, digest: str) -> Path:
+        """
+        Return where the upload with `digest` is (or would be) stored.
+
+        Raises:
+            ValueError: If `digest` is not a SHA-256 hex digest.
+        """
+        if len(digest) != 64 or not all(c in "0123456789abcdef" for c in digest):
+            raise ValueError(f"Not a SHA-256 digest: {digest!r}")
+        return self.directory / digest[:2] / f"{digest}.pdf"
+
+    def get(self, digest: str) -> Path | None:
+        """
+        Look up a stored upload and mark it as recently used.
+
+        Args:
+            digest (str): The SHA-256 hex digest of the document.
+
+        Returns:
+            Path | None: The stored file, or None if it is not in the store.
+        """
+        path = self.path(digest)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, source: Input) -> str:
+        """
+        Store a document unless an identical one is already stored.
+
+        Bytes, paths and in-memory buffers are hashed first, so a repeated
+        upload is never copied; other streams (files, sockets) are hashed
+        while they are copied, in a single pass.
+
+        Args:
+            source (str | os.PathLike | bytes | BinaryIO): The PDF; buffers
+                with `getbuffer()` are taken whole, other streams are read
+                from their current position to the end.
+
+        Returns:
+            str: The document's SHA-256 hex digest.
+        """
+        if isinstance(source, (bytes, bytearray, memoryview, str, os.PathLike)) or hasattr(source, "getbuffer"):
+            digest = content_hash(source)
+            if self.get(digest) is None:
+                self._write(digest, source)
+            return digest
+
+        tmp = self._tmp_path()
+        h = hashlib.sha256()
+        try:
+            with open(tmp, "wb") as fo:
+                for block in iter(lambda: source.read(HASH_CHUNK_SIZE), b""):
+                    h.update(block)
+                    fo.write(block)
+            digest = h.hexdigest()
+            self._publish(tmp, digest)
+        finally:
+            tmp.unlink(missing_ok=True)
+        return digest
+
+    def prune(self, max_age: float | None = None) -> int:
+        """
+        Delete uploads not used for `max_age` seconds, and unfinished
+        uploads that received nothing for as long.
+
+        Args:
+            max_age (float | None, optional): Defaults to the store's `max_age`.
+
+        Returns:
+            int: The number of files removed.
+        """
+        cutoff = time.time() - (self.max_age if max_age is None else max_age)
+        removed = 0
+        for path in self.directory.glob("*/*.pdf"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    removed += 1
+            except FileNotFoundError:
+                pass  # pruned concurrently by another worker
+        for path in self.directory.glob(f"{PARTIAL_DIR}/*.part"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    self.abort(path.stem)  # abandoned upload
+            except FileNotFoundError:
+                pass
+        return removed
+
+    def stats(self) -> dict[str, int]:
+        """
+        Returns:
+            dict[str, int]: Number of stored uploads and their total size.
+        """
+        sizes = [p.stat().st_size for p in self.directory.glob("*/*.pdf")]
+        return {"entries": len(sizes), "bytes": sum(sizes)}
+
+    # ---- resumable uploads ----
+
+    def begin(self, length: int | None = None) -> str:
+        """
+        Start an upload that arrives in pieces.
+
+        Args:
+            length (int | None, optional): Total size in bytes, if known;
+                the upload then completes itself when it is reached.
+
+        Returns:
+            str: The upload ID.
+        """
+        upload_id = uuid.uuid4().hex
+        partial = self._partial(upload_id)
+        partial.parent.mkdir(exist_ok=True)
+        partial.with_suffix(".json").write_text(json.dumps({"length": length}))
+        partial.touch()
+        return upload_id
+
+    def offset(self, upload_id: str) -> int:
+        """
+        Return how many bytes of an upload have been received.
+
+        Raises:
+            FileNotFoundError: If there is no such upload (or it was finished).
+        """
+        try:
+            return self._partial(upload_id).stat().st_size
+        except FileNotFoundError:
+            raise FileNotFoundError(f"No upload {upload_id!r}") from None
+
+    def length(self, upload_id: str) -> int | None:
+        """Return the declared total size of an upload, or None if it was not declared."""
+        try:
+            return json.loads(self._partial(upload_id).with_suffix(".json").read_text())["length"]
+        except FileNotFoundError:
+            raise FileNotFoundError(f"No upload {upload_id!r}") from None
+
+    def append(self, upload_id: str, offset: int, source: BinaryIO) -> int:
+        """
+        Add the next piece of an upload.
+
+        Args:
+            upload_id (str): From `begin`.
+            offset (int): Where the piece starts; must equal `offset(upload_id)`.
+            source (BinaryIO): The piece, read to the end. If it breaks off,
+                the bytes received so far are kept and the upload can resume
+                from the new offset.
+
+        Returns:
+            int: The new offset.
+
+        Raises:
+            FileNotFoundError: If there is no such upload.
+            UploadConflict: If `offset` is not where the upload ends.
+            ValueError: If the piece goes beyond the declared length.
+        """
+        with self._upload_lock(upload_id):
+            partial = self._partial(upload_id)
+            current = self.offset(upload_id)
+            if offset != current:
+                raise UploadConflict(current)
+            length = self.length(upload_id)
+            h = self._hash(upload_id, current)
+            pos = current
+            with open(partial, "ab") as fo:
+                for block in iter(lambda: source.read(HASH_CHUNK_SIZE), b""):
+                    if length is not None and pos + len(block) > length:
+                        raise ValueError(f"Upload exceeds its declared length of {length} bytes")
+                    fo.write(block)
+                    h.update(block)
+                    pos += len(block)
+                    with self._lock:
+                        self._hashes[upload_id] = (h, pos)
+            return pos
+
+    def finish(self, upload_id: str) -> str:
+        """
+        Complete an upload and add it to the store.
+
+        Returns:
+            str: The document's SHA-256 hex digest.
+
+        Raises:
+            FileNotFoundError: If there is no such upload.
+            ValueError: If fewer bytes than the declared length arrived.
+        """
+        with self._upload_lock(upload_id):
+            partial = self._partial(upload_id)
+            size = self.offset(upload_id)
+            length = self.length(upload_id)
+            if length is not None and size != length:
+                raise ValueError(f"Upload has {size} of {length} bytes")
+            digest = self._hash(upload_id, size).hexdigest()
+            self._publish(partial, digest)
+            self.abort(upload_id)
+        return digest
+
+    def abort(self, upload_id: str) -> None:
+        """Discard an unfinished upload."""
+        partial = self._partial(upload_id)
+        partial.unlink(missing_ok=True)
+        partial.with_suffix(".json").unlink(missing_ok=True)
+        with self._lock:
+            self._hashes.pop(upload_id, None)
+            self._upload_locks.pop(upload_id, None)
+
+    def _partial(self, upload_id: str) -> Path:
+        if len(upload_id) != 32 or not all(c in "0123456789abcdef" for c in upload_id):
+            raise FileNotFoundError(f"No upload {upload_id!r}")
+        return self.directory / PARTIAL_DIR / f"{upload_id}.part"
+
+    def _upload_lock(self, upload_id: str) -> threading.Lock:
+        with self._lock:
+            return self._upload_locks.setdefault(upload_id, threading.Lock())
+
+    def _hash(self, upload_id: str, size: int):
+        """Return the running hash of the first `size` bytes, re-reading them only if it was lost."""
+        with self._lock:
+            cached = self._hashes.get(upload_id)
+        if cached is not None and cached[1] == size:
+            return cached[0]
+        # e.g. after a restart, or a piece that broke off mid-write
+        h = hashlib.sha256()
+        with open(self._partial(upload_id), "rb") as fh:
+            for block in iter(lambda: fh.read(HASH_CHUNK_SIZE), b""):
+                h.update(block)
+        with self._lock:
+            self._hashes[upload_id] = (h, size)
+        return h
+
+    def _tmp_path(self) -> Path:
+        return self.directory / f".{uuid.uuid4().hex}.tmp"
+
+    def _write(self, digest: str, source: Input) -> None:
+        tmp = self._tmp_path()
+        try:
+            if isinstance(source, (str, os.PathLike)):
+                shutil.copyfile(source, tmp)
+            else:
+                with open(tmp, "wb") as fo:
+                    if hasattr(source, "getbuffer"):
+                        with source.getbuffer() as view:
+                            fo.write(view)
+                    else:
+                        fo.write(source)
+            self._publish(tmp, digest)
+        finally:
+            tmp.unlink(missing_ok=True)
+
+    def _publish(self, tmp: Path, digest: str) -> None:
+        """Move a fully written file into place; an identical file may already be there."""
+        path = self.path(digest)
+        path.parent.mkdir(exist_ok=True)
+        try:
+            os.replace(tmp, path)
+        except OSError:
+            # Windows refuses to replace a file that is open; the copy there is identical.
+            if not path.is_file():
+                raise
+
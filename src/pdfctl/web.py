@@ -4,14 +4,103 @@ web.py — Streamlit launcher for PDFCTL
 --------------------------------------
 Launches the main Streamlit application (app.py) that powers the PDFCTL web interface.
 
+With `--workers N` (N > 1) it starts N Streamlit processes on the ports
+after `--port`, bound to localhost, and serves `--port` itself through a
+sticky load balancer (see `pdfctl.proxy`), so sessions are spread over
+N interpreters instead of sharing one GIL. The workers share the upload
+store, result cache and page indexes on disk; a worker that exits is
+restarted.
+
 Usage:
     python web.py --port 8501
+    python web.py --port 8501 --workers 4
 """
 
 import os
 import argparse
+import asyncio
+import contextlib
+import signal
+import subprocess
+import sys
+import tempfile
 from pathlib import Path
 
+# Shared on-disk state, so any worker can serve any stored upload or result.
+SHARED_DIRS = {
+    "PDFCTL_STORE_DIR": "pdfctl-store",
+    "PDFCTL_RESULT_CACHE": "pdfctl-results",
+    "PDFCTL_INDEX_DIR": "pdfctl-index",
+}
+
+RESTART_DELAY = 1.0
+
+
+def worker_command(app_path, port):
+    """
+    Build the command line of one Streamlit worker behind the balancer.
+
+    Args:
+        app_path (Path): The Streamlit script.
+        port (int): Port the worker listens on, on localhost only.
+
+    Returns:
+        list[str]: The command.
+    """
+    return [
+        "streamlit", "run", str(app_path),
+        "--server.port", str(port),
+        "--server.address", "127.0.0.1",
+        "--server.headless", "true",
+    ]
+
+
+async def supervise(app_path, ports, env):
+    """
+    Run one worker per port, restarting any that exits, until cancelled.
+
+    Args:
+        app_path (Path): The Streamlit script.
+        ports (list[int]): One port per worker.
+        env (dict): Environment for the workers.
+    """
+    procs = {port: subprocess.Popen(worker_command(app_path, port), env=env) for port in ports}
+    try:
+        while True:
+            await asyncio.sleep(RESTART_DELAY)
+            for port, proc in procs.items():
+                if proc.poll() is not None:
+                    print(f"[error] Worker on port {port} exited ({proc.returncode}); restarting", file=sys.stderr)
+                    procs[port] = subprocess.Popen(worker_command(app_path, port), env=env)
+    finally:
+        for proc in procs.values():
+            proc.terminate()
+        for proc in procs.values():
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+
+async def serve_workers(app_path, port, workers):
+    """Start the workers and the balancer in front of them."""
+    from pdfctl.proxy import StickyProxy
+
+    env = dict(os.environ)
+    for name, default in SHARED_DIRS.items():
+        env.setdefault(name, os.path.join(tempfile.gettempdir(), default))
+    ports = [port + i for i in range(1, workers + 1)]
+    proxy = StickyProxy([("127.0.0.1", p) for p in ports])
+
+    # Stop the workers on SIGTERM too, not only on Ctrl+C.
+    with contextlib.suppress(NotImplementedError):  # not available on Windows
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+
+    print(f"[info] Starting {workers} Streamlit workers on ports {ports[0]}-{ports[-1]}...")
+    print(f"[info] Upload store: {env['PDFCTL_STORE_DIR']}")
+    print(f"[info] Serving on port {port}")
+    await asyncio.gather(supervise(app_path, ports, env), proxy.serve(None, port))
+
 
 def main():
     """
@@ -19,10 +108,12 @@ def main():
 
     This function locates the `app.py` file in the same directory and launches it
     using Streamlit. It accepts an optional `--port` argument to define the port
-    number on which the server runs.
+    number on which the server runs, and `--workers` to run several server
+    processes behind a load balancer on that port.
 
     Args:
         --port (int, optional): Port to run the Streamlit app on. Defaults to 8501.
+        --workers (int, optional): Number of Streamlit processes. Defaults to 1.
     """
     parser = argparse.ArgumentParser(description="Run the PDFCTL web interface.")
     parser.add_argument(
@@ -31,9 +122,24 @@ def main():
         default=8501,
         help="Port number to run the Streamlit server on (default: 8501)."
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Run this many Streamlit processes behind a sticky load balancer on --port "
+             "(they use the following ports; default: 1)."
+    )
     args = parser.parse_args()
 
     app_path = Path(__file__).with_name("app.py").resolve()
+    if args.workers > 1:
+        print(f"[info] Launching app: {app_path}")
+        try:
+            asyncio.run(serve_workers(app_path, args.port, args.workers))
+        except (KeyboardInterrupt, asyncio.CancelledError):
+            pass
+        return
+
     print(f"[info] Starting Streamlit server on port {args.port}...")
     print(f"[info] Launching app: {app_path}")
 
@@ -0,0 +1,136 @@
+import hashlib
+import http.client
+import json
+import os
+import socket
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from pdfctl.api import APIServer, upload
+from pdfctl.store import UploadStore
+from tests.util import make_pdf
+
+
+class APITest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.executor = ThreadPoolExecutor(2)
+        cls.server = APIServer(("127.0.0.1", 0), cls.executor, UploadStore(cls.tmp.name), cls.tmp.name, 4)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.port = cls.server.server_address[1]
+        cls.pdf = make_pdf(3)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.executor.shutdown()
+        cls.tmp.cleanup()
+
+    def connect(self):
+        conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=10)
+        self.addCleanup(conn.close)
+        return conn
+
+    def request(self, conn, method, path, body=None, headers=None):
+        conn.request(method, path, body=body, headers=headers or {})
+        response = conn.getresponse()
+        return response, response.read()
+
+    def raw(self, data):
+        """Send raw bytes and return everything the server answers until it closes or goes quiet."""
+        with socket.create_connection(("127.0.0.1", self.port), timeout=1) as sock:
+            sock.sendall(data)
+            out = b""
+            try:
+                while chunk := sock.recv(65536):
+                    out += chunk
+            except socket.timeout:
+                pass
+        return out
+
+    def begin_upload(self, length):
+        response, body = self.request(self.connect(), "POST", "/uploads", headers={"Upload-Length": str(length)})
+        self.assertEqual(response.status, 201)
+        return json.loads(body)["upload"]
+
+    def test_keep_alive_after_bodyless_error(self):
+        conn = self.connect()
+        response, _ = self.request(conn, "GET", "/uploads/" + "0" * 32)
+        self.assertEqual(response.status, 404)
+        sock = conn.sock
+        response, body = self.request(conn, "GET", "/health")
+        self.assertEqual(response.status, 200)
+        self.assertIs(conn.sock, sock)
+
+    def test_unread_body_is_not_parsed_as_a_request(self):
+        upload_id = self.begin_upload(10).encode()
+        smuggled = b"GET /health HTTP/1.1\r\nHost: x\r\n\r\n"
+        out = self.raw(
+            b"PATCH /uploads/%s HTTP/1.1\r\nHost: x\r\nUpload-Offset: 5\r\nContent-Length: %d\r\n\r\n"
+            % (upload_id, len(smuggled)) + smuggled
+        )
+        self.assertTrue(out.startswith(b"HTTP/1.1 409"))
+        self.assertIn(b"Connection: close", out)
+        self.assertEqual(out.count(b"HTTP/1.1 "), 1)
+
+    def test_resume_after_conflict_on_the_same_client(self):
+        upload_id = self.begin_upload(10)
+        conn = self.connect()
+        response, body = self.request(conn, "PATCH", f"/uploads/{upload_id}", b"12345", {"Upload-Offset": "3"})
+        self.assertEqual((response.status, json.loads(body)["offset"]), (409, 0))
+        response, body = self.request(conn, "PATCH", f"/uploads/{upload_id}", b"12345", {"Upload-Offset": "0"})
+        self.assertEqual(json.loads(body)["offset"], 5)
+        response, body = self.request(conn, "PATCH", f"/uploads/{upload_id}", b"67890", {"Upload-Offset": "5"})
+        self.assertEqual(json.loads(body)["digest"], hashlib.sha256(b"1234567890").hexdigest())
+
+    def test_upload_client(self):
+        path = os.path.join(self.tmp.name, "in.pdf")
+        with open(path, "wb") as fo:
+            fo.write(self.pdf)
+        digest = upload(path, f"http://127.0.0.1:{self.port}", chunk_size=1000)
+        self.assertEqual(digest, hashlib.sha256(self.pdf).hexdigest())
+        response, body = self.request(
+            self.connect(), "POST", "/extract",
+            json.dumps({"inputs": [digest], "pages": "2"}), {"Content-Type": "application/json"},
+        )
+        self.assertEqual(response.status, 200)
+        self.assertTrue(body.startswith(b"%PDF"))
+
+    def test_file_name_cannot_inject_headers(self):
+        response, _ = self.request(
+            self.connect(), "POST", "/extract?pages=1&name=x%0d%0aSet-Cookie:%20evil=1%0d%0aY:%201.pdf",
+            self.pdf, {"Content-Type": "application/pdf"},
+        )
+        self.assertEqual(response.status, 200)
+        self.assertIsNone(response.getheader("Set-Cookie"))
+        self.assertNotIn("\n", response.getheader("Content-Disposition"))
+
+    def test_non_ascii_file_name(self):
+        name = "تقرير.pdf".encode()
+        body = (
+            b'--B\r\nContent-Disposition: form-data; name="file"; filename="' + name + b'"\r\n'
+            b"Content-Type: application/pdf\r\n\r\n" + self.pdf + b"\r\n--B--\r\n"
+        )
+        response, data = self.request(
+            self.connect(), "POST", "/extract?pages=1", body, {"Content-Type": "multipart/form-data; boundary=B"}
+        )
+        self.assertEqual(response.status, 200)
+        self.assertTrue(data.startswith(b"%PDF"))
+        self.assertIn(
+            "filename*=UTF-8''%D8%AA%D9%82%D8%B1%D9%8A%D8%B1.pdf", response.getheader("Content-Disposition")
+        )
+
+    def test_range_validation(self):
+        response, body = self.request(self.connect(), "GET", "/ranges?expr=1-3,x,20&pages=10")
+        self.assertEqual(response.status, 200)
+        self.assertEqual(
+            [(e["start"], e["end"]) for e in json.loads(body)["errors"]], [(4, 5), (6, 8)]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import io
+import os
+import tempfile
+import unittest
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from pypdf import PdfReader
+
+from pdfctl.batch import run_batch
+from pdfctl.jobs import JobCancelled
+from tests.util import make_text_pdf, page_texts
+
+
+class RunBatchTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.work = os.path.join(self.tmp.name, "work")
+        os.mkdir(self.work)
+        self.inputs = []
+        for name, labels in [("a.pdf", ["A1", "A2", "A3"]), ("b.pdf", ["B1", "B2", "B3"])]:
+            self.inputs.append((name, self.save(name, make_text_pdf(labels))))
+        self.pool = ThreadPoolExecutor(2)
+
+    def tearDown(self):
+        self.pool.shutdown()
+        self.tmp.cleanup()
+
+    def save(self, name, data):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "wb") as fo:
+            fo.write(data)
+        return path
+
+    def run_batch(self, op, pages, inputs=None, **kwargs):
+        buf = io.BytesIO()
+        kwargs.setdefault("executor", self.pool)
+        report = run_batch(op, inputs or self.inputs, pages, buf, work_dir=self.work, **kwargs)
+        self.assertEqual(os.listdir(self.work), [])  # intermediate files are gone
+        with zipfile.ZipFile(buf) as archive:
+            return report, {name: archive.read(name) for name in archive.namelist()}
+
+    def test_split_every_document(self):
+        report, entries = self.run_batch("split", "1,2-")
+        self.assertEqual((report.files, report.entries, report.errors), (2, 4, []))
+        self.assertEqual(list(entries), ["a/part_01.pdf", "a/part_02.pdf", "b/part_01.pdf", "b/part_02.pdf"])
+        self.assertEqual(page_texts(entries["b/part_02.pdf"]), ["B2", "B3"])
+
+    def test_extract_keeps_the_written_order(self):
+        _, entries = self.run_batch("extract", "3,1")
+        self.assertEqual({name: page_texts(data) for name, data in entries.items()},
+                         {"a.pdf": ["A3", "A1"], "b.pdf": ["B3", "B1"]})
+
+    def test_rotate_incrementally_or_by_rewriting(self):
+        with open(self.inputs[0][1], "rb") as fh:
+            original = fh.read()
+        for incremental in (True, False):
+            with self.subTest(incremental=incremental):
+                _, entries = self.run_batch("rotate", "2", angle=90, incremental=incremental)
+                out = entries["a.pdf"]
+                self.assertEqual(out.startswith(original), incremental)
+                self.assertEqual([p.rotation for p in PdfReader(io.BytesIO(out)).pages], [0, 90, 0])
+
+    def test_failures_are_reported_per_document(self):
+        inputs = [self.inputs[0], ("bad.pdf", self.save("bad.pdf", b"not a pdf")), self.inputs[1]]
+        calls = []
+        with self.assertLogs("pypdf", "WARNING"):
+            report, entries = self.run_batch("extract", "1", inputs, progress=lambda *args: calls.append(args))
+        self.assertEqual(list(entries), ["a.pdf", "b.pdf"])
+        self.assertEqual(report.files, 2)
+        self.assertEqual([name for name, _ in report.errors], ["bad.pdf"])
+        self.assertEqual(calls, [(1, 3), (2, 3), (3, 3)])
+
+    def test_pages_past_the_end_fail_that_document(self):
+        inputs = [self.inputs[0], ("short.pdf", self.save("short.pdf", make_text_pdf(["S1"])))]
+        report, entries = self.run_batch("extract", "2", inputs)
+        self.assertEqual(list(entries), ["a.pdf"])
+        self.assertIn("out of range", report.errors[0][1])
+
+    def test_progress_can_cancel_the_rest(self):
+        def cancel(done, total):
+            raise JobCancelled("batch")
+
+        with self.assertRaises(JobCancelled):
+            run_batch("extract", self.inputs, "1", io.BytesIO(), executor=self.pool, work_dir=self.work,
+                      progress=cancel)
+        self.assertEqual(os.listdir(self.work), [])
+
+    def test_rejects_bad_arguments(self):
+        with self.assertRaises(ValueError):
+            run_batch("merge", self.inputs, "1", io.BytesIO())
+        with self.assertRaises(ValueError):
+            run_batch("rotate", self.inputs, "1", io.BytesIO())
+
+    def test_private_process_pool(self):
+        report, entries = self.run_batch("extract", "2", executor=None, workers=2)
+        self.assertEqual(report.files, 2)
+        self.assertEqual(page_texts(entries["b.pdf"]), ["B2"])
+
+
+if __name__ == "__main__":
+    unittest.main()
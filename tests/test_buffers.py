@@ -0,0 +1,52 @@
+import io
+import os
+import tempfile
+import unittest
+
+from pdfctl import ops
+from pdfctl.buffers import SpooledBuffer
+from tests.util import make_text_pdf, page_texts
+
+
+class SpooledBufferTest(unittest.TestCase):
+    def test_stays_in_memory_below_the_threshold(self):
+        buf = SpooledBuffer(threshold=100)
+        buf.write(b"x" * 100)
+        self.assertFalse(buf.rolled)
+        self.assertEqual(bytes(buf.getbuffer()), b"x" * 100)
+        with self.assertRaises(io.UnsupportedOperation):
+            buf.fileno()
+
+    def test_spills_to_disk_keeping_contents_and_position(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            buf = SpooledBuffer(threshold=10, directory=tmp)
+            buf.write(b"0123456789")
+            buf.write(b"abcdef")
+            self.assertTrue(buf.rolled)
+            self.assertEqual((buf.tell(), buf.size()), (16, 16))
+            buf.write(b"!")
+            buf.seek(0)
+            self.assertEqual(buf.read(), b"0123456789abcdef!")
+            self.assertIsInstance(buf.fileno(), int)
+            with self.assertRaises(ValueError):
+                buf.getbuffer()
+            buf.close()
+            self.assertEqual(os.listdir(tmp), [])  # anonymous spill file
+
+    def test_works_as_a_buffered_stream(self):
+        buf = SpooledBuffer(threshold=4)
+        with io.BufferedReader(buf) as reader:
+            buf.write(b"hello world")
+            buf.seek(0)
+            self.assertEqual(reader.read(5), b"hello")
+
+    def test_to_buffer_is_rewound(self):
+        writer = ops.extract(io.BytesIO(make_text_pdf(["A", "B"])), "2")
+        buf = ops.to_buffer(writer, threshold=64)
+        self.assertEqual(buf.tell(), 0)
+        self.assertTrue(buf.rolled)
+        self.assertEqual(page_texts(buf), ["B"])
+
+
+if __name__ == "__main__":
+    unittest.main()
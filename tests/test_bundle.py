@@ -0,0 +1,70 @@
+import io
+import os
+import tempfile
+import unittest
+import zipfile
+
+from pdfctl.bundle import ZipBundle
+
+
+class Unseekable(io.RawIOBase):
+    """A write-only stream that, like a socket, cannot seek or tell."""
+
+    def __init__(self):
+        super().__init__()
+        self.data = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self.data += b
+        return len(b)
+
+
+class ZipBundleTest(unittest.TestCase):
+    def test_entries_from_bytes_paths_and_streams(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "b.pdf")
+            with open(path, "wb") as fo:
+                fo.write(b"from a path")
+            stream = io.BytesIO(b"skipped|from a stream")
+            stream.seek(8)
+
+            buf = io.BytesIO()
+            with ZipBundle(buf) as bundle:
+                bundle.add("a.pdf", b"from bytes")
+                bundle.add("dir/b.pdf", path)
+                bundle.add("c.pdf", stream)
+            self.assertEqual(bundle.count, 3)
+            self.assertFalse(buf.closed)
+
+        with zipfile.ZipFile(buf) as archive:
+            self.assertEqual(archive.namelist(), ["a.pdf", "dir/b.pdf", "c.pdf"])
+            self.assertEqual(archive.read("dir/b.pdf"), b"from a path")
+            self.assertEqual(archive.read("c.pdf"), b"from a stream")
+            self.assertEqual({info.compress_type for info in archive.infolist()}, {zipfile.ZIP_STORED})
+
+    def test_repeated_names_get_a_suffix(self):
+        buf = io.BytesIO()
+        with ZipBundle(buf) as bundle:
+            names = [bundle.add(name, name.encode()) for name in ("a.pdf", "a.pdf", "a (2).pdf", "a.pdf")]
+        self.assertEqual(names, ["a.pdf", "a (2).pdf", "a (2) (2).pdf", "a (3).pdf"])
+        with zipfile.ZipFile(buf) as archive:
+            self.assertEqual(archive.namelist(), names)
+            self.assertEqual(archive.read("a (2) (2).pdf"), b"a (2).pdf")
+
+    def test_unseekable_destination(self):
+        dest = Unseekable()
+        data = os.urandom(300_000)
+        with ZipBundle(dest) as bundle:
+            bundle.add("part_01.pdf", io.BytesIO(data))
+            bundle.add("part_02.pdf", b"second")
+        with zipfile.ZipFile(io.BytesIO(bytes(dest.data))) as archive:
+            self.assertIsNone(archive.testzip())
+            self.assertEqual(archive.read("part_01.pdf"), data)
+            self.assertEqual(archive.read("part_02.pdf"), b"second")
+
+
+if __name__ == "__main__":
+    unittest.main()
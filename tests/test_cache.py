@@ -0,0 +1,27 @@
+import os
+import tempfile
+import time
+import unittest
+
+from pdfctl.cache import ResultCache
+
+
+class SharedResultCacheTest(unittest.TestCase):
+    def test_processes_share_entries_and_budget(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            a, b = ResultCache(tmp, max_bytes=250), ResultCache(tmp, max_bytes=250)
+            a.put("k1", [b"x" * 100])
+            self.assertIsNotNone(b.get("k1"))  # stored by the other instance
+
+            time.sleep(0.02)
+            b.put("k2", [b"y" * 100])
+            time.sleep(0.02)
+            a.get("k1")  # now k2 is the least recently used
+            time.sleep(0.02)
+            b.put("k3", [b"z" * 100])
+            self.assertEqual(sorted(os.listdir(tmp)), ["k1", "k3"])
+            self.assertIsNone(a.get("k2"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,35 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from pdfctl.cli import run_jobs
+from tests.util import make_pdf
+
+
+class RunJobsTest(unittest.TestCase):
+    def test_malformed_lines_fail_alone(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            src = os.path.join(tmp, "in.pdf")
+            with open(src, "wb") as fo:
+                fo.write(make_pdf(2))
+            out = os.path.join(tmp, "out.pdf")
+            jobs = os.path.join(tmp, "jobs.jsonl")
+            with open(jobs, "w", encoding="utf-8") as fo:
+                fo.write("[1, 2]\n")
+                fo.write('{"op": "extract", "input": "in.pdf", "pages": 5, "output": "x.pdf"}\n')
+                fo.write('{"op": "extract", "input": \n')
+                fo.write(json.dumps({"op": "extract", "input": src, "pages": "2", "output": out}) + "\n")
+
+            err = io.StringIO()
+            with contextlib.redirect_stderr(err), contextlib.redirect_stdout(io.StringIO()):
+                failed = run_jobs(jobs, keep_going=True)
+            self.assertEqual(failed, 3)
+            self.assertTrue(os.path.exists(out))
+            self.assertIn("Invalid JSON", err.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import io
+import unittest
+
+from pypdf import PdfReader, PdfWriter
+from pypdf.generic import ArrayObject, DictionaryObject, NameObject, NumberObject
+
+from pdfctl.incremental import last_startxref, rotation_update
+from pdfctl.ranges import compile_ranges
+from tests.util import make_pdf, make_text_pdf, make_xref_stream_pdf, page_texts
+
+
+def make_nested_pdf() -> bytes:
+    """Return pages A, B, C under root /Kids [Pages(A, B), C, Pages()], so /Count 3 equals len(/Kids)."""
+    writer = PdfWriter(clone_from=io.BytesIO(make_text_pdf(["A", "B", "C"])))
+    root = writer._root_object["/Pages"]
+    a, b, c = root["/Kids"]
+
+    def node(kids):
+        ref = writer._add_object(DictionaryObject({
+            NameObject("/Type"): NameObject("/Pages"),
+            NameObject("/Kids"): ArrayObject(kids),
+            NameObject("/Count"): NumberObject(len(kids)),
+            NameObject("/Parent"): root.indirect_reference,
+        }))
+        for kid in kids:
+            kid.get_object()[NameObject("/Parent")] = ref
+        return ref
+
+    root[NameObject("/Kids")] = ArrayObject([node([a, b]), c, node([])])
+    buf = io.BytesIO()
+    writer.write(buf)
+    return buf.getvalue()
+
+
+class RotationUpdateTest(unittest.TestCase):
+    def rotate(self, data, pages, angle):
+        update, count = rotation_update(PdfReader(io.BytesIO(data)), data, compile_ranges(pages), angle)
+        return data + update, count
+
+    def check(self, data, xref_stream):
+        prev = last_startxref(data)
+        self.assertEqual(data[prev:prev + 4] != b"xref", xref_stream)
+
+        out, count = self.rotate(data, "1,3", 90)
+        self.assertEqual(count, 2)
+        self.assertTrue(out.startswith(data))  # appended, not rewritten
+        reader = PdfReader(io.BytesIO(out), strict=True)
+        self.assertEqual([p.rotation for p in reader.pages], [90, 0, 90])
+        new = last_startxref(out)
+        self.assertEqual(out[new:new + 4] != b"xref", xref_stream)
+
+        # A second update chains onto the first.
+        out, _ = self.rotate(out, "1-2", 180)
+        self.assertEqual([p.rotation for p in PdfReader(io.BytesIO(out), strict=True).pages], [270, 180, 90])
+
+    def test_xref_table(self):
+        self.check(make_pdf(3), xref_stream=False)
+
+    def test_xref_stream(self):
+        self.check(make_xref_stream_pdf(3), xref_stream=True)
+
+    def test_nested_and_empty_page_tree_nodes(self):
+        data = make_nested_pdf()
+        self.assertEqual(page_texts(data), ["A", "B", "C"])
+        for pages, rotations in [("2", [0, 90, 0]), ("3", [0, 0, 90]), ("1-3", [90, 90, 90])]:
+            with self.subTest(pages=pages):
+                out, count = self.rotate(data, pages, 90)
+                self.assertEqual(count, rotations.count(90))
+                self.assertEqual([p.rotation for p in PdfReader(io.BytesIO(out), strict=True).pages], rotations)
+
+    def test_rejects_odd_angles(self):
+        data = make_pdf(1)
+        with self.assertRaises(ValueError):
+            self.rotate(data, "1", 45)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from pypdf import PdfReader, PdfWriter
+from pypdf.generic import ArrayObject, NameObject, NumberObject
+
+from pdfctl.incremental import last_startxref, rotation_update
+from pdfctl.index import DocumentIndex, PageInfo, build_index, index_file, sidecar_path
+from pdfctl.ranges import compile_ranges
+from tests.util import make_pdf, make_text_pdf, make_xref_stream_pdf
+
+
+def make_inheriting_pdf() -> bytes:
+    """Return three pages inheriting /MediaBox and /Rotate from the root, the last overriding /Rotate."""
+    writer = PdfWriter(clone_from=io.BytesIO(make_text_pdf(["A", "B", "C"])))
+    for page in writer.pages:
+        del page[NameObject("/MediaBox")]
+    writer.pages[2][NameObject("/Rotate")] = NumberObject(-90)
+    root = writer._root_object["/Pages"]
+    root[NameObject("/MediaBox")] = ArrayObject([NumberObject(n) for n in (0, 0, 300, 500)])
+    root[NameObject("/Rotate")] = NumberObject(90)
+    buf = io.BytesIO()
+    writer.write(buf)
+    return buf.getvalue()
+
+
+class BuildIndexTest(unittest.TestCase):
+    def test_records_pages_as_pypdf_sees_them(self):
+        for data in (make_pdf(4), make_xref_stream_pdf(4), make_inheriting_pdf()):
+            reader = PdfReader(io.BytesIO(data))
+            index = build_index(io.BytesIO(data), digest="abc")
+            with self.subTest(pages=len(reader.pages)):
+                self.assertEqual(index.page_count, len(reader.pages))
+                self.assertEqual(index.objects, [p.indirect_reference.idnum for p in reader.pages])
+                self.assertEqual(index.offsets, [reader.xref[0][num] for num in index.objects])
+                self.assertEqual(index.rotations, [p.rotation % 360 for p in reader.pages])
+                self.assertEqual(index.widths, [float(p.mediabox.width) for p in reader.pages])
+                self.assertEqual(index.heights, [float(p.mediabox.height) for p in reader.pages])
+                self.assertEqual((index.size, index.startxref, index.digest),
+                                 (len(data), last_startxref(data), "abc"))
+
+    def test_xref_kind_and_inherited_attributes(self):
+        self.assertFalse(build_index(make_pdf(1)).xref_stream)
+        self.assertTrue(build_index(make_xref_stream_pdf(1)).xref_stream)
+        index = build_index(make_inheriting_pdf())
+        self.assertEqual(index.rotations, [90, 90, 270])
+        self.assertEqual((index.widths, index.heights), ([300.0] * 3, [500.0] * 3))
+
+    def test_page_lookup(self):
+        index = build_index(make_pdf(2))
+        info = index.page(1)
+        self.assertIsInstance(info, PageInfo)
+        self.assertEqual((info.number, info.object, info.width, info.rotation), (1, index.objects[1], 100.0, 0))
+        with self.assertRaisesRegex(IndexError, "Page 3 is out of range"):
+            index.page(2)
+
+
+class PersistenceTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "doc.pdf")
+        with open(self.path, "wb") as fo:
+            fo.write(make_pdf(3))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_save_and_load(self):
+        index = build_index(self.path, digest="abc")
+        target = os.path.join(self.tmp.name, "index.json")
+        index.save(target)
+        self.assertEqual(DocumentIndex.load(target), index)
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), ["doc.pdf", "index.json"])  # no temp file left
+
+    def test_rejects_other_versions(self):
+        data = build_index(self.path).to_dict()
+        data["version"] += 1
+        with self.assertRaises(ValueError):
+            DocumentIndex.from_dict(data)
+
+    def test_sidecar_is_reused_while_the_file_is_unchanged(self):
+        index = index_file(self.path)
+        sidecar = sidecar_path(self.path)
+        self.assertEqual(DocumentIndex.load(sidecar), index)
+
+        # A planted marker shows the sidecar is read instead of the document.
+        data = json.loads(sidecar.read_text(encoding="utf-8"))
+        data["digest"] = "from-sidecar"
+        sidecar.write_text(json.dumps(data), encoding="utf-8")
+        self.assertEqual(index_file(self.path).digest, "from-sidecar")
+
+    def test_incremental_update_triggers_a_rebuild(self):
+        index_file(self.path)
+        with open(self.path, "rb") as fh:
+            data = fh.read()
+        update, _ = rotation_update(PdfReader(io.BytesIO(data)), data, compile_ranges("2"), 90)
+        with open(self.path, "ab") as fo:
+            fo.write(update)
+        self.assertEqual(index_file(self.path).rotations, [0, 90, 0])
+        self.assertEqual(DocumentIndex.load(sidecar_path(self.path)).rotations, [0, 90, 0])
+
+    def test_broken_sidecar_is_rebuilt(self):
+        sidecar_path(self.path).write_text("{not json", encoding="utf-8")
+        self.assertEqual(index_file(self.path, persist=False).page_count, 3)
+        self.assertEqual(sidecar_path(self.path).read_text(encoding="utf-8"), "{not json")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import threading
+import time
+import unittest
+
+from pdfctl.jobs import CANCELLED, DONE, FAILED, JobCancelled, JobQueue
+
+
+def count_to(total, progress=None, gate=None):
+    for done in range(1, total + 1):
+        if gate is not None:
+            gate.wait(5)
+        progress(done, total)
+    return total
+
+
+def fail(progress=None):
+    raise ValueError("bad input")
+
+
+class JobQueueTest(unittest.TestCase):
+    def setUp(self):
+        self.queue = JobQueue(max_workers=1)
+
+    def tearDown(self):
+        self.queue.shutdown()
+
+    def test_result_and_progress(self):
+        job_id = self.queue.submit("Count", count_to, 3)
+        self.queue._jobs[job_id]._future.result(5)
+        job = self.queue.get(job_id)
+        self.assertEqual((job.state, job.done, job.total, job.progress), (DONE, 3, 3, 1.0))
+        self.assertEqual(self.queue.result(job_id), 3)
+
+    def test_failure_is_reported(self):
+        job_id = self.queue.submit("Fail", fail)
+        with self.assertRaisesRegex(RuntimeError, "ValueError: bad input"):
+            self.queue.result(job_id, timeout=5)
+
+    def test_cancel_running_and_queued_jobs(self):
+        gate = threading.Event()
+        running = self.queue.submit("Running", count_to, 3, gate=gate)
+        queued = self.queue.submit("Queued", count_to, 3)
+        self.assertTrue(self.queue.cancel(queued))
+        self.assertTrue(self.queue.cancel(running))
+        gate.set()
+        for job_id in (running, queued):
+            with self.assertRaises(JobCancelled):
+                self.queue.result(job_id, timeout=5)
+        self.assertFalse(self.queue.cancel("unknown"))
+
+    def test_collected_results_are_dropped(self):
+        job_id = self.queue.submit("Count", count_to, 1)
+        self.queue.result(job_id, timeout=5)
+        self.assertIsNone(self.queue.get(job_id))
+
+    def test_finished_jobs_expire(self):
+        self.queue.ttl = 0.05
+        job_id = self.queue.submit("Count", count_to, 1)
+        self.queue._jobs[job_id]._future.result(5)
+        self.assertEqual(self.queue.get(job_id).state, DONE)
+        time.sleep(0.1)
+        self.assertIsNone(self.queue.get(job_id))
+
+    def test_only_the_newest_finished_jobs_are_kept(self):
+        self.queue.max_finished = 2
+        start, gate = threading.Event(), threading.Event()
+        ids = [self.queue.submit(str(i), count_to, 1, gate=start) for i in range(4)]
+        futures = [self.queue.get(job_id)._future for job_id in ids]
+        running = self.queue.submit("Running", count_to, 1, gate=gate)
+        start.set()
+        for future in futures:
+            future.result(5)
+        self.assertEqual([job.id for job in self.queue.jobs()], ids[2:] + [running])
+        gate.set()
+
+    def test_cancelled_and_failed_jobs_count_towards_the_limit(self):
+        self.queue.max_finished = 1
+        failed = self.queue.submit("Fail", fail)
+        self.queue._jobs[failed]._future.result(5)
+        self.assertEqual(self.queue.get(failed).state, FAILED)
+        gate = threading.Event()
+        self.queue.submit("Running", count_to, 1, gate=gate)
+        queued = self.queue.submit("Queued", count_to, 1)
+        self.queue.cancel(queued)
+        self.assertEqual(self.queue.get(queued).state, CANCELLED)
+        self.assertIsNone(self.queue.get(failed))
+        gate.set()
+
+
+if __name__ == "__main__":
+    unittest.main()
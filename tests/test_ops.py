@@ -0,0 +1,251 @@
+import io
+import os
+import tempfile
+import unittest
+
+from pypdf import PdfReader, PdfWriter
+from pypdf.generic import ArrayObject, DecodedStreamObject, DictionaryObject, NameObject, NumberObject
+
+from pdfctl import ops
+from pdfctl.incremental import last_startxref
+from tests.util import make_text_pdf, page_texts, text_page, with_xref_stream
+
+LABELS = [f"Page{i}" for i in range(1, 8)]
+
+
+def serialize(writer):
+    buf = io.BytesIO()
+    writer.write(buf)
+    return buf.getvalue()
+
+
+def make_embedded_font_pdf(labels):
+    """Return a document whose shared font points at a descriptor and an embedded font file."""
+    writer = PdfWriter()
+    font_file = DecodedStreamObject()
+    font_file.set_data(b"not really a font program " * 50)
+    descriptor = writer._add_object(DictionaryObject({
+        NameObject("/Type"): NameObject("/FontDescriptor"),
+        NameObject("/FontName"): NameObject("/Embedded"),
+        NameObject("/FontFile2"): writer._add_object(font_file),
+    }))
+    font = writer._add_object(DictionaryObject({
+        NameObject("/Type"): NameObject("/Font"),
+        NameObject("/Subtype"): NameObject("/TrueType"),
+        NameObject("/BaseFont"): NameObject("/Embedded"),
+        NameObject("/FontDescriptor"): descriptor,
+    }))
+    for label in labels:
+        text_page(writer, label, font)
+    return serialize(writer)
+
+
+def make_linked_pdf(labels):
+    """Return pages sharing one font, the first with a link to the second and inherited /Rotate and /MediaBox."""
+    writer = PdfWriter()
+    font = None
+    for label in labels:
+        page = text_page(writer, label, font)
+        font = page["/Resources"]["/Font"].raw_get("/F1")
+        del page[NameObject("/MediaBox")]
+    first, second = writer.pages[0], writer.pages[1]
+    link = DictionaryObject({
+        NameObject("/Type"): NameObject("/Annot"),
+        NameObject("/Subtype"): NameObject("/Link"),
+        NameObject("/Rect"): ArrayObject([NumberObject(n) for n in (0, 0, 50, 50)]),
+        NameObject("/P"): first.indirect_reference,
+        NameObject("/Dest"): ArrayObject([second.indirect_reference, NameObject("/Fit")]),
+    })
+    first[NameObject("/Annots")] = ArrayObject([writer._add_object(link)])
+    root = writer._root_object["/Pages"]
+    root[NameObject("/Rotate")] = NumberObject(90)
+    root[NameObject("/MediaBox")] = ArrayObject([NumberObject(n) for n in (0, 0, 300, 400)])
+    return serialize(writer)
+
+
+class OpsTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.pdf = make_text_pdf(LABELS)
+
+    def test_split_parts_follow_chunk_order(self):
+        parts = ops.split(io.BytesIO(self.pdf), "1-3,6-,2-2")
+        self.assertEqual([page_texts(serialize(w)) for w in parts], [
+            ["Page1", "Page2", "Page3"], ["Page6", "Page7"], ["Page2"],
+        ])
+
+    def test_iter_split_matches_split(self):
+        expected = [page_texts(serialize(w)) for w in ops.split(io.BytesIO(self.pdf), "1,2-4,5-")]
+        produced = [page_texts(serialize(w)) for w in ops.iter_split(io.BytesIO(self.pdf), "1,2-4,5-")]
+        self.assertEqual(produced, expected)
+
+    def test_split_rejects_pages_past_the_end(self):
+        with self.assertRaisesRegex(ValueError, "Page 9 is out of range"):
+            ops.split(io.BytesIO(self.pdf), "1-3,4-9")
+
+    def test_extract_keeps_the_written_order(self):
+        writer = ops.extract(io.BytesIO(self.pdf), "5,1-2,1,7-6")
+        self.assertEqual(page_texts(serialize(writer)), ["Page5", "Page1", "Page2", "Page1", "Page7", "Page6"])
+        writer = ops.extract(io.BytesIO(self.pdf), "5,1-2,1", ordered=False)
+        self.assertEqual(page_texts(serialize(writer)), ["Page1", "Page2", "Page5"])
+
+    def test_rotate_only_the_selected_pages(self):
+        out = serialize(ops.rotate(io.BytesIO(self.pdf), "2-3,7", 90))
+        reader = PdfReader(io.BytesIO(out))
+        self.assertEqual([p.rotation for p in reader.pages], [0, 90, 90, 0, 0, 0, 90])
+        self.assertEqual(page_texts(out), LABELS)
+        self.assertEqual([p.rotation for p in PdfReader(io.BytesIO(self.pdf)).pages], [0] * 7)
+
+    def test_progress_is_reported_per_page(self):
+        calls = []
+        ops.extract(io.BytesIO(self.pdf), "1-3", progress=lambda done, total: calls.append((done, total)))
+        self.assertEqual(calls, [(1, 3), (2, 3), (3, 3)])
+
+    def test_file_path_sources(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "in.pdf")
+            with open(path, "wb") as fo:
+                fo.write(self.pdf)
+            out = os.path.join(tmp, "out.pdf")
+            ops.write(ops.extract(path, "7"), out)
+            with open(out, "rb") as fh:
+                self.assertEqual(page_texts(fh.read()), ["Page7"])
+
+
+class DedupeTest(unittest.TestCase):
+    def merged(self, *docs):
+        return ops.merge([io.BytesIO(doc) for doc in docs])
+
+    def fonts(self, writer):
+        return {page["/Resources"]["/Font"].raw_get("/F1").idnum for page in writer.pages}
+
+    def test_identical_resources_are_stored_once(self):
+        doc = make_embedded_font_pdf(["Same", "Same"])
+        writer = self.merged(doc, doc)
+        self.assertEqual(len(self.fonts(writer)), 2)
+
+        report = ops.dedupe(writer)
+        self.assertEqual(len(self.fonts(writer)), 1)
+        self.assertGreater(report.objects_removed, 0)
+        self.assertGreater(report.bytes_saved, 50 * 26)  # at least the second font file
+        self.assertEqual(report.objects_before - report.objects_removed,
+                         sum(obj is not None for obj in writer._objects))
+
+        out = serialize(writer)
+        self.assertEqual(page_texts(out), ["Same"] * 4)
+        self.assertLess(len(out), len(serialize(self.merged(doc, doc))))
+
+    def test_fonts_collapse_after_their_font_files(self):
+        doc = make_embedded_font_pdf(["Same"])
+        writer = self.merged(doc, doc)
+        ops.dedupe(writer, max_passes=1)
+        self.assertEqual(len(self.fonts(writer)), 2)  # only the font files matched so far
+        ops.dedupe(writer)
+        self.assertEqual(len(self.fonts(writer)), 1)
+
+    def test_equal_pages_stay_distinct(self):
+        doc = make_text_pdf(["Same"])
+        writer = self.merged(doc, doc)
+        ops.dedupe(writer)
+        refs = [page.indirect_reference.idnum for page in writer.pages]
+        self.assertEqual(len(set(refs)), 2)
+        self.assertFalse(any("/PdfctlDedupe" in page for page in writer.pages))
+        self.assertEqual(len(PdfReader(io.BytesIO(serialize(writer))).pages), 2)
+
+    def test_distinct_resources_are_kept(self):
+        writer = self.merged(make_text_pdf(["A"]), make_embedded_font_pdf(["B"]))
+        ops.dedupe(writer)
+        self.assertEqual(len(self.fonts(writer)), 2)
+        self.assertEqual(page_texts(serialize(writer)), ["A", "B"])
+
+    def test_second_pass_finds_nothing(self):
+        doc = make_embedded_font_pdf(["A", "B"])
+        writer = self.merged(doc, doc)
+        ops.dedupe(writer)
+        report = ops.dedupe(writer)
+        self.assertEqual((report.objects_removed, report.bytes_saved), (0, 0))
+
+
+class MergeStreamingTest(unittest.TestCase):
+    def merge(self, *docs, progress=None):
+        out = io.BytesIO()
+        count = ops.merge_streaming([io.BytesIO(doc) for doc in docs], out, progress)
+        reader = PdfReader(io.BytesIO(out.getvalue()), strict=True)
+        self.assertEqual(len(reader.pages), count)
+        return reader
+
+    def test_pages_in_input_order(self):
+        calls = []
+        reader = self.merge(
+            make_text_pdf(["A1", "A2"]), make_text_pdf(["B1"]), make_text_pdf(["C1", "C2", "C3"]),
+            progress=lambda done, total: calls.append((done, total)),
+        )
+        self.assertEqual(page_texts(reader.stream), ["A1", "A2", "B1", "C1", "C2", "C3"])
+        self.assertEqual(calls[-1], (6, 6))
+        self.assertEqual([done for done, _ in calls], list(range(1, 7)))
+
+    def test_xref_table_and_xref_stream_inputs(self):
+        table = make_text_pdf(["T1", "T2"])
+        stream = with_xref_stream(make_text_pdf(["S1", "S2"]))
+        self.assertEqual(table[last_startxref(table):][:4], b"xref")
+        self.assertNotEqual(stream[last_startxref(stream):][:4], b"xref")
+        reader = self.merge(stream, table, stream)
+        self.assertEqual(page_texts(reader.stream), ["S1", "S2", "T1", "T2", "S1", "S2"])
+
+    def test_shared_resources_stay_shared(self):
+        doc = make_linked_pdf(["A", "B", "C"])
+        reader = self.merge(doc, doc)
+        fonts = [page["/Resources"]["/Font"].raw_get("/F1").idnum for page in reader.pages]
+        self.assertEqual(len(set(fonts[:3])), 1)
+        self.assertEqual(len(set(fonts[3:])), 1)
+        self.assertNotEqual(fonts[0], fonts[3])
+
+    def test_link_annotations_point_at_the_merged_pages(self):
+        doc = make_linked_pdf(["A", "B"])
+        reader = self.merge(doc, doc)
+        refs = [page.indirect_reference.idnum for page in reader.pages]
+        for first in (0, 2):
+            link = reader.pages[first]["/Annots"][0].get_object()
+            self.assertEqual(link.raw_get("/P").idnum, refs[first])
+            self.assertEqual(link["/Dest"][0].idnum, refs[first + 1])
+
+    def test_inherited_rotate_and_mediabox(self):
+        reader = self.merge(make_linked_pdf(["A", "B"]), make_text_pdf(["C"]))
+        self.assertEqual([page.rotation for page in reader.pages], [90, 90, 0])
+        self.assertEqual([list(page.mediabox) for page in reader.pages], [[0, 0, 300, 400]] * 2 + [[0, 0, 200, 200]])
+
+    def test_path_destination(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            out = os.path.join(tmp, "merged.pdf")
+            sources = (io.BytesIO(make_text_pdf([label])) for label in ("A", "B"))
+            self.assertEqual(ops.merge_streaming(sources, out), 2)
+            with open(out, "rb") as fh:
+                self.assertEqual(page_texts(fh.read()), ["A", "B"])
+
+
+class SplitParallelTest(unittest.TestCase):
+    def split(self, workers):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "in.pdf")
+            with open(path, "wb") as fo:
+                fo.write(make_text_pdf(LABELS))
+            parts = ops.split_parallel(path, "1-2,3,4-", os.path.join(tmp, "out"), prefix="p", workers=workers)
+            self.assertEqual([p.name for p in parts], ["p_01.pdf", "p_02.pdf", "p_03.pdf"])
+            texts = []
+            for part in parts:
+                with open(part, "rb") as fh:
+                    texts.append(page_texts(fh.read()))
+            return texts
+
+    def test_parts_in_chunk_order(self):
+        expected = [["Page1", "Page2"], ["Page3"], ["Page4", "Page5", "Page6", "Page7"]]
+        self.assertEqual(self.split(workers=2), expected)
+        self.assertEqual(self.split(workers=1), expected)
+
+    def test_in_process_split_releases_the_reader(self):
+        self.split(workers=1)
+        self.assertIsNone(ops._worker_reader)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+import importlib.util
+import io
+import random
+import unittest
+import zlib
+
+from pypdf import PdfReader, PdfWriter
+from pypdf.generic import DecodedStreamObject, DictionaryObject, NameObject, NumberObject, StreamObject
+
+from pdfctl.optimize import optimize, remove_unreachable
+from tests.util import make_text_pdf, page_texts, text_page
+
+HAS_PILLOW = importlib.util.find_spec("PIL") is not None
+
+
+def serialize(writer):
+    buf = io.BytesIO()
+    writer.write(buf)
+    return buf.getvalue()
+
+
+def content(writer, index=0):
+    return writer.pages[index]["/Contents"].get_object()
+
+
+class OptimizeTest(unittest.TestCase):
+    def test_unfiltered_streams_are_compressed(self):
+        writer = PdfWriter()
+        page = text_page(writer, "Long")
+        content(writer).set_data(b"BT /F1 12 Tf 20 100 Td (Long) Tj ET\n" + b"q 1 0 0 1 0 0 cm Q\n" * 200)
+        before = len(serialize(writer))
+
+        report = optimize(writer, workers=1)
+        self.assertEqual(report.streams_recompressed, 1)
+        self.assertEqual(page["/Contents"].get_object()["/Filter"], "/FlateDecode")
+        out = serialize(writer)
+        self.assertLess(len(out), before)
+        self.assertGreater(report.bytes_saved, 0)
+        self.assertEqual(page_texts(out), ["Long"])
+
+    def test_streams_that_would_grow_are_kept(self):
+        writer = PdfWriter()
+        text_page(writer, "A")
+        content(writer).set_data(b"q Q")
+        report = optimize(writer)
+        self.assertEqual((report.streams_recompressed, report.bytes_saved), (0, 0))
+        self.assertNotIn("/Filter", content(writer))
+        self.assertEqual(content(writer).get_data(), b"q Q")
+
+    def test_flate_streams_are_only_replaced_when_smaller(self):
+        data = b"0 0 m 100 100 l S\n" * 500
+        writer = PdfWriter()
+        for level, parms in [(1, False), (9, False), (1, True)]:
+            page = writer.add_blank_page(100, 100)
+            stream = StreamObject()
+            stream._data = zlib.compress(data, level)
+            stream[NameObject("/Filter")] = NameObject("/FlateDecode")
+            if parms:
+                stream[NameObject("/DecodeParms")] = DictionaryObject({NameObject("/Columns"): NumberObject(1)})
+            page[NameObject("/Contents")] = writer._add_object(stream)
+        fast = content(writer, 0)._data
+
+        report = optimize(writer)
+        self.assertEqual(report.streams_recompressed, 1)  # the level-1 stream without /DecodeParms
+        self.assertLess(len(content(writer, 0)._data), len(fast))
+        self.assertEqual(zlib.decompress(content(writer, 0)._data), data)
+        self.assertEqual(content(writer, 2)._data, zlib.compress(data, 1))
+
+    def test_unreachable_objects_are_dropped(self):
+        writer = PdfWriter(clone_from=io.BytesIO(make_text_pdf(["A", "B"])))
+        orphan = DecodedStreamObject()
+        orphan.set_data(b"nobody uses me" * 10)
+        ref = writer._add_object(orphan)
+        removed, size = remove_unreachable(writer)
+        self.assertEqual(removed, 1)
+        self.assertGreater(size, 140)
+        self.assertIsNone(writer._objects[ref.idnum - 1])
+        self.assertEqual(page_texts(serialize(writer)), ["A", "B"])
+        self.assertEqual(remove_unreachable(writer), (0, 0))
+
+    def test_output_still_parses_strictly(self):
+        writer = PdfWriter(clone_from=io.BytesIO(make_text_pdf(["A", "B", "C"])))
+        optimize(writer)
+        out = serialize(writer)
+        self.assertEqual(len(PdfReader(io.BytesIO(out), strict=True).pages), 3)
+        self.assertEqual(page_texts(out), ["A", "B", "C"])
+
+    @unittest.skipIf(HAS_PILLOW, "Pillow is installed")
+    def test_downsampling_needs_pillow(self):
+        with self.assertRaisesRegex(ImportError, "Pillow"):
+            optimize(PdfWriter(), image_dpi=150)
+
+
+@unittest.skipUnless(HAS_PILLOW, "needs Pillow")
+class DownsampleTest(unittest.TestCase):
+    def image_pdf(self, pixels):
+        writer = PdfWriter()
+        page = writer.add_blank_page(72, 72)  # one inch, so the DPI is the pixel count
+        image = StreamObject()
+        noise = random.Random(pixels)  # noise: resampling has to beat the original's compression
+        image._data = zlib.compress(bytes(noise.getrandbits(8) for _ in range(pixels * pixels * 3)))
+        image.update({
+            NameObject("/Type"): NameObject("/XObject"),
+            NameObject("/Subtype"): NameObject("/Image"),
+            NameObject("/Width"): NumberObject(pixels),
+            NameObject("/Height"): NumberObject(pixels),
+            NameObject("/ColorSpace"): NameObject("/DeviceRGB"),
+            NameObject("/BitsPerComponent"): NumberObject(8),
+            NameObject("/Filter"): NameObject("/FlateDecode"),
+        })
+        page[NameObject("/Resources")] = DictionaryObject({
+            NameObject("/XObject"): DictionaryObject({NameObject("/Im1"): writer._add_object(image)}),
+        })
+        return writer
+
+    def test_dense_images_are_downsampled(self):
+        writer = self.image_pdf(300)
+        report = optimize(writer, image_dpi=100)
+        self.assertEqual(report.images_downsampled, 1)
+        image = writer.pages[0]["/Resources"]["/XObject"]["/Im1"].get_object()
+        self.assertEqual((image["/Width"], image["/Height"]), (100, 100))
+
+    def test_sparse_images_are_kept(self):
+        writer = self.image_pdf(50)
+        report = optimize(writer, image_dpi=100)
+        self.assertEqual(report.images_downsampled, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
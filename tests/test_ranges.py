@@ -0,0 +1,100 @@
+import random
+import unittest
+
+from pdfctl.ranges import (
+    RangeError,
+    RangeSyntaxError,
+    compile_ordered,
+    compile_ranges,
+    compile_split,
+    parse_ranges,
+    validate_ranges,
+)
+
+COMPILERS = {"set": compile_ranges, "split": compile_split, "ordered": compile_ordered}
+
+
+class ValidateRangesTest(unittest.TestCase):
+    def test_valid_expressions(self):
+        for expr, mode in [("1-3,5,7-", "set"), ("-4", "set"), ("1-3, 4-6 ,7-", "split"),
+                           ("10-1:3,1,1", "ordered"), ("1,\t,2", "set")]:
+            with self.subTest(expr=expr):
+                self.assertEqual(validate_ranges(expr, mode=mode), [])
+
+    def test_reports_every_error_with_its_span(self):
+        expr = "1-3,x,7-0,0"
+        self.assertEqual(validate_ranges(expr), [
+            RangeError(4, 5, "Unexpected 'x'"),
+            RangeError(8, 9, "Range end must be >= 1"),
+            RangeError(10, 11, "Page must be >= 1"),
+        ])
+
+    def test_syntax_errors(self):
+        for expr, mode, span in [
+            ("", "set", (0, 0)),
+            (" , ", "set", (0, 3)),
+            ("1 0", "set", (2, 3)),
+            ("1--3", "set", (2, 3)),
+            ("-", "set", (0, 1)),
+            ("+5", "set", (0, 1)),
+            ("3-1", "set", (0, 3)),
+            ("1-4:2", "set", (3, 5)),
+            ("5:2", "ordered", (1, 3)),
+            ("1-4:0", "ordered", (4, 5)),
+            ("1::2", "ordered", (1, 2)),
+        ]:
+            with self.subTest(expr=expr, mode=mode):
+                errors = validate_ranges(expr, mode=mode)
+                self.assertEqual(len(errors), 1)
+                self.assertEqual((errors[0].start, errors[0].end), span)
+
+    def test_backward_spans_only_in_ordered_mode(self):
+        self.assertTrue(validate_ranges("3-1", mode="split"))
+        self.assertEqual(validate_ranges("3-1", mode="ordered"), [])
+
+    def test_pages_beyond_the_document(self):
+        expr = "1-1000000000,x"
+        self.assertEqual(validate_ranges(expr, 5), [
+            RangeError(2, 12, "Page 1000000000 is out of range (document has 5 pages)."),
+            RangeError(13, 14, "Unexpected 'x'"),
+        ])
+        self.assertEqual(validate_ranges("20-1", 10, "ordered")[0].start, 0)
+
+    def test_open_and_stepped_spans_follow_the_compilers(self):
+        # "A-" past the end selects nothing; a step may stop short of the end.
+        self.assertEqual(validate_ranges("12-", 10), [])
+        self.assertEqual(validate_ranges("1-11:3", 10, "ordered"), [])
+        self.assertTrue(validate_ranges("1-10:3", 9, "ordered"))
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            validate_ranges("1", mode="bogus")
+
+
+class CompileTest(unittest.TestCase):
+    def test_compiled_pages(self):
+        self.assertEqual(parse_ranges("1-3,5,7-", 9), [0, 1, 2, 4, 6, 7, 8])
+        self.assertEqual(parse_ranges("5,1-2,10-1:3", 10, ordered=True), [4, 0, 1, 9, 6, 3, 0])
+        self.assertEqual([list(p) for p in compile_split("1-2,\t3-", 4)], [[0, 1], [2, 3]])
+
+    def test_raises_all_errors(self):
+        with self.assertRaises(RangeSyntaxError) as ctx:
+            compile_ranges("x,0")
+        self.assertIsInstance(ctx.exception, ValueError)
+        self.assertEqual(len(ctx.exception.errors), 2)
+
+    def test_compilers_agree_with_the_validator(self):
+        rng = random.Random(0)
+        for _ in range(5000):
+            expr = "".join(rng.choice("0123 \t,-:x") for _ in range(rng.randint(0, 8)))
+            for mode, compile_ in COMPILERS.items():
+                valid = not validate_ranges(expr, mode=mode)
+                with self.subTest(expr=expr, mode=mode):
+                    if valid:
+                        compile_(expr, 10)
+                    else:
+                        self.assertRaises(RangeSyntaxError, compile_, expr, 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
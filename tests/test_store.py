@@ -0,0 +1,69 @@
+import hashlib
+import io
+import os
+import tempfile
+import unittest
+
+from pdfctl.store import UploadConflict, UploadStore
+
+
+class UploadStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = UploadStore(self.tmp.name)
+        self.data = os.urandom(300_000)
+        self.digest = hashlib.sha256(self.data).hexdigest()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_put_is_content_addressed(self):
+        self.assertEqual(self.store.put(self.data), self.digest)
+        self.assertEqual(self.store.put(io.BufferedReader(io.BytesIO(self.data))), self.digest)
+        self.assertEqual(self.store.get(self.digest).read_bytes(), self.data)
+        self.assertEqual(self.store.stats()["entries"], 1)
+
+    def test_pieces_complete_on_finish(self):
+        upload = self.store.begin(len(self.data))
+        offset = 0
+        for start in range(0, len(self.data), 100_000):
+            offset = self.store.append(upload, offset, io.BytesIO(self.data[start:start + 100_000]))
+        self.assertEqual(offset, len(self.data))
+        self.assertEqual(self.store.finish(upload), self.digest)
+        self.assertEqual(self.store.get(self.digest).read_bytes(), self.data)
+        with self.assertRaises(FileNotFoundError):
+            self.store.offset(upload)
+
+    def test_wrong_offset_is_a_conflict(self):
+        upload = self.store.begin()
+        self.store.append(upload, 0, io.BytesIO(b"abc"))
+        with self.assertRaises(UploadConflict) as ctx:
+            self.store.append(upload, 0, io.BytesIO(b"abc"))
+        self.assertEqual(ctx.exception.offset, 3)
+
+    def test_declared_length_is_enforced(self):
+        upload = self.store.begin(4)
+        with self.assertRaises(ValueError):
+            self.store.append(upload, 0, io.BytesIO(b"abcdef"))
+        upload = self.store.begin(4)
+        self.store.append(upload, 0, io.BytesIO(b"ab"))
+        with self.assertRaises(ValueError):
+            self.store.finish(upload)
+
+    def test_resume_in_another_process(self):
+        upload = self.store.begin(len(self.data))
+        self.store.append(upload, 0, io.BytesIO(self.data[:1000]))
+        other = UploadStore(self.tmp.name)  # no running hash: rebuilt from disk
+        other.append(upload, other.offset(upload), io.BytesIO(self.data[1000:]))
+        self.assertEqual(other.finish(upload), self.digest)
+
+    def test_abort_and_unknown_uploads(self):
+        upload = self.store.begin()
+        self.store.abort(upload)
+        for bad in (upload, "../../etc/passwd"):
+            with self.assertRaises(FileNotFoundError):
+                self.store.offset(bad)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+"""
+util.py — Shared helpers for the test suite.
+"""
+
+from __future__ import annotations
+
+import io
+
+from pypdf import PdfReader, PdfWriter
+from pypdf.generic import DecodedStreamObject, DictionaryObject, NameObject, NumberObject
+
+
+def make_pdf(pages: int = 3) -> bytes:
+    """Return a document of `pages` blank pages with a classic xref table."""
+    writer = PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(100, 100)
+    buf = io.BytesIO()
+    writer.write(buf)
+    return buf.getvalue()
+
+
+def make_xref_stream_pdf(pages: int = 3) -> bytes:
+    """Return a document whose last cross-reference section is an xref stream."""
+    return with_xref_stream(make_pdf(pages))
+
+
+def with_xref_stream(data: bytes) -> bytes:
+    """Return `data` with an incremental update whose cross-reference section is an xref stream."""
+    writer = PdfWriter(io.BytesIO(data), incremental=True)
+    writer.pages[0][NameObject("/Rotate")] = NumberObject(0)  # pypdf appends it with an xref stream
+    buf = io.BytesIO()
+    writer.write(buf)
+    return buf.getvalue()
+
+
+def text_page(writer: PdfWriter, text: str, font=None):
+    """Add a page showing `text` in Helvetica; pass `font` to share one font object between pages."""
+    page = writer.add_blank_page(200, 200)
+    if font is None:
+        font = writer._add_object(DictionaryObject({
+            NameObject("/Type"): NameObject("/Font"),
+            NameObject("/Subtype"): NameObject("/Type1"),
+            NameObject("/BaseFont"): NameObject("/Helvetica"),
+        }))
+    page[NameObject("/Resources")] = DictionaryObject({
+        NameObject("/Font"): DictionaryObject({NameObject("/F1"): font}),
+    })
+    content = DecodedStreamObject()
+    content.set_data(f"BT /F1 12 Tf 20 100 Td ({text}) Tj ET".encode())
+    page[NameObject("/Contents")] = writer._add_object(content)
+    return page
+
+
+def make_text_pdf(labels) -> bytes:
+    """Return a document with one page per label, each showing its label."""
+    writer = PdfWriter()
+    for label in labels:
+        text_page(writer, label)
+    buf = io.BytesIO()
+    writer.write(buf)
+    return buf.getvalue()
+
+
+def page_texts(data) -> list[str]:
+    """Return the stripped text of every page of a PDF given as bytes or a stream."""
+    reader = PdfReader(io.BytesIO(data) if isinstance(data, (bytes, bytearray)) else data)
+    return [page.extract_text().strip() for page in reader.pages]